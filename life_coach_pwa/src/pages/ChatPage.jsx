@@ -4,7 +4,7 @@ import { useQuery, useMutation } from 'convex/react';
 import { useConvexAuth } from 'convex/react';
 import { api } from '../../convex/_generated/api';
 import { useStore, SEED_CATEGORIES, WISDOM_CATEGORIES, SEED_DIFFICULTIES } from '../store';
-import { chat, formatChartAsText } from '../utils/api';
+import { createChatSession, sendChatMessage, getChartPrompt, normalizeBirthData, formatChartAsText } from '../utils/api';
 import { Send, User, Sparkles, ArrowLeft, Sprout, Check, RotateCcw, BookOpen } from 'lucide-react';
 import ReactMarkdown from 'react-markdown';
 import clsx from 'clsx';
@@ -115,6 +115,7 @@ export default function ChatPage() {
     const [acceptedWisdom, setAcceptedWisdom] = useState(new Set());
     const [showRestartConfirm, setShowRestartConfirm] = useState(false);
     const messagesEndRef = useRef(null);
+    const sessionRef = useRef(null);
 
     const today = getLocalDateString();
     const latestCheckin = checkins.length > 0
@@ -142,10 +143,14 @@ export default function ChatPage() {
         scrollToBottom();
     }, [sortedMessages, loading]);
 
-    // Build system prompt fresh each time (not stored)
-    const buildSystemPrompt = () => {
-        const chartText = formatChartAsText(chart, dasha);
+    // A new profile or chart needs a new session (its system prompt changes)
+    useEffect(() => {
+        sessionRef.current = null;
+    }, [user, chart, dasha]);
 
+    // Context that changes from turn to turn, sent with each message so the
+    // session's system prompt stays byte-identical and the prompt cache hits
+    const buildTurnContext = () => {
         // Current date/time context for the guru
         const now = new Date();
         const dateContext = `Current date: ${now.toLocaleDateString('en-US', { weekday: 'long', year: 'numeric', month: 'long', day: 'numeric' })}
@@ -210,9 +215,21 @@ TODAY'S COSMIC ENERGY:
 Reference today's energy when relevant to my questions.`;
         }
 
-        return `You are a wise Vedic life guide - an omniscient spiritual mentor who integrates ancient wisdom with practical modern guidance.
+        return `${dateContext}${panchangContext}${seedContext}${wisdomContext}`;
+    };
+
+    // The compact chart encoding is built by the server; without birth data
+    // the stored chart is written out in full
+    const loadChartText = async () => {
+        if (!user.birthData) return formatChartAsText(chart, dasha);
+        const prompt = await getChartPrompt(normalizeBirthData(user.birthData), true);
+        return prompt.text;
+    };
 
-${dateContext}
+    // System prompt, fixed for the life of a chat session
+    const buildSystemPrompt = (chartText) => {
+
+        return `You are a wise Vedic life guide - an omniscient spiritual mentor who integrates ancient wisdom with practical modern guidance.
 
 I am ${user.name || 'a seeker'}.
 
@@ -221,7 +238,9 @@ My profile:
 - Profession: ${user.profession || 'Not specified'}
 - Relationship Status: ${user.relationshipStatus || 'Not specified'}
 
-${chartText}${panchangContext}${seedContext}${wisdomContext}
+${chartText}
+
+Each of my messages may start with today's context (date, cosmic energy, my garden and saved wisdom).
 
 Use this astrological context to personalize ALL your guidance - for health, relationships, career, spirituality, or any topic I ask about.
 
@@ -236,6 +255,28 @@ IMPORTANT CAPABILITIES:
 Be warm, wise, and practical. Connect insights across all areas of life.`;
     };
 
+    // The server keeps the conversation; only the new message is sent. A session
+    // is (re)created from the stored messages when there is none or it expired.
+    const ensureSession = async () => {
+        if (!sessionRef.current) {
+            const history = sortedMessages.map(m => ({ role: m.role, content: m.content }));
+            const system = buildSystemPrompt(await loadChartText());
+            const session = await createChatSession({ system, history });
+            sessionRef.current = session.session_id;
+        }
+        return sessionRef.current;
+    };
+
+    const sendSessionMessage = async (message, context) => {
+        try {
+            return await sendChatMessage(await ensureSession(), message, context);
+        } catch (err) {
+            if (err.response?.status !== 404) throw err;
+            sessionRef.current = null;
+            return await sendChatMessage(await ensureSession(), message, context);
+        }
+    };
+
     const handleSend = async (e) => {
         e.preventDefault();
         if (!input.trim() || loading) return;
@@ -255,17 +296,7 @@ Be warm, wise, and practical. Connect insights across all areas of life.`;
         setLoading(true);
 
         try {
-            // Build system prompt fresh (always current)
-            const systemPrompt = buildSystemPrompt();
-
-            // Get conversation history (just user/assistant messages)
-            const apiHistory = [
-                { role: 'system', content: systemPrompt },
-                ...sortedMessages.map(m => ({ role: m.role, content: m.content })),
-                { role: 'user', content: userMessage }
-            ];
-
-            const response = await chat(userMessage, apiHistory);
+            const response = await sendSessionMessage(userMessage, buildTurnContext());
 
             if (response.success) {
                 // Add assistant message to Convex
@@ -308,6 +339,7 @@ Be warm, wise, and practical. Connect insights across all areas of life.`;
 
     const handleRestartConversation = async () => {
         await clearMessages();
+        sessionRef.current = null;
         setShowRestartConfirm(false);
     };
 
@@ -59,8 +59,14 @@ export async function calculateDasha(birthData) {
   return response.data
 }
 
-export async function interpretChart(birthData, structured = true) {
-  const response = await axios.post(`${API_BASE}/interpret?structured=${structured}`, birthData)
+export async function interpretChart(birthData, structured = true, compact = false) {
+  const response = await axios.post(`${API_BASE}/interpret?structured=${structured}&compact=${compact}`, birthData)
+  return response.data
+}
+
+/** The chart text of an interpretation prompt with its token counts, verbose and compact. */
+export async function getChartPrompt(birthData, compact = true) {
+  const response = await axios.post(`${API_BASE}/interpret/prompt?compact=${compact}`, birthData)
   return response.data
 }
 
@@ -77,6 +83,32 @@ export async function chat(message, history) {
   return response.data
 }
 
+/**
+ * Start a server-side chat session
+ * @param {Object} options - { system } prompt, or { birth_data, compact } for the chart prompt;
+ *   history: earlier {role, content} messages to resume from
+ * @returns {Object} { session_id, messages, prompt_tokens }
+ */
+export async function createChatSession({ system, birth_data, compact, history = [] }) {
+  const response = await axios.post(`${API_BASE}/chat/sessions`, { system, birth_data, compact, history })
+  return response.data
+}
+
+/**
+ * Send the next message of a chat session - only the new message travels
+ * @param {string} context - Per-turn context (date, progress), sent ahead of the message
+ * @returns {Object} { response, reasoning, usage: { prompt_tokens, cached_tokens, ... }, totals }
+ */
+export async function sendChatMessage(sessionId, message, context = null) {
+  const response = await axios.post(`${API_BASE}/chat/sessions/${sessionId}/messages`, { message, context })
+  return response.data
+}
+
+export async function deleteChatSession(sessionId) {
+  const response = await axios.delete(`${API_BASE}/chat/sessions/${sessionId}`)
+  return response.data
+}
+
 /**
  * Format chart data as text for system prompt
  * @param {Object} chart - Chart data from store
@@ -163,3 +195,94 @@ export async function getAlignment(latitude, longitude) {
   const response = await axios.post(`${API_BASE}/alignment`, data);
   return response.data;
 }
+
+// Panchang for every day of a month (or a whole year when month is omitted)
+export async function getPanchangCalendar(latitude, longitude, year, month = null) {
+  const data = { year, latitude, longitude };
+  if (month) data.month = month;
+  const response = await axios.post(`${API_BASE}/calendar`, data);
+  return response.data;
+}
+
+// Transit events of a natal chart, streamed as NDJSON; onEvent is called per event in time order
+export async function streamTransitTimeline(chart, { start, end, bodies } = {}, onEvent) {
+  const response = await fetch(`${API_BASE}/transits/timeline`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ chart, start, end, bodies })
+  });
+  if (!response.ok) throw new Error(`Transit timeline failed: ${response.status}`);
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  for (;;) {
+    const { done, value } = await reader.read();
+    buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+    const lines = buffer.split('\n');
+    buffer = lines.pop();
+    for (const line of lines) {
+      if (!line) continue;
+      const event = JSON.parse(line);
+      if (event.error) throw new Error(event.error);
+      onEvent(event);
+    }
+    if (done) break;
+  }
+}
+
+/**
+ * POST a request and read its Server-Sent Events response.
+ * Calls onEvent(event, data) for every event ('reasoning' and 'content'
+ * carry {text}); resolves with the data of the final 'done' event.
+ */
+async function streamSSE(path, body, onEvent) {
+  const response = await fetch(`${API_BASE}${path}`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(body)
+  });
+  if (!response.ok) throw new Error(`Request failed: ${response.status}`);
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let result = null;
+  for (;;) {
+    const { done, value } = await reader.read();
+    buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+    const messages = buffer.split('\n\n');
+    buffer = messages.pop();
+    for (const message of messages) {
+      let event = 'message';
+      let data = '';
+      for (const line of message.split('\n')) {
+        if (line.startsWith('event: ')) event = line.slice(7);
+        else if (line.startsWith('data: ')) data += line.slice(6);
+      }
+      const parsed = data ? JSON.parse(data) : null;
+      if (event === 'error') throw new Error(parsed.error);
+      if (event === 'done') result = parsed;
+      onEvent(event, parsed);
+    }
+    if (done) break;
+  }
+  return result;
+}
+
+export function streamInterpretation(birthData, structured = true, onEvent, compact = false) {
+  return streamSSE(`/interpret/stream?structured=${structured}&compact=${compact}`, birthData, onEvent);
+}
+
+export function streamChat(message, history, onEvent) {
+  return streamSSE('/chat/v2/stream', { message, history }, onEvent);
+}
+
+export function streamChatMessage(sessionId, message, context, onEvent) {
+  return streamSSE(`/chat/sessions/${sessionId}/messages/stream`, { message, context }, onEvent);
+}
+
+/** Sends a 'synastry' event with the calculated data before the interpretation streams. */
+export function streamSynastry(people, onEvent) {
+  return streamSSE('/synastry/stream', { people }, onEvent);
+}
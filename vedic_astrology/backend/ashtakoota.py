@@ -0,0 +1,227 @@
+"""
+Ashtakoota (guna milan): the classical 36-point marriage compatibility score.
+
+All eight kootas depend only on each person's Moon nakshatra, pada and sign,
+and the pada fixes the other two (4 padas per nakshatra, 9 per sign). So
+there are only 108 x 108 possible pairs. Every koota score for every pair is
+computed once, into an int8 table of half-points (8 x 108 x 108, ~93 KB),
+and scoring a pair, or a whole candidate list, is a table lookup.
+
+Four kootas are asymmetric between the two people (Varna, Vashya, Gana and
+the direction of Tara counts), so the table is indexed [koota, groom pada,
+bride pada], following the classical texts.
+
+Scores follow the common North Indian tables; dosha cancellations (e.g.
+same-lord exceptions for Nadi and Bhakoot) are not applied, only flagged.
+"""
+
+from functools import lru_cache
+from typing import Dict, Any, List, Sequence
+
+import numpy as np
+
+from calculator import SIGNS, NAKSHATRAS, PLANET_DIGNITIES, get_sign_ruler
+
+NAKSHATRA_SPAN = 360 / 27
+PADA_COUNT = 108
+
+KOOTAS = ('varna', 'vashya', 'tara', 'yoni', 'graha_maitri', 'gana', 'bhakoot', 'nadi')
+KOOTA_MAX = {'varna': 1, 'vashya': 2, 'tara': 3, 'yoni': 4, 'graha_maitri': 5, 'gana': 6, 'bhakoot': 7, 'nadi': 8}
+TOTAL_MAX = sum(KOOTA_MAX.values())
+
+# -----------------------------------------------------------------------------
+# Classification of a Moon position
+# -----------------------------------------------------------------------------
+
+# Varna by sign (element): Brahmin 3 > Kshatriya 2 > Vaishya 1 > Shudra 0
+VARNAS = ['Shudra', 'Vaishya', 'Kshatriya', 'Brahmin']
+SIGN_VARNA = [2, 1, 0, 3, 2, 1, 0, 3, 2, 1, 0, 3]  # fire, earth, air, water
+
+# Vashya groups by sign; Sagittarius and Capricorn change at 15 degrees
+VASHYAS = ['Chatushpada', 'Manava', 'Jalachara', 'Vanachara', 'Keeta']
+SIGN_VASHYA = [0, 0, 1, 2, 3, 1, 1, 4, (1, 0), (0, 2), 1, 2]  # (first half, second half)
+VASHYA_POINTS = [  # groom row, bride column
+    [2, 1, 1, 0.5, 1],
+    [0.5, 2, 0.5, 0, 1],
+    [1, 0.5, 2, 1, 1],
+    [0, 0, 0, 2, 0],
+    [1, 1, 1, 0, 2],
+]
+
+# Yoni animal of each nakshatra, and animal pair points (symmetric)
+YONIS = ['Horse', 'Elephant', 'Sheep', 'Serpent', 'Dog', 'Cat', 'Rat',
+         'Cow', 'Buffalo', 'Tiger', 'Deer', 'Monkey', 'Mongoose', 'Lion']
+NAKSHATRA_YONI = [0, 1, 2, 3, 3, 4, 5, 2, 5, 6, 6, 7, 8, 9, 8, 9, 10, 10, 4, 11, 12, 11, 13, 0, 13, 7, 1]
+YONI_POINTS = [
+    [4, 2, 2, 3, 2, 2, 2, 1, 0, 1, 3, 3, 2, 1],
+    [2, 4, 3, 3, 2, 2, 2, 2, 3, 1, 2, 3, 2, 0],
+    [2, 3, 4, 2, 1, 2, 1, 3, 3, 1, 2, 0, 3, 1],
+    [3, 3, 2, 4, 2, 1, 1, 1, 1, 2, 2, 2, 0, 2],
+    [2, 2, 1, 2, 4, 2, 1, 2, 2, 1, 0, 2, 1, 1],
+    [2, 2, 2, 1, 2, 4, 0, 2, 2, 1, 3, 3, 2, 1],
+    [2, 2, 1, 1, 1, 0, 4, 2, 2, 2, 2, 2, 1, 2],
+    [1, 2, 3, 1, 2, 2, 2, 4, 3, 0, 3, 2, 2, 1],
+    [0, 3, 3, 1, 2, 2, 2, 3, 4, 1, 2, 2, 2, 1],
+    [1, 1, 1, 2, 1, 1, 2, 0, 1, 4, 1, 1, 2, 1],
+    [3, 2, 2, 2, 0, 3, 2, 3, 2, 1, 4, 2, 2, 1],
+    [3, 3, 0, 2, 2, 3, 2, 2, 2, 1, 2, 4, 3, 2],
+    [2, 2, 3, 0, 1, 2, 1, 2, 2, 2, 2, 3, 4, 2],
+    [1, 0, 1, 2, 1, 1, 2, 1, 1, 1, 1, 2, 2, 4],
+]
+
+# Gana of each nakshatra, and groom/bride points
+GANAS = ['Deva', 'Manushya', 'Rakshasa']
+NAKSHATRA_GANA = [0, 1, 2, 1, 0, 1, 0, 0, 2, 2, 1, 1, 0, 2, 0, 2, 0, 2, 2, 1, 1, 0, 2, 2, 1, 1, 0]
+GANA_POINTS = [
+    [6, 6, 1],
+    [5, 6, 0],
+    [1, 0, 6],
+]
+
+# Nadi runs Adi, Madhya, Antya, Antya, Madhya, Adi around the nakshatras
+NADIS = ['Adi', 'Madhya', 'Antya']
+NADI_CYCLE = [0, 1, 2, 2, 1, 0]
+
+# Tara: counts of 3 (Vipat), 5 (Pratyak) and 7 (Naidhana) are inauspicious
+BAD_TARAS = {3, 5, 7}
+
+# Bhakoot: sign distances 2/12, 5/9 and 6/8 are doshas
+BAD_BHAKOOT = {2, 12, 5, 9, 6, 8}
+
+# Graha maitri points by how each sign lord regards the other
+MAITRI_POINTS = {
+    ('friend', 'friend'): 5, ('friend', 'neutral'): 4, ('neutral', 'neutral'): 3,
+    ('friend', 'enemy'): 1, ('neutral', 'enemy'): 0.5, ('enemy', 'enemy'): 0,
+}
+
+
+def pada_index(moon_longitude: float) -> int:
+    """0-107 index of the Moon's nakshatra pada, as get_nakshatra divides it."""
+    nakshatra_idx = int(moon_longitude / NAKSHATRA_SPAN)
+    pada = int((moon_longitude % NAKSHATRA_SPAN) / (NAKSHATRA_SPAN / 4))
+    return nakshatra_idx * 4 + pada
+
+
+def pada_indices(moon_longitudes) -> np.ndarray:
+    """pada_index for an array of Moon longitudes."""
+    lons = np.asarray(moon_longitudes, dtype=np.float64)
+    nakshatra_idx = (lons / NAKSHATRA_SPAN).astype(np.intp)
+    pada = ((lons % NAKSHATRA_SPAN) / (NAKSHATRA_SPAN / 4)).astype(np.intp)
+    return nakshatra_idx * 4 + pada
+
+
+def _vashya(pada: int) -> int:
+    sign, position = divmod(pada, 9)
+    group = SIGN_VASHYA[sign]
+    if isinstance(group, tuple):
+        # A pada starting before 15 degrees (the fifth starts at 13°20') counts as first half
+        return group[1] if position >= 5 else group[0]
+    return group
+
+
+def _regard(planet: str, other: str) -> str:
+    relations = PLANET_DIGNITIES[planet]
+    if other in relations['friends']:
+        return 'friend'
+    if other in relations['enemies']:
+        return 'enemy'
+    return 'neutral'
+
+
+def _graha_maitri(lord1: str, lord2: str) -> float:
+    if lord1 == lord2:
+        return 5
+    pair = tuple(sorted((_regard(lord1, lord2), _regard(lord2, lord1)),
+                        key=('friend', 'neutral', 'enemy').index))
+    return MAITRI_POINTS[pair]
+
+
+def _tara_points(from_nakshatra: int, to_nakshatra: int) -> float:
+    count = (to_nakshatra - from_nakshatra) % 27 + 1
+    return 0 if (count % 9 or 9) in BAD_TARAS else 1.5
+
+
+def koota_scores(groom_pada: int, bride_pada: int) -> Dict[str, float]:
+    """The eight koota scores for one pair of Moon padas, from the rules (no table)."""
+    g_nak, b_nak = groom_pada // 4, bride_pada // 4
+    g_sign, b_sign = groom_pada // 9, bride_pada // 9
+    sign_distance = (g_sign - b_sign) % 12 + 1  # counted from the bride's sign
+
+    return {
+        'varna': 1 if SIGN_VARNA[g_sign] >= SIGN_VARNA[b_sign] else 0,
+        'vashya': VASHYA_POINTS[_vashya(groom_pada)][_vashya(bride_pada)],
+        'tara': _tara_points(b_nak, g_nak) + _tara_points(g_nak, b_nak),
+        'yoni': YONI_POINTS[NAKSHATRA_YONI[g_nak]][NAKSHATRA_YONI[b_nak]],
+        'graha_maitri': _graha_maitri(get_sign_ruler(SIGNS[g_sign]), get_sign_ruler(SIGNS[b_sign])),
+        'gana': GANA_POINTS[NAKSHATRA_GANA[g_nak]][NAKSHATRA_GANA[b_nak]],
+        'bhakoot': 0 if sign_distance in BAD_BHAKOOT else 7,
+        'nadi': 0 if NADI_CYCLE[g_nak % 6] == NADI_CYCLE[b_nak % 6] else 8,
+    }
+
+
+@lru_cache(maxsize=None)
+def koota_table() -> np.ndarray:
+    """Half-point scores, int8 array [koota, groom pada, bride pada]; built once per process."""
+    table = np.empty((len(KOOTAS), PADA_COUNT, PADA_COUNT), dtype=np.int8)
+    for g in range(PADA_COUNT):
+        for b in range(PADA_COUNT):
+            scores = koota_scores(g, b)
+            table[:, g, b] = [int(scores[k] * 2) for k in KOOTAS]
+    table.setflags(write=False)
+    return table
+
+
+def moon_profile(pada: int) -> Dict[str, Any]:
+    """Nakshatra, pada, sign and the koota classes of a Moon pada."""
+    nakshatra = pada // 4
+    return {
+        'nakshatra': NAKSHATRAS[nakshatra],
+        'pada': pada % 4 + 1,
+        'sign': SIGNS[pada // 9],
+        'varna': VARNAS[SIGN_VARNA[pada // 9]],
+        'vashya': VASHYAS[_vashya(pada)],
+        'yoni': YONIS[NAKSHATRA_YONI[nakshatra]],
+        'gana': GANAS[NAKSHATRA_GANA[nakshatra]],
+        'nadi': NADIS[NADI_CYCLE[nakshatra % 6]],
+    }
+
+
+def _result(half_points: np.ndarray) -> Dict[str, Any]:
+    kootas = {k: {'score': int(p) / 2, 'max': KOOTA_MAX[k]} for k, p in zip(KOOTAS, half_points.tolist())}
+    return {
+        'total': int(half_points.sum()) / 2,
+        'max': TOTAL_MAX,
+        'kootas': kootas,
+        'nadi_dosha': kootas['nadi']['score'] == 0,
+        'bhakoot_dosha': kootas['bhakoot']['score'] == 0,
+    }
+
+
+def ashtakoota(groom_moon_longitude: float, bride_moon_longitude: float) -> Dict[str, Any]:
+    """Ashtakoota score of one couple from their sidereal Moon longitudes."""
+    g, b = pada_index(groom_moon_longitude), pada_index(bride_moon_longitude)
+    return {
+        **_result(koota_table()[:, g, b]),
+        'groom': moon_profile(g),
+        'bride': moon_profile(b),
+    }
+
+
+def ashtakoota_batch(moon_longitude: float, candidate_moon_longitudes: Sequence[float],
+                     role: str = 'groom') -> List[Dict[str, Any]]:
+    """
+    Ashtakoota of one person against many candidates, in candidate order.
+
+    role is the person's side ('groom' or 'bride'); candidates take the other.
+    """
+    if role not in ('groom', 'bride'):
+        raise ValueError(f"Unknown role: {role}")
+    own = pada_index(moon_longitude)
+    others = pada_indices(candidate_moon_longitudes)
+    table = koota_table()
+    half_points = table[:, own, others] if role == 'groom' else table[:, others, own]  # (kootas, n)
+
+    results = []
+    for pada, points in zip(others.tolist(), half_points.T):
+        results.append({**_result(points), 'moon': moon_profile(pada)})
+    return results
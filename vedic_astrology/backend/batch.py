@@ -0,0 +1,163 @@
+"""
+Vectorized batch chart engine for bulk recomputation jobs.
+
+Planet positions are read for the whole batch from the precomputed
+ephemeris table when one is loaded (otherwise one Swiss Ephemeris call per
+body per chart), and everything that follows (signs, nakshatras, padas,
+houses) is derived with NumPy over the whole batch instead of building
+nested dicts chart by chart.
+"""
+
+import numpy as np
+import swisseph as swe
+from typing import Dict, Any, Sequence
+
+import ephemeris
+from calculator import (
+    PLANETS, SIGNS, NAKSHATRAS, NAKSHATRA_LORDS, DEFAULT_AYANAMSA,
+    local_to_utc, calculate_julian_day, get_body_position, set_sidereal_mode
+)
+
+# Column order of every (n_charts, n_bodies) array; Ketu is derived from Rahu
+BODY_NAMES = list(PLANETS.keys()) + ['Ketu']
+
+NAKSHATRA_SPAN = 360 / 27
+PADA_SPAN = NAKSHATRA_SPAN / 4
+
+
+def body_positions(jds: np.ndarray, name: str, ayanamsa_type: str = DEFAULT_AYANAMSA):
+    """
+    (longitudes, speeds) arrays of one body for many Julian Days.
+
+    Straight from the precomputed table when its range covers every date
+    (Lahiri only), otherwise one ephemeris call per date.
+    """
+    positions = ephemeris.lookup_many(jds, name) if ayanamsa_type == DEFAULT_AYANAMSA else None
+    if positions is None:
+        return np.array([get_body_position(float(jd), name, ayanamsa_type) for jd in jds]).reshape(-1, 2).T
+
+    # Dates in segments the table leaves to Swiss Ephemeris
+    lons, speeds = positions
+    for i in np.flatnonzero(np.isnan(lons)):
+        lons[i], speeds[i] = get_body_position(float(jds[i]), name, ayanamsa_type)
+    return lons, speeds
+
+
+def calculate_charts_batch(years: Sequence[int], months: Sequence[int], days: Sequence[int],
+                           hours: Sequence[int], minutes: Sequence[int],
+                           latitudes: Sequence[float], longitudes: Sequence[float]) -> Dict[str, Any]:
+    """
+    Calculate many birth charts in one pass.
+
+    Args:
+        years, months, days: Birth dates (equal-length sequences)
+        hours, minutes: Birth times (local time)
+        latitudes, longitudes: Birth place coordinates
+
+    Returns:
+        Dictionary of arrays, see calculate_charts_batch_jd
+    """
+    jds = np.array([
+        calculate_julian_day(local_to_utc(int(y), int(mo), int(d), int(h), int(mi), float(lat), float(lng)))
+        for y, mo, d, h, mi, lat, lng in zip(years, months, days, hours, minutes, latitudes, longitudes)
+    ], dtype=np.float64)
+    return calculate_charts_batch_jd(jds, latitudes, longitudes)
+
+
+def calculate_charts_batch_jd(jds: Sequence[float], latitudes: Sequence[float],
+                              longitudes: Sequence[float]) -> Dict[str, Any]:
+    """
+    Calculate many birth charts from UTC Julian Days.
+
+    Returns a dictionary of arrays. Per-body arrays have shape
+    (n_charts, len(BODY_NAMES)) with columns in BODY_NAMES order:
+        longitude, speed, sign_idx (0-11), degree, nakshatra_idx (0-26),
+        pada (1-4), retrograde, house (1-12)
+    The 'ascendant' entry holds (n_charts,) arrays of the same fields.
+    """
+    jds = np.asarray(jds, dtype=np.float64)
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    n = len(jds)
+
+    lon = np.empty((n, len(BODY_NAMES)), dtype=np.float64)
+    speed = np.empty((n, len(BODY_NAMES)), dtype=np.float64)
+    asc_lon = np.empty(n, dtype=np.float64)
+    ayanamsa = np.empty(n, dtype=np.float64)
+
+    set_sidereal_mode(DEFAULT_AYANAMSA)
+
+    # Planet positions come straight from the precomputed table when it
+    # covers the whole batch, otherwise one ephemeris call per chart
+    for j, name in enumerate(PLANETS):
+        lon[:, j], speed[:, j] = body_positions(jds, name)
+
+    # Ayanamsa and houses always need the per-chart calls
+    for i in range(n):
+        jd = float(jds[i])
+        ayanamsa[i] = swe.get_ayanamsa(jd)
+        asc_lon[i] = swe.houses_ex(jd, float(latitudes[i]), float(longitudes[i]), b'W', swe.FLG_SIDEREAL)[1][0]
+
+    # Ketu is always opposite Rahu, moving with the same speed
+    rahu = BODY_NAMES.index('Rahu')
+    lon[:, -1] = (lon[:, rahu] + 180) % 360
+    speed[:, -1] = speed[:, rahu]
+
+    sign_idx = (lon // 30).astype(np.int8)
+    asc_sign_idx = (asc_lon // 30).astype(np.int8)
+
+    retrograde = speed < 0
+    # Rahu (the mean node) is retrograde by its negative speed; Ketu is marked
+    # retrograde outright, as calculate_chart does
+    retrograde[:, -1] = True
+
+    return {
+        'bodies': BODY_NAMES,
+        'jd': jds,
+        'ayanamsa': ayanamsa,
+        'longitude': lon,
+        'speed': speed,
+        'sign_idx': sign_idx,
+        'degree': lon % 30,
+        'nakshatra_idx': (lon / NAKSHATRA_SPAN).astype(np.int8),
+        'pada': ((lon % NAKSHATRA_SPAN) / PADA_SPAN).astype(np.int8) + 1,
+        'retrograde': retrograde,
+        # Whole sign houses relative to the ascendant sign
+        'house': ((sign_idx - asc_sign_idx[:, None]) % 12 + 1).astype(np.int8),
+        'ascendant': {
+            'longitude': asc_lon,
+            'sign_idx': asc_sign_idx,
+            'degree': asc_lon % 30,
+            'nakshatra_idx': (asc_lon / NAKSHATRA_SPAN).astype(np.int8),
+            'pada': ((asc_lon % NAKSHATRA_SPAN) / PADA_SPAN).astype(np.int8) + 1,
+        },
+    }
+
+
+def batch_chart_summary(batch: Dict[str, Any], index: int) -> Dict[str, Any]:
+    """
+    Decode one chart of a batch into names (sign, nakshatra, lord, house per body).
+
+    Meant for spot checks and reporting; bulk consumers should read the arrays.
+    """
+    planets = {}
+    for j, name in enumerate(batch['bodies']):
+        nak_idx = int(batch['nakshatra_idx'][index, j])
+        planets[name] = {
+            'longitude': round(float(batch['longitude'][index, j]), 4),
+            'sign': SIGNS[int(batch['sign_idx'][index, j])],
+            'nakshatra': NAKSHATRAS[nak_idx],
+            'pada': int(batch['pada'][index, j]),
+            'lord': NAKSHATRA_LORDS[nak_idx],
+            'retrograde': bool(batch['retrograde'][index, j]),
+            'house': int(batch['house'][index, j]),
+        }
+    asc = batch['ascendant']
+    return {
+        'ascendant': {
+            'longitude': round(float(asc['longitude'][index]), 4),
+            'sign': SIGNS[int(asc['sign_idx'][index])],
+            'nakshatra': NAKSHATRAS[int(asc['nakshatra_idx'][index])],
+        },
+        'planets': planets,
+    }
@@ -0,0 +1,50 @@
+"""
+Compatibility ranking benchmark.
+
+Ranking one chart against N_CANDIDATES stored charts: calculate_synastry_pair
+per candidate (timed on a sample and scaled up) versus CandidatePool.top_k.
+
+Run from backend/:  python -m benchmarks.bench_matching
+"""
+
+import time
+import numpy as np
+
+from batch import BODY_NAMES
+from calculator import calculate_synastry_pair
+from matching import CandidatePool
+from test_matching import synthetic_chart
+
+N_CANDIDATES = 50_000
+SAMPLE = 2_000
+TOP_K = 10
+
+
+def best_of(func, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    person = synthetic_chart(rng.uniform(0, 360, len(BODY_NAMES)))
+    lons = np.round(rng.uniform(0, 360, (N_CANDIDATES, len(BODY_NAMES))), 4)
+    charts = [synthetic_chart(row) for row in lons[:SAMPLE]]
+
+    def pairwise():
+        scores = [calculate_synastry_pair(person, c, 'A', 'B')['compatibility_score'] for c in charts]
+        return sorted(range(len(scores)), key=lambda i: -scores[i])[:TOP_K]
+
+    old = best_of(pairwise, repeat=1) * N_CANDIDATES / SAMPLE
+    pool = CandidatePool(list(range(N_CANDIDATES)), lons)
+    new = best_of(lambda: pool.top_k(person, TOP_K))
+    print(f"top {TOP_K} of {N_CANDIDATES}: synastry pairs {old:6.2f} s (scaled from {SAMPLE})   "
+          f"CandidatePool {new * 1000:6.1f} ms   ({old / new:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Verbose against compact chart encoding in LLM prompts.
+
+Side by side for the prompts that carry a chart:
+
+- /api/interpret: system prompt + structured request + chart (no vargas)
+- /api/chat: chat system prompt + chart with all 16 vargas, sent again with
+  the whole history on every turn (CHAT_TURNS turns, answers of about
+  CHAT_ANSWER_TOKENS tokens)
+
+Offline it prints input tokens per prompt (exact with tiktoken installed,
+estimated otherwise; see interpreter.count_tokens) and the input cost at
+INPUT_PRICE_PER_MILLION. With --live and a real DEEPSEEK_API_KEY it also
+calls the reasoner REPEAT times per variant and reports the prompt tokens
+the API billed, the time to the first streamed token and the total time.
+
+Run from backend/:  python -m benchmarks.bench_prompts [--live]
+"""
+
+import sys
+import time
+import asyncio
+import statistics
+
+import interpreter
+from calculator import LazyVargas, build_chart_context, calculate_chart, calculate_dasha
+from interpreter import count_tokens, tokenizer_name
+
+BIRTHS = [
+    dict(year=1990, month=5, day=15, hour=10, minute=30, latitude=28.6139, longitude=77.2090),
+    dict(year=1975, month=11, day=2, hour=4, minute=45, latitude=19.0760, longitude=72.8777),
+    dict(year=2001, month=8, day=23, hour=18, minute=5, latitude=40.7128, longitude=-74.0060),
+]
+CHAT_TURNS = 10
+CHAT_ANSWER_TOKENS = 400
+CHAT_QUESTION = "What does my current dasha mean for my career?"
+INPUT_PRICE_PER_MILLION = 0.55  # USD, deepseek-reasoner input (cache miss) list price; adjust to the current rate
+REPEAT = 3
+
+
+def chart_and_dasha(birth, vargas=False):
+    context = build_chart_context(**birth)
+    chart, dasha = calculate_chart(context=context), calculate_dasha(context=context)
+    if vargas:
+        chart['vargas'] = LazyVargas(chart)
+    return chart, dasha
+
+
+def message_tokens(messages) -> int:
+    return sum(count_tokens(message['content']) for message in messages)
+
+
+def chat_messages(chart, dasha, compact):
+    """The first /api/chat request."""
+    return interpreter._chart_chat_messages(chart, dasha, CHAT_QUESTION, None, compact)
+
+
+def conversation_tokens(first_request: int) -> int:
+    """Input tokens over CHAT_TURNS turns: every turn resends the prompt and the history so far."""
+    turn = count_tokens(CHAT_QUESTION) + CHAT_ANSWER_TOKENS
+    return sum(first_request + i * turn for i in range(CHAT_TURNS))
+
+
+def offline_report():
+    print(f"tokenizer: {tokenizer_name()}")
+    print(f"{'':28s} {'verbose':>9s} {'compact':>9s} {'saved':>7s}")
+    totals = {}
+    for birth in BIRTHS:
+        label = f"{birth['year']}-{birth['month']:02d}-{birth['day']:02d}"
+        chart, dasha = chart_and_dasha(birth)
+        chat_chart, _ = chart_and_dasha(birth, vargas=True)
+        rows = [
+            ("interpret", *(message_tokens(interpreter._structured_messages(chart, dasha, compact))
+                            for compact in (False, True))),
+            ("chat, first turn", *(message_tokens(chat_messages(chat_chart, dasha, compact))
+                                   for compact in (False, True))),
+        ]
+        rows.append((f"chat, {CHAT_TURNS} turns", conversation_tokens(rows[1][1]), conversation_tokens(rows[1][2])))
+        print(label)
+        for name, verbose, compact in rows:
+            print(f"  {name:26s} {verbose:9d} {compact:9d} {100 * (verbose - compact) / verbose:6.1f}%")
+            saved = totals.setdefault(name, [0, 0])
+            saved[0] += verbose
+            saved[1] += compact
+
+    print(f"input cost per request at ${INPUT_PRICE_PER_MILLION}/M tokens (mean of {len(BIRTHS)} charts)")
+    for name, (verbose, compact) in totals.items():
+        verbose, compact = verbose / len(BIRTHS), compact / len(BIRTHS)
+        print(f"  {name:26s} ${verbose * INPUT_PRICE_PER_MILLION / 1e6:.5f} -> "
+              f"${compact * INPUT_PRICE_PER_MILLION / 1e6:.5f}")
+
+
+async def timed_call(messages, max_tokens):
+    """(billed prompt tokens, seconds to first token, total seconds) of one streamed call."""
+    started = time.perf_counter()
+    first = None
+    usage = None
+    stream = await interpreter.client.chat.completions.create(
+        model=interpreter.MODEL, messages=messages, max_tokens=max_tokens,
+        stream=True, stream_options={"include_usage": True}
+    )
+    async for chunk in stream:
+        if chunk.usage is not None:
+            usage = chunk.usage
+        if first is None and chunk.choices:
+            delta = chunk.choices[0].delta
+            if getattr(delta, 'reasoning_content', None) or delta.content:
+                first = time.perf_counter() - started
+    return usage.prompt_tokens if usage else None, first, time.perf_counter() - started
+
+
+async def live_report():
+    birth = BIRTHS[0]
+    chart, dasha = chart_and_dasha(birth)
+    chat_chart, _ = chart_and_dasha(birth, vargas=True)
+    cases = [
+        ("interpret", lambda compact: interpreter._structured_messages(chart, dasha, compact), 8192),
+        ("chat", lambda compact: chat_messages(chat_chart, dasha, compact), 4096),
+    ]
+    print(f"live, {REPEAT} calls per variant ({interpreter.MODEL})")
+    print(f"{'':20s} {'prompt':>8s} {'first token':>12s} {'total':>9s} {'cost':>10s}")
+    for name, build, max_tokens in cases:
+        for compact in (False, True):
+            results = []
+            for _ in range(REPEAT):
+                results.append(await timed_call(build(compact), max_tokens))
+            prompt = results[0][0] or 0
+            first = statistics.median(r[1] for r in results if r[1] is not None)
+            total = statistics.median(r[2] for r in results)
+            variant = f"{name} {'compact' if compact else 'verbose'}"
+            print(f"{variant:20s} {prompt:8d} {first:11.2f}s {total:8.2f}s "
+                  f"${prompt * INPUT_PRICE_PER_MILLION / 1e6:.5f}")
+
+
+def main():
+    offline_report()
+    if "--live" in sys.argv:
+        print()
+        asyncio.run(live_report())
+
+
+if __name__ == "__main__":
+    main()
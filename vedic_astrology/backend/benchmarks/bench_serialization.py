@@ -0,0 +1,91 @@
+"""
+/api/chart response encoding benchmark.
+
+Per-request cost of sending one full chart response (D1 + 15 vargas):
+
+- response_model: the dict returned through FastAPI's response_model=ChartResponse
+  validation and JSON rendering (the previous /api/chart path)
+- validated + orjson: the pre-validated dict encoded on every request
+- cached bytes: the encoded bytes the chart cache keeps, sent as they are
+- msgpack: the pre-validated dict as MessagePack (when msgpack is installed)
+
+Each variant is timed as encode-only and end to end through a TestClient
+route (which adds the same HTTP overhead to all of them).
+
+Run from backend/:  python -m benchmarks.bench_serialization
+"""
+
+import time
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+import serialization
+from calculator import VARGA_KEYS, build_chart_context, calculate_chart, calculate_all_vargas
+from models import ChartResponse
+from serialization import dumps, json_response, msgpack_response, validated_chart_response
+
+REPEAT = 200
+BIRTH = dict(year=1990, month=5, day=15, hour=10, minute=30, latitude=28.6139, longitude=77.2090)
+
+
+def per_call(func, repeat: int = REPEAT) -> float:
+    """Best of three runs of repeat calls, in ms per call."""
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return best / repeat * 1000
+
+
+def raw_response():
+    chart = calculate_chart(context=build_chart_context(**BIRTH))
+    response = {"D1": chart, "meta": {"ayanamsa": chart.get('ayanamsa'),
+                                      "ayanamsa_type": chart.get('ayanamsa_type'),
+                                      "birth_data": chart.get('birth_data')}}
+    response.update(calculate_all_vargas(chart, keys=[key for key in VARGA_KEYS if key != 'D1']))
+    return response
+
+
+def main():
+    raw = raw_response()
+    validated = validated_chart_response(raw)
+    body = dumps(validated)
+
+    app = FastAPI()
+    app.post("/response_model", response_model=ChartResponse)(lambda: raw)
+    app.post("/orjson")(lambda: json_response(dumps(validated)))
+    app.post("/cached")(lambda: json_response(body))
+    if serialization.msgpack is not None:
+        app.post("/msgpack")(lambda: msgpack_response(validated))
+    client = TestClient(app)
+
+    def validate_and_render():
+        content = ChartResponse.model_validate(raw).model_dump(mode='json')
+        return JSONResponse(content).body
+
+    encoder = "orjson" if serialization.orjson is not None else "json"
+    variants = [  # (name, encode only, route)
+        ("response_model", validate_and_render, "/response_model"),
+        (f"validated + {encoder}", lambda: dumps(validated), "/orjson"),
+        ("cached bytes", lambda: body, "/cached"),
+    ]
+    size = f"chart response: {len(body) / 1024:.1f} KB JSON"
+    if serialization.msgpack is not None:
+        packed = serialization.msgpack.packb(validated, use_bin_type=True)
+        variants.append(("msgpack", lambda: serialization.msgpack.packb(validated, use_bin_type=True), "/msgpack"))
+        size += f", {len(packed) / 1024:.1f} KB MessagePack"
+    else:
+        size += " (msgpack not installed)"
+
+    print(size)
+    print(f"{'':20s} {'encode':>10s} {'request':>10s}")
+    for name, func, path in variants:
+        print(f"{name:20s} {per_call(func):8.3f}ms {per_call(lambda: client.post(path), REPEAT // 4):8.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Timezone resolution benchmark.
+
+Compares the raw TimezoneFinder polygon lookup with the cached resolver over
+a realistic mix of repeated birth places, and reports the saving for the
+number of lookups each endpoint used to make.
+
+Run from backend/:  python -m benchmarks.bench_timezones
+"""
+
+import time
+import numpy as np
+
+import timezones
+
+# Timezone lookups per request (chart: local_to_utc + birth_data;
+# interpret: the same again inside calculate_dasha)
+LOOKUPS_PER_REQUEST = {'/api/chart': 2, '/api/interpret': 4}
+
+
+def sample_points(n: int = 5000, distinct: int = 500, seed: int = 1):
+    """Birth places repeat heavily: draw n requests from a pool of distinct places."""
+    rng = np.random.default_rng(seed)
+    pool = list(zip(rng.uniform(-50, 65, distinct), rng.uniform(-130, 150, distinct)))
+    return [tuple(map(float, pool[i])) for i in rng.integers(0, distinct, n)]
+
+
+def time_per_call(func, points) -> float:
+    start = time.perf_counter()
+    for lat, lng in points:
+        func(lat, lng)
+    return (time.perf_counter() - start) / len(points) * 1e6
+
+
+def main():
+    points = sample_points()
+
+    raw_us = time_per_call(lambda lat, lng: timezones.tf.timezone_at(lat=lat, lng=lng), points)
+    cold_us = time_per_call(timezones.resolve_timezone, points)
+    warm_us = time_per_call(timezones.resolve_timezone, points)
+
+    print(f"polygon lookup:        {raw_us:8.1f} us/call")
+    print(f"resolver (first pass): {cold_us:8.1f} us/call")
+    print(f"resolver (warm):       {warm_us:8.1f} us/call")
+    for endpoint, lookups in LOOKUPS_PER_REQUEST.items():
+        saved = lookups * (raw_us - warm_us)
+        print(f"{endpoint:16s} saves {saved:8.1f} us/request ({lookups} lookups)")
+    print(timezones.timezone_cache_stats())
+
+
+if __name__ == "__main__":
+    main()
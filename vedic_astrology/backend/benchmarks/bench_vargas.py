@@ -0,0 +1,51 @@
+"""
+Varga engine benchmark.
+
+Per chart: the original per-varga functions versus calculate_all_vargas.
+Per 10k charts: the original loop versus one compute_varga_signs call over
+the whole (charts x bodies) array, as used by bulk jobs.
+
+Run from backend/:  python -m benchmarks.bench_vargas
+"""
+
+import time
+import numpy as np
+
+from calculator import calculate_all_vargas, calculate_chart, compute_varga_signs
+from test_vargas import reference_vargas, synthetic_chart
+
+N_CHARTS = 10_000
+
+
+def best_of(func, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    chart = calculate_chart(1990, 1, 1, 12, 0, 28.61, 77.20)
+    loops = 500
+    old = best_of(lambda: [reference_vargas(chart) for _ in range(loops)]) / loops
+    new = best_of(lambda: [calculate_all_vargas(chart) for _ in range(loops)]) / loops
+    print(f"per chart:      reference {old * 1e6:8.1f} us   engine {new * 1e6:8.1f} us   ({old / new:.1f}x)")
+
+    rng = np.random.default_rng(0)
+    lons = rng.uniform(0, 360, (N_CHARTS, 11))  # 10 bodies + ascendant
+    charts = [synthetic_chart(row[:-1], row[-1]) for row in lons]
+    sign_idx = (lons // 30).astype(int)
+    degrees = np.round(lons % 30, 2)
+    navamsa = np.round(lons, 4) % 30
+
+    old = best_of(lambda: [reference_vargas(c) for c in charts], repeat=1)
+    dicts = best_of(lambda: [calculate_all_vargas(c) for c in charts], repeat=1)
+    arrays = best_of(lambda: compute_varga_signs(sign_idx, degrees, navamsa))
+    print(f"per {N_CHARTS} charts: reference {old:6.2f} s   engine (dicts) {dicts:6.2f} s   "
+          f"engine (arrays) {arrays * 1000:6.1f} ms   ({old / arrays:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,14 +3,17 @@ Vedic Astrology Chart Calculator using Swiss Ephemeris.
 All calculations done offline - no external APIs needed.
 """
 
+import numpy as np
 import swisseph as swe
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, Any, List
+from functools import lru_cache
+from collections.abc import Mapping
+from typing import Dict, Any, List, Optional, Sequence
 import pytz
-from timezonefinder import TimezoneFinder
 
-# Initialize timezone finder (uses bundled data, no API needed)
-tf = TimezoneFinder()
+import ephemeris
+from timezones import resolve_timezone, get_tz
 
 # Zodiac signs
 SIGNS = [
@@ -48,6 +51,14 @@ PLANETS = {
     'Rahu': swe.MEAN_NODE,  # Mean North Node
 }
 
+# Supported sidereal modes (Lahiri is the default everywhere)
+AYANAMSA_MODES = {
+    'Lahiri': swe.SIDM_LAHIRI,
+    'Raman': swe.SIDM_RAMAN,
+    'Krishnamurti': swe.SIDM_KRISHNAMURTI,
+}
+DEFAULT_AYANAMSA = 'Lahiri'
+
 # Planetary Dignities in Vedic Astrology
 PLANET_DIGNITIES = {
     'Sun': {
@@ -144,16 +155,15 @@ PLANET_DIGNITIES = {
 
 
 def get_timezone_from_coordinates(latitude: float, longitude: float) -> str:
-    """Get timezone string from coordinates (offline lookup)."""
-    tz_name = tf.timezone_at(lat=latitude, lng=longitude)
-    return tz_name or 'UTC'
+    """Get timezone string from coordinates (offline, cached lookup)."""
+    return resolve_timezone(latitude, longitude)
 
 
 def local_to_utc(year: int, month: int, day: int, hour: int, minute: int,
                   latitude: float, longitude: float) -> datetime:
     """Convert local time to UTC based on coordinates."""
     tz_name = get_timezone_from_coordinates(latitude, longitude)
-    tz = pytz.timezone(tz_name)
+    tz = get_tz(tz_name)
     local_dt = tz.localize(datetime(year, month, day, hour, minute))
     return local_dt.astimezone(pytz.UTC)
 
@@ -164,6 +174,98 @@ def calculate_julian_day(utc_dt: datetime) -> float:
     return swe.julday(utc_dt.year, utc_dt.month, utc_dt.day, hour_decimal)
 
 
+def set_sidereal_mode(ayanamsa_type: str = DEFAULT_AYANAMSA) -> None:
+    """
+    Select the ayanamsa on the Swiss Ephemeris global state.
+
+    The mode is process-wide, so concurrent charts with different ayanamsas
+    must run in separate processes (see workers.py).
+    """
+    swe.set_sid_mode(AYANAMSA_MODES[ayanamsa_type])
+
+
+def get_body_position(jd: float, name: str, ayanamsa_type: str = DEFAULT_AYANAMSA) -> tuple:
+    """
+    Get a body's sidereal (longitude, speed) for a Julian Day.
+
+    Served from the precomputed ephemeris table when one is loaded and covers
+    the date (Lahiri only), otherwise from Swiss Ephemeris.
+    """
+    if name == 'Ketu':
+        rahu_lon, rahu_speed = get_body_position(jd, 'Rahu', ayanamsa_type)
+        return (rahu_lon + 180) % 360, rahu_speed
+
+    position = ephemeris.lookup(jd, name) if ayanamsa_type == DEFAULT_AYANAMSA else None
+    if position is None:
+        set_sidereal_mode(ayanamsa_type)
+        result = swe.calc_ut(jd, PLANETS[name], swe.FLG_SIDEREAL | swe.FLG_SPEED)
+        position = (result[0][0], result[0][3])
+    return position
+
+
+@dataclass
+class ChartContext:
+    """
+    Everything derived from one local birth moment, computed once.
+
+    Pass it to calculate_chart, calculate_dasha, calculate_all_vargas and
+    calculate_current_alignment so a request resolves the timezone, Julian Day
+    and ayanamsa once and never looks up the same body twice.
+    """
+    year: int
+    month: int
+    day: int
+    hour: int
+    minute: int
+    latitude: float
+    longitude: float
+    timezone: str
+    local_dt: datetime
+    utc_dt: datetime
+    jd: float
+    ayanamsa: float
+    ayanamsa_type: str = DEFAULT_AYANAMSA
+    positions: Dict[str, tuple] = field(default_factory=dict)
+
+    def position(self, name: str) -> tuple:
+        """Sidereal (longitude, speed) of a body, computed on first use."""
+        if name not in self.positions:
+            self.positions[name] = get_body_position(self.jd, name, self.ayanamsa_type)
+        return self.positions[name]
+
+
+def resolve_moment(year: int, month: int, day: int, hour: int, minute: int,
+                   latitude: float, longitude: float) -> tuple:
+    """(timezone name, aware local datetime, UT Julian Day) of a local moment. No swe state involved."""
+    tz_name = get_timezone_from_coordinates(latitude, longitude)
+    local_dt = get_tz(tz_name).localize(datetime(year, month, day, hour, minute))
+    return tz_name, local_dt, calculate_julian_day(local_dt.astimezone(pytz.UTC))
+
+
+def build_chart_context(year: int, month: int, day: int, hour: int, minute: int,
+                        latitude: float, longitude: float,
+                        ayanamsa_type: str = DEFAULT_AYANAMSA) -> ChartContext:
+    """Resolve timezone, UTC time, Julian Day and ayanamsa for a local moment."""
+    if ayanamsa_type not in AYANAMSA_MODES:
+        raise ValueError(f"Unknown ayanamsa: {ayanamsa_type}")
+
+    tz_name, local_dt, jd = resolve_moment(year, month, day, hour, minute, latitude, longitude)
+    utc_dt = local_dt.astimezone(pytz.UTC)
+
+    set_sidereal_mode(ayanamsa_type)
+
+    return ChartContext(
+        year=year, month=month, day=day, hour=hour, minute=minute,
+        latitude=latitude, longitude=longitude,
+        timezone=tz_name,
+        local_dt=local_dt,
+        utc_dt=utc_dt,
+        jd=jd,
+        ayanamsa=swe.get_ayanamsa(jd),
+        ayanamsa_type=ayanamsa_type,
+    )
+
+
 def get_nakshatra(longitude: float) -> Dict[str, Any]:
     """Calculate nakshatra from longitude."""
     nakshatra_span = 360 / 27  # 13°20' each
@@ -272,8 +374,9 @@ def get_sign_ruler(sign: str) -> str:
     return rulers.get(sign, '')
 
 
-def calculate_chart(year: int, month: int, day: int, hour: int, minute: int,
-                    latitude: float, longitude: float) -> Dict[str, Any]:
+def calculate_chart(year: int = None, month: int = None, day: int = None, hour: int = None,
+                    minute: int = None, latitude: float = None, longitude: float = None,
+                    context: Optional[ChartContext] = None) -> Dict[str, Any]:
     """
     Calculate complete Vedic birth chart.
 
@@ -281,26 +384,22 @@ def calculate_chart(year: int, month: int, day: int, hour: int, minute: int,
         year, month, day: Birth date
         hour, minute: Birth time (local time)
         latitude, longitude: Birth place coordinates
+        context: Precomputed ChartContext (replaces the arguments above)
 
     Returns:
         Dictionary containing all chart data
     """
-    # Convert to UTC
-    utc_dt = local_to_utc(year, month, day, hour, minute, latitude, longitude)
-    jd = calculate_julian_day(utc_dt)
+    if context is None:
+        context = build_chart_context(year, month, day, hour, minute, latitude, longitude)
+    jd = context.jd
 
-    # Set Lahiri Ayanamsa (most commonly used in Vedic astrology)
-    swe.set_sid_mode(swe.SIDM_LAHIRI)
-
-    # Get ayanamsa value for reference
-    ayanamsa = swe.get_ayanamsa(jd)
+    # Lahiri Ayanamsa unless the context asks for another
+    set_sidereal_mode(context.ayanamsa_type)
 
     # Calculate planetary positions
     planets = {}
-    for name, planet_id in PLANETS.items():
-        result = swe.calc_ut(jd, planet_id, swe.FLG_SIDEREAL)
-        lon = result[0][0]
-        speed = result[0][3]
+    for name in PLANETS:
+        lon, speed = context.position(name)
 
         sign_idx = int(lon // 30)
         degree_in_sign = lon % 30
@@ -338,7 +437,7 @@ def calculate_chart(year: int, month: int, day: int, hour: int, minute: int,
 
     # Calculate Ascendant (Lagna) and house cusps
     # Using whole sign houses (most common in Vedic)
-    houses = swe.houses_ex(jd, latitude, longitude, b'W', swe.FLG_SIDEREAL)
+    houses = swe.houses_ex(jd, context.latitude, context.longitude, b'W', swe.FLG_SIDEREAL)
     ascendant_lon = houses[1][0]
     asc_sign_idx = int(ascendant_lon // 30)
 
@@ -365,14 +464,14 @@ def calculate_chart(year: int, month: int, day: int, hour: int, minute: int,
         'ascendant': ascendant,
         'planets': planets,
         'houses': house_occupancy,
-        'ayanamsa': round(ayanamsa, 4),
-        'ayanamsa_type': 'Lahiri',
+        'ayanamsa': round(context.ayanamsa, 4),
+        'ayanamsa_type': context.ayanamsa_type,
         'birth_data': {
-            'date': f"{year}-{month:02d}-{day:02d}",
-            'time': f"{hour:02d}:{minute:02d}",
-            'timezone': get_timezone_from_coordinates(latitude, longitude),
-            'latitude': latitude,
-            'longitude': longitude
+            'date': f"{context.year}-{context.month:02d}-{context.day:02d}",
+            'time': f"{context.hour:02d}:{context.minute:02d}",
+            'timezone': context.timezone,
+            'latitude': context.latitude,
+            'longitude': context.longitude
         }
     }
 
@@ -402,650 +501,240 @@ VARGA_INFO = {
 }
 
 
-def calculate_d1_rasi(chart: Dict[str, Any]) -> Dict[str, Any]:
-    """D1 - Rasi chart (main birth chart). Just returns the natal positions."""
-    return {
-        planet_name: {
-            'sign': planet_data['sign'],
-            'sign_num': planet_data['sign_num']
-        }
-        for planet_name, planet_data in chart['planets'].items()
-    }
-
+def _start_by_modality(movable: int, fixed: int, dual: int, relative: bool = False):
+    """Rule whose first part starts from a fixed sign (or offset) per movable/fixed/dual sign."""
+    def rule(sign_idx: int, part: int) -> int:
+        start = (movable, fixed, dual)[sign_idx % 3]
+        return ((sign_idx if relative else 0) + start + part) % 12
+    return rule
+
+
+def _start_by_parity(odd: int, even: int, relative: bool = False):
+    """Rule whose first part starts from a fixed sign (or offset) per odd/even sign."""
+    def rule(sign_idx: int, part: int) -> int:
+        start = odd if sign_idx % 2 == 0 else even
+        return ((sign_idx if relative else 0) + start + part) % 12
+    return rule
+
+
+def _start_by_element(fire: int, earth: int, air: int, water: int):
+    """Rule whose first part starts from a fixed sign per element."""
+    def rule(sign_idx: int, part: int) -> int:
+        return ((fire, earth, air, water)[sign_idx % 4] + part) % 12
+    return rule
+
+
+# Trimsamsa signs per whole degree (odd: Mars 5, Saturn 5, Jupiter 8, Mercury 7, Venus 5;
+# even: Venus 5, Mercury 7, Jupiter 8, Saturn 5, Mars 5)
+TRIMSAMSA_ODD = [0] * 5 + [10] * 5 + [8] * 8 + [2] * 7 + [6] * 5
+TRIMSAMSA_EVEN = [1] * 5 + [5] * 7 + [11] * 8 + [9] * 5 + [7] * 5
+
+# Every varga as (part width in degrees, rule(sign_idx, part) -> varga sign_idx).
+# The widths are the exact divisors of the original per-varga functions (kept
+# in test_vargas.py as the reference), so part = int(degree / width) reproduces
+# them bit for bit. D2 and D3 compare against their thresholds instead, which
+# the engine reproduces exactly too.
+VARGA_RULES = {
+    'D1': (30, lambda s, p: s),
+    'D2': (15, lambda s, p: (4, 3, 3)[p] if s % 2 == 0 else (3, 4, 4)[p]),
+    'D3': (10, lambda s, p: (s + (0, 4, 8, 8)[p]) % 12),
+    'D4': (7.5, _start_by_modality(0, 3, 6, relative=True)),
+    'D7': (30 / 7, _start_by_parity(0, 6, relative=True)),
+    'D9': (30 / 9, _start_by_element(0, 9, 6, 3)),
+    'D10': (3, _start_by_parity(0, 8, relative=True)),
+    'D12': (2.5, lambda s, p: (s + p) % 12),
+    'D16': (30 / 16, _start_by_modality(0, 4, 8)),
+    'D20': (1.5, _start_by_modality(0, 8, 4)),
+    'D24': (1.25, _start_by_parity(4, 3)),
+    'D27': (30 / 27, _start_by_element(0, 3, 6, 9)),
+    'D30': (1, lambda s, p: (TRIMSAMSA_ODD if s % 2 == 0 else TRIMSAMSA_EVEN)[min(p, 29)]),
+    'D40': (0.75, _start_by_parity(0, 6)),
+    'D45': (30 / 45, _start_by_modality(0, 4, 8)),
+    'D60': (0.5, _start_by_parity(0, 6)),
+}
 
-def calculate_d2_hora(chart: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    D2 - Hora chart for wealth.
-    Each sign divided into 2 parts of 15° each.
-    Odd signs: 0-15° = Sun (Leo), 15-30° = Moon (Cancer)
-    Even signs: 0-15° = Moon (Cancer), 15-30° = Sun (Leo)
-    """
-    hora = {}
-    for planet_name, planet_data in chart['planets'].items():
-        degree = planet_data['degree']
-        sign_num = planet_data['sign_num']
-        is_odd_sign = sign_num % 2 == 1
-
-        if degree < 15:
-            # First half
-            hora_sign = 'Leo' if is_odd_sign else 'Cancer'
-        else:
-            # Second half
-            hora_sign = 'Cancer' if is_odd_sign else 'Leo'
-
-        hora[planet_name] = {
-            'sign': hora_sign,
-            'sign_num': SIGNS.index(hora_sign) + 1
-        }
-    return hora
+# Vargas whose reference implementation compares degree < threshold
+THRESHOLD_VARGAS = ('D2', 'D3')
 
 
-def calculate_d3_drekkana(chart: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    D3 - Drekkana chart for siblings and courage.
-    Each sign divided into 3 parts of 10° each.
-    1st drekkana (0-10°): Same sign
-    2nd drekkana (10-20°): 5th sign from it
-    3rd drekkana (20-30°): 9th sign from it
+def _compile_varga_tables():
     """
-    drekkana = {}
-    for planet_name, planet_data in chart['planets'].items():
-        degree = planet_data['degree']
-        sign_idx = planet_data['sign_num'] - 1
-
-        if degree < 10:
-            drekkana_sign_idx = sign_idx
-        elif degree < 20:
-            drekkana_sign_idx = (sign_idx + 4) % 12  # 5th from (0-indexed + 4)
-        else:
-            drekkana_sign_idx = (sign_idx + 8) % 12  # 9th from (0-indexed + 8)
-
-        drekkana[planet_name] = {
-            'sign': SIGNS[drekkana_sign_idx],
-            'sign_num': drekkana_sign_idx + 1
-        }
-    return drekkana
-
+    Compile every rule into one flat lookup table indexed by
+    offset[varga] + sign_idx * columns[varga] + part.
 
-def calculate_d4_chaturthamsa(chart: Dict[str, Any]) -> Dict[str, Any]:
+    Each table has one extra column for degree == 30.0, which rounding the
+    natal degree to two decimals can produce.
     """
-    D4 - Chaturthamsa chart for fortune and property.
-    Each sign divided into 4 parts of 7.5° each.
-    Movable signs (1,4,7,10): Start from same sign
-    Fixed signs (2,5,8,11): Start from 4th sign
-    Dual signs (3,6,9,12): Start from 7th sign
+    keys = list(VARGA_RULES)
+    widths, offsets, columns, tables = [], [], [], []
+    offset = 0
+    for key in keys:
+        width, rule = VARGA_RULES[key]
+        n_columns = int(round(30 / width)) + 1
+        tables.append([rule(sign_idx, part) for sign_idx in range(12) for part in range(n_columns)])
+        widths.append(width)
+        offsets.append(offset)
+        columns.append(n_columns)
+        offset += 12 * n_columns
+
+    return (
+        keys,
+        np.array(widths, dtype=np.float64),
+        np.array(offsets, dtype=np.int64),
+        np.array(columns, dtype=np.int64),
+        np.array([sign for table in tables for sign in table], dtype=np.int64),
+    )
+
+
+VARGA_KEYS, _VARGA_WIDTHS, _VARGA_OFFSETS, _VARGA_COLUMNS, _VARGA_TABLE = _compile_varga_tables()
+_THRESHOLD_ROWS = np.array([key in THRESHOLD_VARGAS for key in VARGA_KEYS])
+_NAVAMSA_ROW = VARGA_KEYS.index('D9')
+
+
+def parse_varga_keys(spec: Optional[str]) -> List[str]:
     """
-    chaturthamsa = {}
-    for planet_name, planet_data in chart['planets'].items():
-        degree = planet_data['degree']
-        sign_idx = planet_data['sign_num'] - 1
-        part = int(degree / 7.5)
-
-        # Determine sign type (0-indexed)
-        if sign_idx % 3 == 0:  # Movable: Aries, Cancer, Libra, Capricorn
-            start_idx = sign_idx
-        elif sign_idx % 3 == 1:  # Fixed: Taurus, Leo, Scorpio, Aquarius
-            start_idx = (sign_idx + 3) % 12
-        else:  # Dual: Gemini, Virgo, Sagittarius, Pisces
-            start_idx = (sign_idx + 6) % 12
-
-        result_idx = (start_idx + part) % 12
-
-        chaturthamsa[planet_name] = {
-            'sign': SIGNS[result_idx],
-            'sign_num': result_idx + 1
-        }
-    return chaturthamsa
-
+    Parse a comma-separated varga selection such as 'D9,D10'.
 
-def calculate_d7_saptamsa(chart: Dict[str, Any]) -> Dict[str, Any]:
+    None selects every varga; an empty string or 'none' selects none.
+    Raises ValueError for unknown keys.
     """
-    D7 - Saptamsa chart for children.
-    Each sign divided into 7 parts of 4°17'8.57" each.
-    Odd signs: Start from same sign
-    Even signs: Start from 7th sign
+    if spec is None:
+        return list(VARGA_KEYS)
+    keys = [part.strip().upper() for part in spec.split(',') if part.strip()]
+    if keys == ['NONE']:
+        return []
+    unknown = [key for key in keys if key not in VARGA_RULES]
+    if unknown:
+        raise ValueError(f"Unknown vargas: {', '.join(unknown)}. Valid: {', '.join(VARGA_KEYS)}")
+    # Canonical order, no duplicates
+    return [key for key in VARGA_KEYS if key in keys]
+
+
+def compute_varga_signs(sign_idx, degrees, navamsa_degrees=None,
+                        keys: Optional[Sequence[str]] = None) -> np.ndarray:
     """
-    saptamsa = {}
-    for planet_name, planet_data in chart['planets'].items():
-        degree = planet_data['degree']
-        sign_idx = planet_data['sign_num'] - 1
-        part = int(degree / (30 / 7))
-        is_odd = sign_idx % 2 == 0  # 0-indexed, so even index = odd sign
-
-        if is_odd:
-            start_idx = sign_idx
-        else:
-            start_idx = (sign_idx + 6) % 12  # 7th from
-
-        result_idx = (start_idx + part) % 12
-
-        saptamsa[planet_name] = {
-            'sign': SIGNS[result_idx],
-            'sign_num': result_idx + 1
-        }
-    return saptamsa
-
-
-def calculate_navamsa(chart: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    D9 - Navamsa chart for marriage and dharma.
-    Each sign divided into 9 parts of 3°20' each.
-    Fire signs (Aries, Leo, Sag): Start from Aries
-    Earth signs (Taurus, Virgo, Cap): Start from Capricorn
-    Air signs (Gemini, Libra, Aqua): Start from Libra
-    Water signs (Cancer, Scorpio, Pisces): Start from Cancer
-    """
-    navamsa = {}
-
-    for planet_name, planet_data in chart['planets'].items():
-        lon = planet_data['longitude']
-        navamsa_num = int((lon % 30) / (30 / 9))
-        sign_idx = planet_data['sign_num'] - 1
-
-        if sign_idx % 4 == 0:  # Fire signs start from Aries
-            navamsa_sign_idx = navamsa_num
-        elif sign_idx % 4 == 1:  # Earth signs start from Capricorn
-            navamsa_sign_idx = (9 + navamsa_num) % 12
-        elif sign_idx % 4 == 2:  # Air signs start from Libra
-            navamsa_sign_idx = (6 + navamsa_num) % 12
-        else:  # Water signs start from Cancer
-            navamsa_sign_idx = (3 + navamsa_num) % 12
-
-        navamsa[planet_name] = {
-            'sign': SIGNS[navamsa_sign_idx],
-            'sign_num': navamsa_sign_idx + 1
-        }
-
-    return navamsa
+    Varga sign indices (0-11) for any number of points in one vectorized pass.
 
+    Args:
+        sign_idx: D1 sign indices (0-11), any shape
+        degrees: Degrees within the sign, same shape
+        navamsa_degrees: Degrees used for D9 (defaults to degrees); the D9
+            reference works from the 4-decimal longitude, not the rounded degree
+        keys: Vargas to compute, in output order (defaults to VARGA_KEYS)
 
-def calculate_d10_dasamsa(chart: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    D10 - Dasamsa chart for career.
-    Each sign divided into 10 parts of 3° each.
-    Odd signs: Start from same sign
-    Even signs: Start from 9th sign
+    Returns:
+        Array of shape (len(keys),) + sign_idx.shape
     """
-    dasamsa = {}
-    for planet_name, planet_data in chart['planets'].items():
-        degree = planet_data['degree']
-        sign_idx = planet_data['sign_num'] - 1
-        part = int(degree / 3)
-        is_odd = sign_idx % 2 == 0
-
-        if is_odd:
-            start_idx = sign_idx
-        else:
-            start_idx = (sign_idx + 8) % 12  # 9th from
-
-        result_idx = (start_idx + part) % 12
-
-        dasamsa[planet_name] = {
-            'sign': SIGNS[result_idx],
-            'sign_num': result_idx + 1
-        }
-    return dasamsa
+    rows = np.arange(len(VARGA_KEYS)) if keys is None else np.array(
+        [VARGA_KEYS.index(key) for key in keys], dtype=np.int64)
+    sign_idx = np.asarray(sign_idx, dtype=np.int64)
+    degrees = np.asarray(degrees, dtype=np.float64)
+    trailing = (1,) * degrees.ndim
 
+    x = np.broadcast_to(degrees, (len(rows),) + degrees.shape).copy()
+    if navamsa_degrees is not None:
+        x[rows == _NAVAMSA_ROW] = navamsa_degrees
 
-def calculate_d12_dwadasamsa(chart: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    D12 - Dwadasamsa chart for parents.
-    Each sign divided into 12 parts of 2.5° each.
-    Always starts from same sign and cycles through all 12.
-    """
-    dwadasamsa = {}
-    for planet_name, planet_data in chart['planets'].items():
-        degree = planet_data['degree']
-        sign_idx = planet_data['sign_num'] - 1
-        part = int(degree / 2.5)
+    widths = _VARGA_WIDTHS[rows].reshape((-1,) + trailing)
+    parts = np.floor(x / widths)
 
-        result_idx = (sign_idx + part) % 12
+    # Threshold vargas: snap the part to the exact 'degree < k * width' comparison
+    threshold = _THRESHOLD_ROWS[rows].reshape((-1,) + trailing)
+    parts -= threshold & (parts * widths > x)
+    parts += threshold & ((parts + 1) * widths <= x)
 
-        dwadasamsa[planet_name] = {
-            'sign': SIGNS[result_idx],
-            'sign_num': result_idx + 1
-        }
-    return dwadasamsa
+    index = (_VARGA_OFFSETS[rows].reshape((-1,) + trailing)
+             + sign_idx * _VARGA_COLUMNS[rows].reshape((-1,) + trailing)
+             + parts.astype(np.int64))
+    return _VARGA_TABLE[index]
 
 
-def calculate_d16_shodasamsa(chart: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    D16 - Shodasamsa chart for vehicles and comforts.
-    Each sign divided into 16 parts of 1°52'30" each.
-    Movable signs: Start from Aries
-    Fixed signs: Start from Leo
-    Dual signs: Start from Sagittarius
+def calculate_all_vargas(chart: Dict[str, Any] = None, context: Optional[ChartContext] = None,
+                         keys: Optional[Sequence[str]] = None) -> Dict[str, Any]:
     """
-    shodasamsa = {}
-    for planet_name, planet_data in chart['planets'].items():
-        degree = planet_data['degree']
-        sign_idx = planet_data['sign_num'] - 1
-        part = int(degree / (30 / 16))
-
-        if sign_idx % 3 == 0:  # Movable
-            start_idx = 0  # Aries
-        elif sign_idx % 3 == 1:  # Fixed
-            start_idx = 4  # Leo
-        else:  # Dual
-            start_idx = 8  # Sagittarius
-
-        result_idx = (start_idx + part) % 12
-
-        shodasamsa[planet_name] = {
-            'sign': SIGNS[result_idx],
-            'sign_num': result_idx + 1
-        }
-    return shodasamsa
+    Calculate divisional charts with full planet data including houses.
 
-
-def calculate_d20_vimsamsa(chart: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    D20 - Vimsamsa chart for spiritual progress.
-    Each sign divided into 20 parts of 1.5° each.
-    Movable signs: Start from Aries
-    Fixed signs: Start from Sagittarius
-    Dual signs: Start from Leo
+    Takes the D1 chart, or a ChartContext to calculate it from. All requested
+    vargas for every planet and the ascendant come from one compute_varga_signs
+    call; keys selects a subset of VARGA_KEYS (default: all 16).
     """
-    vimsamsa = {}
-    for planet_name, planet_data in chart['planets'].items():
-        degree = planet_data['degree']
-        sign_idx = planet_data['sign_num'] - 1
-        part = int(degree / 1.5)
-
-        if sign_idx % 3 == 0:  # Movable
-            start_idx = 0  # Aries
-        elif sign_idx % 3 == 1:  # Fixed
-            start_idx = 8  # Sagittarius
-        else:  # Dual
-            start_idx = 4  # Leo
-
-        result_idx = (start_idx + part) % 12
-
-        vimsamsa[planet_name] = {
-            'sign': SIGNS[result_idx],
-            'sign_num': result_idx + 1
-        }
-    return vimsamsa
-
+    if chart is None:
+        chart = calculate_chart(context=context)
+    keys = list(VARGA_KEYS) if keys is None else list(keys)
+
+    planets = chart['planets']
+    ascendant = chart['ascendant']
+    names = list(planets)
+
+    # Last column is the ascendant
+    asc_degree = ascendant['longitude'] % 30
+    signs = compute_varga_signs(
+        [p['sign_num'] - 1 for p in planets.values()] + [ascendant['sign_num'] - 1],
+        [p['degree'] for p in planets.values()] + [asc_degree],
+        [p['longitude'] % 30 for p in planets.values()] + [asc_degree],
+        keys=keys,
+    )
+    houses = (signs[:, :-1] - signs[:, -1:]) % 12 + 1
+    natal_degrees = [round(p['degree'], 2) for p in planets.values()]
 
-def calculate_d24_chaturvimsamsa(chart: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    D24 - Chaturvimsamsa chart for learning and education.
-    Each sign divided into 24 parts of 1.25° each.
-    Odd signs: Start from Leo
-    Even signs: Start from Cancer
-    """
-    chaturvimsamsa = {}
-    for planet_name, planet_data in chart['planets'].items():
-        degree = planet_data['degree']
-        sign_idx = planet_data['sign_num'] - 1
-        part = int(degree / 1.25)
-        is_odd = sign_idx % 2 == 0
-
-        if is_odd:
-            start_idx = 4  # Leo
-        else:
-            start_idx = 3  # Cancer
-
-        result_idx = (start_idx + part) % 12
-
-        chaturvimsamsa[planet_name] = {
-            'sign': SIGNS[result_idx],
-            'sign_num': result_idx + 1
+    vargas = {}
+    for varga_key, varga_signs, varga_houses in zip(keys, signs.tolist(), houses.tolist()):
+        info = VARGA_INFO[varga_key]
+        asc_sign = varga_signs[-1]
+        vargas[varga_key] = {
+            'name': info['name'],
+            'description': info['description'],
+            'ascendant': {'sign': SIGNS[asc_sign], 'sign_num': asc_sign + 1},
+            'planets': {
+                name: {
+                    'sign': SIGNS[sign],
+                    'sign_num': sign + 1,
+                    'house': house,
+                    'natal_degree': natal_degree,
+                }
+                for name, sign, house, natal_degree in zip(names, varga_signs, varga_houses, natal_degrees)
+            }
         }
-    return chaturvimsamsa
-
 
-def calculate_d27_saptavimsamsa(chart: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    D27 - Saptavimsamsa (Bhamsa) chart for strengths/weaknesses.
-    Each sign divided into 27 parts of 1°6'40" each.
-    Fire signs: Start from Aries
-    Earth signs: Start from Cancer
-    Air signs: Start from Libra
-    Water signs: Start from Capricorn
-    """
-    saptavimsamsa = {}
-    for planet_name, planet_data in chart['planets'].items():
-        degree = planet_data['degree']
-        sign_idx = planet_data['sign_num'] - 1
-        part = int(degree / (30 / 27))
-
-        element = sign_idx % 4
-        if element == 0:  # Fire
-            start_idx = 0  # Aries
-        elif element == 1:  # Earth
-            start_idx = 3  # Cancer
-        elif element == 2:  # Air
-            start_idx = 6  # Libra
-        else:  # Water
-            start_idx = 9  # Capricorn
-
-        result_idx = (start_idx + part) % 12
-
-        saptavimsamsa[planet_name] = {
-            'sign': SIGNS[result_idx],
-            'sign_num': result_idx + 1
-        }
-    return saptavimsamsa
+    return vargas
 
 
-def calculate_d30_trimsamsa(chart: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    D30 - Trimsamsa chart for evils and misfortunes.
-    Uses unequal divisions based on planetary rulerships.
-    Odd signs: Mars(5°), Saturn(5°), Jupiter(8°), Mercury(7°), Venus(5°)
-    Even signs: Venus(5°), Mercury(7°), Jupiter(8°), Saturn(5°), Mars(5°)
+class LazyVargas(Mapping):
     """
-    # Trimsamsa lords and their signs
-    odd_rulers = [
-        (5, 'Mars', 'Aries'),
-        (5, 'Saturn', 'Aquarius'),
-        (8, 'Jupiter', 'Sagittarius'),
-        (7, 'Mercury', 'Gemini'),
-        (5, 'Venus', 'Libra')
-    ]
-    even_rulers = [
-        (5, 'Venus', 'Taurus'),
-        (7, 'Mercury', 'Virgo'),
-        (8, 'Jupiter', 'Pisces'),
-        (5, 'Saturn', 'Capricorn'),
-        (5, 'Mars', 'Scorpio')
-    ]
-
-    trimsamsa = {}
-    for planet_name, planet_data in chart['planets'].items():
-        degree = planet_data['degree']
-        sign_idx = planet_data['sign_num'] - 1
-        is_odd = sign_idx % 2 == 0
-
-        rulers = odd_rulers if is_odd else even_rulers
-        cumulative = 0
-        result_sign = rulers[-1][2]  # Default to last
-
-        for span, lord, sign in rulers:
-            cumulative += span
-            if degree < cumulative:
-                result_sign = sign
-                break
-
-        trimsamsa[planet_name] = {
-            'sign': result_sign,
-            'sign_num': SIGNS.index(result_sign) + 1
-        }
-    return trimsamsa
-
+    Read-only mapping of divisional charts, calculated on first access.
 
-def calculate_d40_khavedamsa(chart: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    D40 - Khavedamsa chart for auspicious effects.
-    Each sign divided into 40 parts of 0.75° each.
-    Odd signs: Start from Aries
-    Even signs: Start from Libra
+    Drop-in for the calculate_all_vargas dict where a chart may never be
+    read (e.g. a cached interpretation). The first access calculates every
+    key in one vectorized pass, as one varga per call costs more when all
+    are read. Membership tests never trigger a calculation.
     """
-    khavedamsa = {}
-    for planet_name, planet_data in chart['planets'].items():
-        degree = planet_data['degree']
-        sign_idx = planet_data['sign_num'] - 1
-        part = int(degree / 0.75)
-        is_odd = sign_idx % 2 == 0
-
-        if is_odd:
-            start_idx = 0  # Aries
-        else:
-            start_idx = 6  # Libra
-
-        result_idx = (start_idx + part) % 12
-
-        khavedamsa[planet_name] = {
-            'sign': SIGNS[result_idx],
-            'sign_num': result_idx + 1
-        }
-    return khavedamsa
 
+    def __init__(self, chart: Dict[str, Any], keys: Optional[Sequence[str]] = None):
+        self._chart = chart
+        self._keys = list(VARGA_KEYS) if keys is None else list(keys)
+        self._vargas: Dict[str, Any] = {}
 
-def calculate_d45_akshavedamsa(chart: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    D45 - Akshavedamsa chart for general indications.
-    Each sign divided into 45 parts of 0.667° each.
-    Movable signs: Start from Aries
-    Fixed signs: Start from Leo
-    Dual signs: Start from Sagittarius
-    """
-    akshavedamsa = {}
-    for planet_name, planet_data in chart['planets'].items():
-        degree = planet_data['degree']
-        sign_idx = planet_data['sign_num'] - 1
-        part = int(degree / (30 / 45))
-
-        if sign_idx % 3 == 0:  # Movable
-            start_idx = 0  # Aries
-        elif sign_idx % 3 == 1:  # Fixed
-            start_idx = 4  # Leo
-        else:  # Dual
-            start_idx = 8  # Sagittarius
-
-        result_idx = (start_idx + part) % 12
-
-        akshavedamsa[planet_name] = {
-            'sign': SIGNS[result_idx],
-            'sign_num': result_idx + 1
-        }
-    return akshavedamsa
+    def __getitem__(self, key: str) -> Dict[str, Any]:
+        if key not in self._keys:
+            raise KeyError(key)
+        if key not in self._vargas:
+            missing = [k for k in self._keys if k not in self._vargas]
+            self._vargas.update(calculate_all_vargas(self._chart, keys=missing))
+        return self._vargas[key]
 
+    def __contains__(self, key) -> bool:
+        return key in self._keys
 
-def calculate_d60_shashtiamsa(chart: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    D60 - Shashtiamsa chart for past life karma.
-    Each sign divided into 60 parts of 0.5° each.
-    Odd signs: Start from Aries
-    Even signs: Start from Libra
-    """
-    shashtiamsa = {}
-    for planet_name, planet_data in chart['planets'].items():
-        degree = planet_data['degree']
-        sign_idx = planet_data['sign_num'] - 1
-        part = int(degree / 0.5)
-        is_odd = sign_idx % 2 == 0
-
-        if is_odd:
-            start_idx = 0  # Aries
-        else:
-            start_idx = 6  # Libra
-
-        result_idx = (start_idx + part) % 12
-
-        shashtiamsa[planet_name] = {
-            'sign': SIGNS[result_idx],
-            'sign_num': result_idx + 1
-        }
-    return shashtiamsa
-
-
-def calculate_varga_ascendant(asc_lon: float, asc_sign_idx: int, division: int, varga_key: str) -> Dict[str, Any]:
-    """Calculate the ascendant position in a divisional chart."""
-    degree = asc_lon % 30
-
-    # Use the same logic as planet calculations for each varga
-    if varga_key == 'D1':
-        result_idx = asc_sign_idx
-    elif varga_key == 'D2':
-        # Hora: odd signs 0-15=Sun(Leo), 15-30=Moon(Cancer)
-        is_odd = asc_sign_idx % 2 == 0
-        result_idx = 4 if (degree < 15) == is_odd else 3  # Leo=4, Cancer=3
-    elif varga_key == 'D3':
-        part = int(degree / 10)
-        if part == 0:
-            result_idx = asc_sign_idx
-        elif part == 1:
-            result_idx = (asc_sign_idx + 4) % 12
-        else:
-            result_idx = (asc_sign_idx + 8) % 12
-    elif varga_key == 'D4':
-        part = int(degree / 7.5)
-        if asc_sign_idx % 3 == 0:
-            start_idx = asc_sign_idx
-        elif asc_sign_idx % 3 == 1:
-            start_idx = (asc_sign_idx + 3) % 12
-        else:
-            start_idx = (asc_sign_idx + 6) % 12
-        result_idx = (start_idx + part) % 12
-    elif varga_key == 'D7':
-        part = int(degree / (30 / 7))
-        is_odd = asc_sign_idx % 2 == 0
-        start_idx = asc_sign_idx if is_odd else (asc_sign_idx + 6) % 12
-        result_idx = (start_idx + part) % 12
-    elif varga_key == 'D9':
-        navamsa_num = int(degree / (30 / 9))
-        if asc_sign_idx % 4 == 0:
-            result_idx = navamsa_num
-        elif asc_sign_idx % 4 == 1:
-            result_idx = (9 + navamsa_num) % 12
-        elif asc_sign_idx % 4 == 2:
-            result_idx = (6 + navamsa_num) % 12
-        else:
-            result_idx = (3 + navamsa_num) % 12
-    elif varga_key == 'D10':
-        part = int(degree / 3)
-        is_odd = asc_sign_idx % 2 == 0
-        start_idx = asc_sign_idx if is_odd else (asc_sign_idx + 8) % 12
-        result_idx = (start_idx + part) % 12
-    elif varga_key == 'D12':
-        part = int(degree / 2.5)
-        result_idx = (asc_sign_idx + part) % 12
-    elif varga_key == 'D16':
-        part = int(degree / (30 / 16))
-        if asc_sign_idx % 3 == 0:
-            start_idx = 0
-        elif asc_sign_idx % 3 == 1:
-            start_idx = 4
-        else:
-            start_idx = 8
-        result_idx = (start_idx + part) % 12
-    elif varga_key == 'D20':
-        part = int(degree / 1.5)
-        if asc_sign_idx % 3 == 0:
-            start_idx = 0
-        elif asc_sign_idx % 3 == 1:
-            start_idx = 8
-        else:
-            start_idx = 4
-        result_idx = (start_idx + part) % 12
-    elif varga_key == 'D24':
-        part = int(degree / 1.25)
-        is_odd = asc_sign_idx % 2 == 0
-        start_idx = 4 if is_odd else 3
-        result_idx = (start_idx + part) % 12
-    elif varga_key == 'D27':
-        part = int(degree / (30 / 27))
-        element = asc_sign_idx % 4
-        if element == 0:
-            start_idx = 0
-        elif element == 1:
-            start_idx = 3
-        elif element == 2:
-            start_idx = 6
-        else:
-            start_idx = 9
-        result_idx = (start_idx + part) % 12
-    elif varga_key == 'D30':
-        # Trimsamsa uses unequal divisions - simplified
-        is_odd = asc_sign_idx % 2 == 0
-        if is_odd:
-            if degree < 5: result_idx = 0
-            elif degree < 10: result_idx = 10
-            elif degree < 18: result_idx = 8
-            elif degree < 25: result_idx = 2
-            else: result_idx = 6
-        else:
-            if degree < 5: result_idx = 1
-            elif degree < 12: result_idx = 5
-            elif degree < 20: result_idx = 11
-            elif degree < 25: result_idx = 9
-            else: result_idx = 7
-    elif varga_key == 'D40':
-        part = int(degree / 0.75)
-        is_odd = asc_sign_idx % 2 == 0
-        start_idx = 0 if is_odd else 6
-        result_idx = (start_idx + part) % 12
-    elif varga_key == 'D45':
-        part = int(degree / (30 / 45))
-        if asc_sign_idx % 3 == 0:
-            start_idx = 0
-        elif asc_sign_idx % 3 == 1:
-            start_idx = 4
-        else:
-            start_idx = 8
-        result_idx = (start_idx + part) % 12
-    elif varga_key == 'D60':
-        part = int(degree / 0.5)
-        is_odd = asc_sign_idx % 2 == 0
-        start_idx = 0 if is_odd else 6
-        result_idx = (start_idx + part) % 12
-    else:
-        result_idx = asc_sign_idx
-
-    return {
-        'sign': SIGNS[result_idx],
-        'sign_num': result_idx + 1
-    }
-
+    def __iter__(self):
+        return iter(self._keys)
 
-def calculate_all_vargas(chart: Dict[str, Any]) -> Dict[str, Any]:
-    """Calculate all 16 divisional charts with full planet data including houses."""
-    varga_calculators = {
-        'D1': calculate_d1_rasi,
-        'D2': calculate_d2_hora,
-        'D3': calculate_d3_drekkana,
-        'D4': calculate_d4_chaturthamsa,
-        'D7': calculate_d7_saptamsa,
-        'D9': calculate_navamsa,
-        'D10': calculate_d10_dasamsa,
-        'D12': calculate_d12_dwadasamsa,
-        'D16': calculate_d16_shodasamsa,
-        'D20': calculate_d20_vimsamsa,
-        'D24': calculate_d24_chaturvimsamsa,
-        'D27': calculate_d27_saptavimsamsa,
-        'D30': calculate_d30_trimsamsa,
-        'D40': calculate_d40_khavedamsa,
-        'D45': calculate_d45_akshavedamsa,
-        'D60': calculate_d60_shashtiamsa,
-    }
-
-    # Get ascendant info for house calculations
-    asc_lon = chart['ascendant']['longitude']
-    asc_sign_idx = chart['ascendant']['sign_num'] - 1
-
-    vargas = {}
-    for varga_key, info in VARGA_INFO.items():
-        calculator = varga_calculators.get(varga_key)
-        if calculator:
-            # Get basic planet positions
-            planets = calculator(chart)
-
-            # Calculate varga ascendant
-            varga_asc = calculate_varga_ascendant(asc_lon, asc_sign_idx, info['division'], varga_key)
-
-            # Add house positions to each planet based on varga ascendant
-            for planet_name, planet_data in planets.items():
-                planet_sign_num = planet_data['sign_num']
-                varga_asc_sign_num = varga_asc['sign_num']
-                # House = planet's sign position relative to ascendant sign
-                house = ((planet_sign_num - varga_asc_sign_num + 12) % 12) + 1
-                planet_data['house'] = house
-
-                # Add original degree from D1 chart for reference
-                if planet_name in chart['planets']:
-                    planet_data['natal_degree'] = round(chart['planets'][planet_name]['degree'], 2)
-
-            vargas[varga_key] = {
-                'name': info['name'],
-                'description': info['description'],
-                'ascendant': varga_asc,
-                'planets': planets
-            }
+    def __len__(self) -> int:
+        return len(self._keys)
 
-    return vargas
+    @property
+    def computed(self) -> List[str]:
+        """Keys calculated so far."""
+        return [key for key in self._keys if key in self._vargas]
 
 
 # =============================================================================
@@ -1189,81 +878,97 @@ def calculate_antar_dasha(maha_dasha: dict) -> list:
     return antar_periods
 
 
-def get_current_dasha(maha_dashas: list) -> dict:
+NATAL_DASHA_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=NATAL_DASHA_CACHE_SIZE)
+def _natal_dasha(birth_local: str, moon_longitude: float) -> tuple:
     """
-    Find the current Maha Dasha and Antar Dasha based on today's date.
+    Time-independent dasha data for one birth: (DashaTimeline, natal dict).
+
+    Keyed by the local birth time as an ISO string with its UTC offset:
+    aware datetimes compare by instant, so two births at the same moment in
+    different zones would share one entry (and its local period dates).
     """
-    now = datetime.now(pytz.UTC)
-
-    current_maha = None
-    for md in maha_dashas:
-        start = datetime.fromisoformat(md['start']).astimezone(pytz.UTC)
-        end = datetime.fromisoformat(md['end']).astimezone(pytz.UTC)
-        if start <= now <= end:
-            current_maha = md
-            break
-
-    if not current_maha:
-        return {'current_maha': None, 'current_antar': None}
-
-    # Calculate Antar Dasha for current Maha Dasha
-    antars = calculate_antar_dasha(current_maha)
-
-    current_antar = None
-    for ad in antars:
-        start = datetime.fromisoformat(ad['start']).astimezone(pytz.UTC)
-        end = datetime.fromisoformat(ad['end']).astimezone(pytz.UTC)
-        if start <= now <= end:
-            current_antar = ad
-            break
+    from dasha import DashaTimeline
 
-    return {
-        'current_maha': current_maha,
-        'current_antar': current_antar,
-        'all_antars': antars,
+    timeline = DashaTimeline(datetime.fromisoformat(birth_local), moon_longitude)
+    natal = {
+        'moon_nakshatra': get_nakshatra(moon_longitude),
+        'moon_longitude': round(moon_longitude, 4),
+        'maha_dashas': timeline.maha_dashas(),
     }
+    return timeline, natal
 
 
-def calculate_dasha(year: int, month: int, day: int, hour: int, minute: int,
-                    latitude: float, longitude: float) -> dict:
+def calculate_natal_dasha(year: int = None, month: int = None, day: int = None, hour: int = None,
+                          minute: int = None, latitude: float = None, longitude: float = None,
+                          context: Optional[ChartContext] = None) -> tuple:
     """
-    Calculate complete Vimshottari Dasha for a birth chart.
+    The natal Vimshottari timeline, which depends only on the birth moment.
 
-    Returns:
-        Dictionary with all Maha Dasha periods and current running dashas
+    Cached per birth (Moon longitude and local birth time) for the life of the
+    process. Returns (DashaTimeline, dict with moon_nakshatra, moon_longitude
+    and maha_dashas); treat both as read-only.
     """
+    if context is None:
+        context = build_chart_context(year, month, day, hour, minute, latitude, longitude)
+
     # Get Moon's position
-    utc_dt = local_to_utc(year, month, day, hour, minute, latitude, longitude)
-    jd = calculate_julian_day(utc_dt)
-    swe.set_sid_mode(swe.SIDM_LAHIRI)
+    set_sidereal_mode(context.ayanamsa_type)
+    moon_lon, _ = context.position('Moon')
 
-    moon_result = swe.calc_ut(jd, swe.MOON, swe.FLG_SIDEREAL)
-    moon_lon = moon_result[0][0]
+    return _natal_dasha(context.local_dt.isoformat(), moon_lon)
 
-    # Birth datetime for calculations
-    tz_name = get_timezone_from_coordinates(latitude, longitude)
-    tz = pytz.timezone(tz_name)
-    birth_date = tz.localize(datetime(year, month, day, hour, minute))
 
-    # Calculate all Maha Dasha periods
-    maha_dashas = calculate_maha_dasha(birth_date, moon_lon)
+def dasha_timeline(birth_local: str, moon_longitude: float):
+    """The natal DashaTimeline for a local birth time (ISO, with offset), from the same cache."""
+    return _natal_dasha(birth_local, moon_longitude)[0]
+
 
-    # Get current running dashas
-    current = get_current_dasha(maha_dashas)
+def resolve_current_dasha(timeline, as_of: datetime) -> dict:
+    """
+    The running period at every level on as_of (naive datetimes are UTC).
+
+    One bisection per level against the natal timeline.
+    """
+    if as_of.tzinfo is None:
+        as_of = pytz.UTC.localize(as_of)
 
-    # Get Moon's nakshatra info
-    nakshatra = get_nakshatra(moon_lon)
+    path = timeline.path_at(as_of) or ()
+    running = [timeline.period(path[:level + 1]) for level in range(len(path))]
+    running += [None] * (5 - len(running))
 
     return {
-        'moon_nakshatra': nakshatra,
-        'moon_longitude': round(moon_lon, 4),
-        'maha_dashas': maha_dashas,
-        'current_maha_dasha': current['current_maha'],
-        'current_antar_dasha': current['current_antar'],
-        'current_antar_dashas': current.get('all_antars', []),
+        'as_of': as_of.isoformat(),
+        'current_maha_dasha': running[0],
+        'current_antar_dasha': running[1],
+        'current_pratyantar_dasha': running[2],
+        'current_sookshma_dasha': running[3],
+        'current_prana_dasha': running[4],
+        'current_antar_dashas': timeline.sub_periods(path[:1]) if path else [],
     }
 
 
+def calculate_dasha(year: int = None, month: int = None, day: int = None, hour: int = None,
+                    minute: int = None, latitude: float = None, longitude: float = None,
+                    context: Optional[ChartContext] = None, as_of: Optional[datetime] = None) -> dict:
+    """
+    Calculate complete Vimshottari Dasha for a birth chart.
+
+    Takes the birth moment, or a precomputed ChartContext for it. The
+    running periods are resolved for as_of (default: now), so the result
+    is fully determined by the arguments when as_of is given.
+
+    Returns:
+        Dictionary with all Maha Dasha periods and the running period at
+        every level down to prana
+    """
+    timeline, natal = calculate_natal_dasha(year, month, day, hour, minute, latitude, longitude, context=context)
+    current = resolve_current_dasha(timeline, as_of or datetime.now(pytz.UTC))
+    return {**natal, **current}
+
+
 # =============================================================================
 # SYNASTRY CALCULATIONS
 # =============================================================================
@@ -1517,87 +1222,139 @@ def calculate_karana(sun_lon: float, moon_lon: float) -> Dict[str, Any]:
     }
 
 
-def calculate_current_alignment(year: int, month: int, day: int, hour: int, minute: int,
-                                  latitude: float, longitude: float) -> Dict[str, Any]:
+def transit_snapshot(jd: float = None, ayanamsa_type: str = DEFAULT_AYANAMSA,
+                     context: Optional[ChartContext] = None) -> Dict[str, Any]:
     """
-    Calculate current cosmic alignment (Panchang) for daily guidance.
+    The location-independent part of the daily alignment at a UT Julian Day.
 
-    This provides the five elements of Panchang:
-    1. Tithi (Lunar day)
-    2. Nakshatra (Moon's constellation)
-    3. Yoga (Sun-Moon combination)
-    4. Karana (Half-tithi)
-    5. Vara (Weekday)
+    Tithi, nakshatra, yoga, karana and the transits depend only on the
+    moment, so one snapshot serves every location (see snapshots.py).
+    Element spans and sign ingresses are kept as Julian Days; use
+    localize_alignment to turn a snapshot into a response for a timezone.
 
-    Plus current transit positions for all planets.
+    Takes the Julian Day, or a ChartContext whose positions are reused.
     """
-    # Convert to UTC and get Julian Day
-    utc_dt = local_to_utc(year, month, day, hour, minute, latitude, longitude)
-    jd = calculate_julian_day(utc_dt)
-
-    # Set Lahiri Ayanamsa
-    swe.set_sid_mode(swe.SIDM_LAHIRI)
+    from events import quantity, find_crossing, next_boundary
 
-    # Get Sun and Moon positions (needed for Tithi, Yoga, Karana)
-    sun_result = swe.calc_ut(jd, swe.SUN, swe.FLG_SIDEREAL)
-    moon_result = swe.calc_ut(jd, swe.MOON, swe.FLG_SIDEREAL)
-
-    sun_lon = sun_result[0][0]
-    moon_lon = moon_result[0][0]
-
-    # Calculate Panchang elements
-    tithi = calculate_tithi(sun_lon, moon_lon)
-    moon_nakshatra = get_nakshatra(moon_lon)
-    yoga = calculate_yoga(sun_lon, moon_lon)
-    karana = calculate_karana(sun_lon, moon_lon)
-
-    # Get weekday
-    weekday_idx = datetime(year, month, day).weekday()
-    # Python: Monday=0, but Vedic: Sunday=0, so adjust
-    vedic_weekday = (weekday_idx + 1) % 7
-    vara = WEEKDAY_LORDS[vedic_weekday]
+    if context is not None:
+        jd, ayanamsa_type, position = context.jd, context.ayanamsa_type, context.position
+    else:
+        position = lambda name: get_body_position(jd, name, ayanamsa_type)
+
+    sun_lon, _ = position('Sun')
+    moon_lon, _ = position('Moon')
+
+    def span(kind, body=None):
+        q = quantity(kind, body)
+        start = find_crossing(q, jd, -1, ayanamsa_type)
+        end = find_crossing(q, jd, 1, ayanamsa_type)
+        return (start.jd if start else None, end.jd if end else None)
+
+    # Panchang elements: (values, start JD, end JD)
+    elements = {
+        'tithi': (calculate_tithi(sun_lon, moon_lon), *span('tithi')),
+        'moon_nakshatra': (get_nakshatra(moon_lon), *span('nakshatra', 'Moon')),
+        'yoga': (calculate_yoga(sun_lon, moon_lon), *span('yoga')),
+        'karana': (calculate_karana(sun_lon, moon_lon), *span('karana')),
+    }
 
-    # Calculate all transit positions
+    # Transit positions: (values, sign ingress JD)
     transits = {}
-    for name, planet_id in PLANETS.items():
-        result = swe.calc_ut(jd, planet_id, swe.FLG_SIDEREAL)
-        lon = result[0][0]
-        speed = result[0][3]
+    for name in PLANETS:
+        lon, speed = position(name)
         sign_idx = int(lon // 30)
+        ingress = next_boundary(jd, 'sign', name, ayanamsa_type)
 
-        transits[name] = {
+        transits[name] = ({
             'longitude': round(lon, 4),
             'sign': SIGNS[sign_idx],
             'sign_num': sign_idx + 1,
             'degree': round(lon % 30, 2),
             'nakshatra': get_nakshatra(lon),
             'retrograde': speed < 0
-        }
+        }, ingress.jd if ingress else None)
 
-    # Add Ketu
-    ketu_lon = (transits['Rahu']['longitude'] + 180) % 360
+    # Add Ketu (changes sign together with Rahu)
+    rahu, rahu_ingress = transits['Rahu']
+    ketu_lon = (rahu['longitude'] + 180) % 360
     ketu_sign_idx = int(ketu_lon // 30)
-    transits['Ketu'] = {
+    transits['Ketu'] = ({
         'longitude': round(ketu_lon, 4),
         'sign': SIGNS[ketu_sign_idx],
         'sign_num': ketu_sign_idx + 1,
         'degree': round(ketu_lon % 30, 2),
         'nakshatra': get_nakshatra(ketu_lon),
-        'retrograde': True
-    }
+        'retrograde': True,
+    }, rahu_ingress)
 
     return {
-        'tithi': tithi,
-        'moon_nakshatra': moon_nakshatra,
-        'yoga': yoga,
-        'karana': karana,
-        'vara': vara,
+        'jd': jd,
+        'ayanamsa_type': ayanamsa_type,
+        'elements': elements,
         'transits': transits,
-        'sun_sign': transits['Sun']['sign'],
-        'moon_sign': transits['Moon']['sign'],
-        'datetime': {
-            'date': f"{year}-{month:02d}-{day:02d}",
-            'time': f"{hour:02d}:{minute:02d}",
-            'timezone': get_timezone_from_coordinates(latitude, longitude)
-        }
     }
+
+
+def localize_alignment(snapshot: Dict[str, Any], local_dt: datetime, tz_name: str) -> Dict[str, Any]:
+    """
+    The alignment response for one location: a transit snapshot with its
+    times in the local timezone, plus the local weekday (vara) and date.
+
+    Builds new dicts, so a cached snapshot is never modified.
+    """
+    from events import jd_to_datetime
+
+    tz = get_tz(tz_name)
+
+    def local_time(jd):
+        return jd_to_datetime(jd, tz).isoformat() if jd is not None else None
+
+    alignment = {
+        key: {**values, 'start': local_time(start), 'end': local_time(end)}
+        for key, (values, start, end) in snapshot['elements'].items()
+    }
+
+    # Python: Monday=0, but Vedic: Sunday=0, so adjust
+    vedic_weekday = (local_dt.weekday() + 1) % 7
+    alignment['vara'] = WEEKDAY_LORDS[vedic_weekday]
+
+    transits = {
+        name: {**values, 'sign_ends': local_time(ingress)}
+        for name, (values, ingress) in snapshot['transits'].items()
+    }
+    alignment['transits'] = transits
+    alignment['sun_sign'] = transits['Sun']['sign']
+    alignment['moon_sign'] = transits['Moon']['sign']
+    alignment['datetime'] = {
+        'date': local_dt.strftime('%Y-%m-%d'),
+        'time': local_dt.strftime('%H:%M'),
+        'timezone': tz_name
+    }
+    return alignment
+
+
+def calculate_current_alignment(year: int = None, month: int = None, day: int = None, hour: int = None,
+                                minute: int = None, latitude: float = None, longitude: float = None,
+                                context: Optional[ChartContext] = None) -> Dict[str, Any]:
+    """
+    Calculate current cosmic alignment (Panchang) for daily guidance.
+
+    This provides the five elements of Panchang:
+    1. Tithi (Lunar day)
+    2. Nakshatra (Moon's constellation)
+    3. Yoga (Sun-Moon combination)
+    4. Karana (Half-tithi)
+    5. Vara (Weekday)
+
+    Plus current transit positions for all planets.
+
+    Each Panchang element carries its 'start' and 'end' time and each
+    transit the time it leaves its sign ('sign_ends'), in local time.
+
+    Takes the local moment, or a precomputed ChartContext for it.
+    """
+    if context is None:
+        context = build_chart_context(year, month, day, hour, minute, latitude, longitude)
+
+    snapshot = transit_snapshot(context=context)
+    return localize_alignment(snapshot, context.local_dt, context.timezone)
@@ -0,0 +1,342 @@
+"""
+Content-addressed cache of chart results.
+
+A result is keyed by the SHA-256 of a canonical JSON document holding the
+normalized birth data (BirthData.model_dump() with the coordinates rounded
+to CANONICAL_DECIMALS), the result kind ('chart', 'chart_response',
+'dasha_natal', ...), its calculation settings (e.g. selected vargas),
+the ephemeris source and CACHE_VERSION. The same birth data therefore maps
+to the same key in every process; bump CACHE_VERSION whenever a
+calculation changes its output.
+
+Two tiers:
+
+- memory: a bounded LRU of results in this process, kept decoded and/or
+  as the encoded JSON bytes (serialization.dumps), whichever was needed.
+  Results are shared between requests and must be treated as read-only.
+- disk (optional): a SQLite database shared by every process that opens
+  the same file (WAL mode) and kept across restarts. Entries older than
+  max_age are dropped on read and by the periodic sweep, and the sweep
+  removes least recently used rows while the stored JSON exceeds max_bytes.
+  A disk hit is served from the stored bytes without decoding them.
+
+A disk hit is promoted to memory. Disk errors are logged and counted but
+never fail a request; the result is simply computed. Async lookups of a key
+that is already being computed wait for that computation (coalescing).
+
+Configuration (environment):
+    CHART_CACHE_SIZE          results kept in memory (default 1024, 0 disables)
+    CHART_CACHE_PATH          SQLite file for the disk tier (default: none)
+    CHART_CACHE_MAX_MB        disk tier size bound (default 256)
+    CHART_CACHE_MAX_AGE_DAYS  disk and memory entry lifetime (default 30)
+
+The class itself holds any JSON-compatible results; other caches are
+configured the same way under their own prefix (cache_from_env).
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from functools import partial
+from typing import Dict, Any, Awaitable, Callable, Optional
+
+import ephemeris
+import serialization
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 2
+CANONICAL_DECIMALS = 6  # ~0.1 m of latitude
+
+ENV_PREFIX = 'CHART_CACHE'
+DEFAULT_SIZE = 1024
+DEFAULT_MAX_MB = 256
+DEFAULT_MAX_AGE_DAYS = 30
+SWEEP_EVERY = 256  # disk writes between eviction sweeps
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed);
+"""
+
+
+def normalize_birth(birth: Dict[str, Any]) -> Dict[str, Any]:
+    """Birth data in canonical form: plain types, coordinates rounded."""
+    normalized = dict(birth)
+    for field in ('latitude', 'longitude'):
+        normalized[field] = round(float(normalized[field]), CANONICAL_DECIMALS) + 0.0  # no -0.0
+    return normalized
+
+
+def cache_key(kind: str, birth: Dict[str, Any], **settings) -> str:
+    """Content address of one result: hex SHA-256 of its canonical description."""
+    document = {
+        'version': CACHE_VERSION,
+        'kind': kind,
+        'birth': normalize_birth(birth),
+        'settings': settings,
+        'ephemeris': 'table' if ephemeris.get_table() is not None else 'swisseph',
+    }
+    canonical = json.dumps(document, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class _Entry:
+    """A cached result, held decoded, encoded, or both; each form is made on first use."""
+
+    __slots__ = ('created', '_value', '_encoded')
+
+    def __init__(self, created: float, value=None, encoded: Optional[bytes] = None):
+        self.created = created
+        self._value = value
+        self._encoded = encoded
+
+    @property
+    def value(self):
+        if self._value is None:
+            self._value = serialization.loads(self._encoded)
+        return self._value
+
+    @property
+    def encoded(self) -> bytes:
+        if self._encoded is None:
+            self._encoded = serialization.dumps(self._value)
+        return self._encoded
+
+
+class ChartCache:
+    """Two-tier (memory LRU, optional SQLite) cache of JSON-compatible results."""
+
+    def __init__(self, maxsize: int = DEFAULT_SIZE, path: Optional[str] = None,
+                 max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024,
+                 max_age: float = DEFAULT_MAX_AGE_DAYS * 86400):
+        self.maxsize = maxsize
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._memory: 'OrderedDict[str, _Entry]' = OrderedDict()  # key -> entry, least recent first
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._db = None
+        self._writes = 0
+        self._stats = {
+            'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'coalesced': 0, 'stores': 0,
+            'expired': 0, 'memory_evictions': 0, 'disk_evictions': 0, 'disk_errors': 0,
+        }
+        if path:
+            try:
+                self._db = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.executescript(_SCHEMA)
+            except sqlite3.Error:
+                logger.exception("Chart cache database %s unavailable; using memory only", path)
+                self._db = None
+                self._stats['disk_errors'] += 1
+
+    # ------------------------------------------------------------------
+    # Tiers
+    # ------------------------------------------------------------------
+
+    def _memory_get(self, key: str, now: float) -> Optional['_Entry']:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            if now - entry.created > self.max_age:
+                del self._memory[key]
+                self._stats['expired'] += 1
+                return None
+            self._memory.move_to_end(key)
+            self._stats['memory_hits'] += 1
+            return entry
+
+    def _memory_put(self, key: str, entry: '_Entry'):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.maxsize:
+                self._memory.popitem(last=False)
+                self._stats['memory_evictions'] += 1
+
+    def _disk_get(self, key: str, now: float) -> Optional['_Entry']:
+        if self._db is None:
+            return None
+        try:
+            with self._lock:
+                row = self._db.execute("SELECT value, created FROM results WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                if now - row[1] > self.max_age:
+                    self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+                    self._stats['expired'] += 1
+                    return None
+                self._db.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+                self._stats['disk_hits'] += 1
+        except sqlite3.Error:
+            logger.exception("Chart cache read failed")
+            self._stats['disk_errors'] += 1
+            return None
+        # Stored bytes are served as they are; decoded only when a caller needs the value
+        entry = _Entry(row[1], encoded=bytes(row[0]))
+        self._memory_put(key, entry)
+        return entry
+
+    def _disk_put(self, key: str, kind: str, entry: '_Entry'):
+        if self._db is None:
+            return
+        try:
+            blob = entry.encoded
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, kind, value, size, created, accessed) VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, kind, blob, len(blob), entry.created, entry.created))
+                self._writes += 1
+                if self._writes % SWEEP_EVERY == 0:
+                    self._sweep(entry.created)
+        except (sqlite3.Error, TypeError, ValueError):
+            logger.exception("Chart cache write failed")
+            self._stats['disk_errors'] += 1
+
+    def _sweep(self, now: float):
+        """Drop expired rows, then least recently used rows beyond max_bytes (lock held)."""
+        removed = self._db.execute("DELETE FROM results WHERE created < ?", (now - self.max_age,)).rowcount
+        self._stats['expired'] += max(removed, 0)
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess, keys = total - self.max_bytes, []
+        for key, size in self._db.execute("SELECT key, size FROM results ORDER BY accessed"):
+            keys.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._db.executemany("DELETE FROM results WHERE key = ?", keys)
+        self._stats['disk_evictions'] += len(keys)
+
+    def sweep(self):
+        """Run disk eviction now."""
+        if self._db is not None:
+            with self._lock:
+                self._sweep(time.time())
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def _lookup(self, key: str) -> Optional['_Entry']:
+        now = time.time()
+        entry = self._memory_get(key, now) or self._disk_get(key, now)
+        if entry is None:
+            self._stats['misses'] += 1
+        return entry
+
+    def _store(self, key: str, kind: str, value) -> '_Entry':
+        entry = _Entry(time.time(), value=value)
+        self._stats['stores'] += 1
+        self._memory_put(key, entry)
+        self._disk_put(key, kind, entry)
+        return entry
+
+    def get(self, key: str):
+        """The cached result, or None (a miss)."""
+        entry = self._lookup(key)
+        return entry.value if entry is not None else None
+
+    def put(self, key: str, kind: str, value):
+        self._store(key, kind, value)
+
+    def fetch_sync(self, kind: str, key: str, compute: Callable[[], Any]):
+        """get(key), or compute() and store it. For sync (thread pool) endpoints."""
+        entry = self._lookup(key)
+        if entry is None:
+            entry = self._store(key, kind, compute())
+        return entry.value
+
+    async def fetch(self, kind: str, key: str, compute: Callable[[], Awaitable[Any]]):
+        """Async fetch_sync with coalescing; disk reads and writes run off the event loop."""
+        return (await self._fetch_entry(kind, key, compute)).value
+
+    async def fetch_encoded(self, kind: str, key: str, compute: Callable[[], Awaitable[Any]]) -> bytes:
+        """fetch(), as JSON bytes (serialization.dumps); hits return the stored bytes."""
+        return (await self._fetch_entry(kind, key, compute)).encoded
+
+    async def _fetch_entry(self, kind: str, key: str, compute) -> '_Entry':
+        entry = self._memory_get(key, time.time())
+        if entry is not None:
+            return entry
+
+        task = self._pending.get(key)
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            self._stats['coalesced'] += 1
+        else:
+            task = asyncio.ensure_future(self._load(kind, key, compute))
+            task.add_done_callback(partial(self._finish, key))
+            self._pending[key] = task
+        return await asyncio.shield(task)
+
+    async def _load(self, kind: str, key: str, compute) -> '_Entry':
+        if self._db is not None:
+            entry = await asyncio.to_thread(self._disk_get, key, time.time())
+            if entry is not None:
+                return entry
+        self._stats['misses'] += 1
+        value = await compute()
+        if self._db is None:
+            return self._store(key, kind, value)
+        return await asyncio.to_thread(self._store, key, kind, value)
+
+    def _finish(self, key, task):
+        if self._pending.get(key) is task:
+            del self._pending[key]
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self._stats['memory_hits'] + self._stats['disk_hits'] + self._stats['coalesced']
+        lookups = hits + self._stats['misses']
+        disk = None
+        if self._db is not None:
+            try:
+                with self._lock:
+                    rows, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+                disk = {'path': self.path, 'rows': rows, 'bytes': size, 'max_bytes': self.max_bytes}
+            except sqlite3.Error:
+                self._stats['disk_errors'] += 1
+        return {
+            **self._stats,
+            'size': len(self._memory),
+            'maxsize': self.maxsize,
+            'pending': len(self._pending),
+            'hit_rate': round(hits / lookups, 4) if lookups else None,
+            'disk': disk,
+        }
+
+
+def cache_from_env(prefix: str = ENV_PREFIX, size: int = DEFAULT_SIZE,
+                   max_age_days: float = DEFAULT_MAX_AGE_DAYS) -> ChartCache:
+    """A ChartCache configured from <prefix>_SIZE, _PATH, _MAX_MB and _MAX_AGE_DAYS."""
+    return ChartCache(
+        maxsize=int(os.getenv(f'{prefix}_SIZE', size)),
+        path=os.getenv(f'{prefix}_PATH') or None,
+        max_bytes=int(float(os.getenv(f'{prefix}_MAX_MB', DEFAULT_MAX_MB)) * 1024 * 1024),
+        max_age=float(os.getenv(f'{prefix}_MAX_AGE_DAYS', max_age_days)) * 86400,
+    )
@@ -0,0 +1,203 @@
+"""
+Token budget for chat histories.
+
+Every chat request resends the conversation, so without a bound a long
+conversation grows in latency and cost until it no longer fits the model's
+context. HistoryCompactor.prepare() keeps a request within a budget:
+
+- The leading system messages (the chart context) and the new user message
+  are always sent as they are.
+- The history in between is split into turns, each starting at a user
+  message. Whenever the turns not yet folded exceed `budget` tokens, the
+  oldest of them are folded into a block until at most half the budget is
+  left. The rule only looks at what came before, so a longer version of the
+  same conversation always has the same blocks, whichever endpoint sends it
+  (a server-side session or a client-held history).
+- Blocks are replaced by a running summary: the summary of blocks 1..k is
+  made from the summary of blocks 1..k-1 and block k. Summaries are cached
+  by the SHA-256 of the messages they cover and are made in a background
+  task, never while a request waits; the cache (SQLite, if configured) is
+  read and written in a thread. Until a summary is ready, a request
+  sends the latest summary there is plus as many of the most recent turns
+  as fit in the budget.
+
+A compacted request is [system..., summary, recent turns..., new message].
+Between two folds it only grows at the end, so the provider's prefix cache
+keeps hitting, and its size stays within the system prompt, one summary and
+the budget however long the conversation runs.
+
+Configuration (environment):
+    CHAT_HISTORY_BUDGET         history tokens sent per request (default 6000, 0 disables)
+    CHAT_SUMMARY_CACHE_*        summary cache settings, as for chart_cache
+"""
+
+import os
+import json
+import asyncio
+import hashlib
+import logging
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from chart_cache import ChartCache, cache_from_env
+
+logger = logging.getLogger(__name__)
+
+BUDGET_ENV = 'CHAT_HISTORY_BUDGET'
+DEFAULT_BUDGET = 6000
+SUMMARY_HEADER = "Summary of the earlier conversation (the older messages are not shown):"
+
+Message = Dict[str, str]
+
+
+def _turns(history: List[Message]) -> List[List[Message]]:
+    """The history split into turns, each starting at a user message."""
+    turns: List[List[Message]] = []
+    for message in history:
+        if message.get("role") == "user" or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def _key(blocks: List[List[Message]]) -> str:
+    document = json.dumps(blocks, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(document.encode()).hexdigest()
+
+
+class HistoryCompactor:
+    """
+    Keeps chat requests within a history token budget (see the module
+    docstring). summarize(previous_summary, messages) -> summary text makes
+    the running summary; count_tokens(text) -> int measures messages.
+    """
+
+    def __init__(self, summarize: Callable[[Optional[str], List[Message]], Awaitable[str]],
+                 count_tokens: Callable[[str], int], budget: int = DEFAULT_BUDGET,
+                 cache: Optional[ChartCache] = None):
+        self.summarize = summarize
+        self.budget = budget
+        self.cache = cache if cache is not None else ChartCache(maxsize=1024)
+        self._count = lru_cache(maxsize=8192)(count_tokens)
+        self._pending: Dict[str, asyncio.Task] = {}
+        self._stats = {'requests': 0, 'compacted': 0, 'summary_hits': 0, 'summary_misses': 0,
+                       'dropped_messages': 0, 'summaries': 0, 'summary_errors': 0}
+
+    def tokens(self, messages: List[Message]) -> int:
+        return sum(self._count(message.get("content") or "") for message in messages)
+
+    def plan(self, history: List[Message]) -> Tuple[List[List[Message]], List[List[Message]]]:
+        """(blocks folded so far, turns still sent in full) for a history."""
+        blocks: List[List[Message]] = []
+        live: List[List[Message]] = []
+        live_tokens = 0
+        for turn in _turns(history):
+            live.append(turn)
+            live_tokens += self.tokens(turn)
+            if live_tokens > self.budget:
+                block = []
+                while live_tokens > self.budget // 2 and len(live) > 1:
+                    oldest = live.pop(0)
+                    block.extend(oldest)
+                    live_tokens -= self.tokens(oldest)
+                if block:
+                    blocks.append(block)
+        return blocks, live
+
+    async def prepare(self, messages: List[Message]) -> List[Message]:
+        """The messages to send for a request: the same ones, or a compacted version."""
+        self._stats['requests'] += 1
+        if self.budget <= 0:
+            return messages
+
+        start = 0
+        while start < len(messages) and messages[start].get("role") == "system":
+            start += 1
+        end = len(messages) - 1 if len(messages) > start and messages[-1].get("role") == "user" else len(messages)
+        head, history, tail = messages[:start], messages[start:end], messages[end:]
+
+        blocks, live = self.plan(history)
+        if not blocks:
+            return messages
+        self._stats['compacted'] += 1
+
+        keys = [_key(blocks[:k + 1]) for k in range(len(blocks))]
+        done, summary = await asyncio.to_thread(self._latest_summary, keys)
+        if done == len(blocks) - 1:
+            self._stats['summary_hits'] += 1
+        else:
+            self._stats['summary_misses'] += 1
+            self._schedule(blocks, keys, done)
+
+        # Turns not covered by the summary, newest first, while they fit
+        uncovered = [turn for block in blocks[done + 1:] for turn in _turns(block)] + live
+        kept: List[List[Message]] = []
+        kept_tokens = 0
+        for turn in reversed(uncovered):
+            turn_tokens = self.tokens(turn)
+            if kept and kept_tokens + turn_tokens > self.budget:
+                break
+            kept.insert(0, turn)
+            kept_tokens += turn_tokens
+        self._stats['dropped_messages'] += sum(len(turn) for turn in uncovered[:len(uncovered) - len(kept)])
+
+        compacted = list(head)
+        if summary is not None:
+            compacted.append({"role": "system", "content": f"{SUMMARY_HEADER}\n{summary}"})
+        compacted.extend(message for turn in kept for message in turn)
+        compacted.extend(tail)
+        return compacted
+
+    def _latest_summary(self, keys: List[str]) -> Tuple[int, Optional[str]]:
+        """(index, text) of the latest cached running summary, (-1, None) if none is."""
+        for k in reversed(range(len(keys))):
+            summary = self.cache.get(keys[k])
+            if summary is not None:
+                return k, summary
+        return -1, None
+
+    def _schedule(self, blocks: List[List[Message]], keys: List[str], done: int):
+        """Summarize blocks done+1.. in the background, once per conversation state."""
+        if keys[-1] in self._pending:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(self._summarize(blocks, keys, done))
+        self._pending[keys[-1]] = task
+        task.add_done_callback(lambda _: self._pending.pop(keys[-1], None))
+
+    async def _summarize(self, blocks: List[List[Message]], keys: List[str], done: int):
+        summary = await asyncio.to_thread(self.cache.get, keys[done]) if done >= 0 else None
+        try:
+            for k in range(done + 1, len(blocks)):
+                summary = await self.summarize(summary, blocks[k])
+                await asyncio.to_thread(self.cache.put, keys[k], 'chat_summary', summary)
+                self._stats['summaries'] += 1
+        except Exception:
+            self._stats['summary_errors'] += 1
+            logger.exception("Chat history summary failed")
+
+    async def wait(self):
+        """Wait for the summaries being made (tests, shutdown)."""
+        while self._pending:
+            await asyncio.gather(*list(self._pending.values()), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            'budget': self.budget,
+            'pending': len(self._pending),
+            'cache': self.cache.stats(),
+        }
+
+
+def compactor_from_env(summarize: Callable[[Optional[str], List[Message]], Awaitable[str]],
+                       count_tokens: Callable[[str], int]) -> HistoryCompactor:
+    """A HistoryCompactor configured from CHAT_HISTORY_BUDGET and CHAT_SUMMARY_CACHE_*."""
+    return HistoryCompactor(
+        summarize, count_tokens,
+        budget=int(os.getenv(BUDGET_ENV, DEFAULT_BUDGET)),
+        cache=cache_from_env('CHAT_SUMMARY_CACHE', size=1024, max_age_days=7),
+    )
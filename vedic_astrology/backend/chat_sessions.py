@@ -0,0 +1,176 @@
+"""
+Server-side chat sessions.
+
+/api/chat/v2 has the client send the whole conversation, chart system
+prompt included, on every turn. A session keeps it on the server instead:
+the client creates it once with the system prompt (or birth data, for the
+chart prompt built here) and then sends only each new message.
+
+The provider caches prompt prefixes: the part of a request that is
+byte-identical to the start of an earlier request is served from its cache,
+which is cheaper and faster. A session therefore never rebuilds what it has
+sent. The system prompt is fixed when the session is created, each turn is
+appended exactly as it was sent and answered, and context that changes from
+turn to turn (date, today's progress) belongs in the new message, not in the
+system prompt. Every turn's request then extends the previous one, and only
+the newest turn is uncached. Per-turn usage (cached against uncached prompt
+tokens) is kept with the session.
+
+A session keeps the whole conversation; what is sent for a long one is
+bounded by interpreter.history_compactor (see chat_history).
+
+Sessions live in this process's memory, least recently used first out:
+
+    CHAT_SESSION_MAX         sessions kept (default 1000)
+    CHAT_SESSION_IDLE_HOURS  a session unused this long is dropped (default 24)
+"""
+
+import os
+import time
+import secrets
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+ENV_PREFIX = 'CHAT_SESSION'
+DEFAULT_MAX_SESSIONS = 1000
+DEFAULT_IDLE_HOURS = 24
+
+
+class SessionBusy(RuntimeError):
+    """The session is already answering a message."""
+
+
+class ChatSession:
+    """A conversation: the system message, then user and assistant messages in order."""
+
+    def __init__(self, session_id: str, system: str, history: Optional[List[Dict[str, str]]] = None):
+        self.id = session_id
+        self.system = {"role": "system", "content": system}
+        self.history = [dict(message) for message in history or []]
+        self.turns: List[Dict[str, Any]] = []
+        self.created = self.used = time.time()
+        self._busy = False
+
+    def messages(self) -> List[Dict[str, str]]:
+        return [self.system, *self.history]
+
+    def request(self, user_message: Dict[str, str]) -> List[Dict[str, str]]:
+        """The messages of the next request: everything sent so far, then the new message."""
+        return [*self.messages(), user_message]
+
+    def acquire(self):
+        """Start a turn. One turn at a time: a second message while one is answered raises SessionBusy."""
+        if self._busy:
+            raise SessionBusy(f"Session {self.id} is already answering a message")
+        self._busy = True
+
+    def release(self):
+        self._busy = False
+        self.used = time.time()
+
+    @contextmanager
+    def turn(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def commit(self, user_message: Dict[str, str], result: Dict[str, Any]):
+        """Append an answered turn. Only the answer text is kept (no reasoning), as it was received."""
+        self.history.append(user_message)
+        self.history.append({"role": "assistant", "content": result["response"]})
+        self.turns.append(result.get("usage") or {})
+
+    def totals(self) -> Dict[str, Any]:
+        prompt = sum(turn.get("prompt_tokens", 0) for turn in self.turns)
+        cached = sum(turn.get("cached_tokens", 0) for turn in self.turns)
+        return {
+            "turns": len(self.turns),
+            "prompt_tokens": prompt,
+            "cached_tokens": cached,
+            "completion_tokens": sum(turn.get("completion_tokens", 0) for turn in self.turns),
+            "cache_hit_ratio": round(cached / prompt, 4) if prompt else None
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.id,
+            "messages": self.messages(),
+            "turns": self.turns,
+            "totals": self.totals()
+        }
+
+
+def user_message(message: str, context: Optional[str] = None) -> Dict[str, str]:
+    """A user turn; per-turn context goes ahead of the message so the system prompt stays fixed."""
+    content = f"{context}\n\n{message}" if context else message
+    return {"role": "user", "content": content}
+
+
+class ChatSessionStore:
+    """Sessions by id, at most max_sessions, each dropped after max_idle seconds unused."""
+
+    def __init__(self, max_sessions: int = DEFAULT_MAX_SESSIONS, max_idle: float = DEFAULT_IDLE_HOURS * 3600):
+        self.max_sessions = max_sessions
+        self.max_idle = max_idle
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'created': 0, 'deleted': 0, 'expired': 0, 'evicted': 0,
+                       'turns': 0, 'prompt_tokens': 0, 'cached_tokens': 0}
+
+    def create(self, system: str, history: Optional[List[Dict[str, str]]] = None) -> ChatSession:
+        session = ChatSession(secrets.token_urlsafe(16), system, history)
+        with self._lock:
+            self._sessions[session.id] = session
+            self._stats['created'] += 1
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self._stats['evicted'] += 1
+        return session
+
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            if time.time() - session.used > self.max_idle:
+                del self._sessions[session_id]
+                self._stats['expired'] += 1
+                return None
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            if self._sessions.pop(session_id, None) is None:
+                return False
+            self._stats['deleted'] += 1
+            return True
+
+    def record(self, usage: Optional[Dict[str, Any]]):
+        """Count one answered turn towards the store-wide stats."""
+        with self._lock:
+            self._stats['turns'] += 1
+            if usage:
+                self._stats['prompt_tokens'] += usage.get("prompt_tokens", 0)
+                self._stats['cached_tokens'] += usage.get("cached_tokens", 0)
+
+    def stats(self) -> Dict[str, Any]:
+        prompt = self._stats['prompt_tokens']
+        return {
+            **self._stats,
+            'sessions': len(self._sessions),
+            'max_sessions': self.max_sessions,
+            'cache_hit_ratio': round(self._stats['cached_tokens'] / prompt, 4) if prompt else None
+        }
+
+
+def sessions_from_env(prefix: str = ENV_PREFIX) -> ChatSessionStore:
+    """A ChatSessionStore configured from <prefix>_MAX and _IDLE_HOURS."""
+    return ChatSessionStore(
+        max_sessions=int(os.getenv(f'{prefix}_MAX', DEFAULT_MAX_SESSIONS)),
+        max_idle=float(os.getenv(f'{prefix}_IDLE_HOURS', DEFAULT_IDLE_HOURS)) * 3600,
+    )
@@ -0,0 +1,187 @@
+"""
+Vimshottari dasha timeline engine.
+
+The timeline is a tree: 9 maha dashas (plus the balance period at birth),
+each split proportionally into 9 antar dashas, then pratyantar, sookshma
+and prana. Boundaries are stored as integer microsecond offsets from birth,
+so finding the running period at any level is one bisection per level.
+
+Only the maha level is built up front. A period's sub-periods are derived
+the first time they are needed; levels down to pratyantar are kept, deeper
+ones are cheap enough to rebuild on every visit, which keeps memory flat
+when streaming a whole lifetime at prana depth.
+
+Maha and antar durations are rounded to microseconds one by one, the way
+calculate_maha_dasha and calculate_antar_dasha add timedeltas, so their
+boundaries (and ISO strings) match the original functions. Deeper levels
+split the parent's length in integer arithmetic.
+"""
+
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Dict, Any, Iterator, List, NamedTuple, Optional, Tuple
+
+from calculator import DASHA_YEARS, DASHA_SEQUENCE, calculate_dasha_balance
+
+LEVELS = ('maha', 'antar', 'pratyantar', 'sookshma', 'prana')
+
+DAYS_PER_YEAR = 365.25
+MICROSECOND = timedelta(microseconds=1)
+
+# Sub-period lists are kept for parents up to this depth (antar and pratyantar lists)
+CACHED_DEPTH = 2
+
+
+def _duration_us(days: float) -> int:
+    """Length of a period in microseconds, rounded like timedelta(days=...)."""
+    return timedelta(days=days) // MICROSECOND
+
+
+class Periods(NamedTuple):
+    """One level of siblings: period k runs from bounds[k] to bounds[k + 1]."""
+    lords: List[str]
+    bounds: List[int]  # microseconds after birth, one more entry than lords
+    years: List[float]
+
+
+class DashaTimeline:
+    """
+    The full Vimshottari tree for one birth.
+
+    A period is addressed by its path of indices from the maha level down,
+    e.g. (3,) is the fourth maha dasha and (3, 0, 5) a pratyantar within it.
+    """
+
+    def __init__(self, birth_date: datetime, moon_longitude: float):
+        self.birth_date = birth_date
+        starting_lord, balance_years, _ = calculate_dasha_balance(moon_longitude)
+
+        # First period is the balance at birth, then one full 120-year cycle
+        start_idx = DASHA_SEQUENCE.index(starting_lord)
+        lords = [DASHA_SEQUENCE[(start_idx + i) % 9] for i in range(10)]
+        exact_years = [balance_years] + [DASHA_YEARS[lord] for lord in lords[1:]]
+        durations = [_duration_us(y * DAYS_PER_YEAR) for y in exact_years]
+
+        # Sub-periods divide the displayed (2-decimal) balance, as calculate_antar_dasha does
+        years = [round(balance_years, 2)] + exact_years[1:]
+        self._maha = Periods(lords, [0] + list(accumulate(durations)), years)
+        self._children: Dict[Tuple[int, ...], Periods] = {}
+
+    # ------------------------------------------------------------------
+    # Tree structure
+    # ------------------------------------------------------------------
+
+    def children(self, path: Tuple[int, ...]) -> Periods:
+        """Periods directly below path; () is the maha level."""
+        if not path:
+            return self._maha
+        cached = self._children.get(path)
+        if cached is not None:
+            return cached
+        result = self._subdivide(self.children(path[:-1]), path[-1], len(path))
+        if len(path) <= CACHED_DEPTH:
+            self._children[path] = result
+        return result
+
+    @staticmethod
+    def _subdivide(parent: Periods, i: int, level: int) -> Periods:
+        # Sequence starts from the parent's lord, each share proportional to its years
+        start, end = parent.bounds[i], parent.bounds[i + 1]
+        parent_years = parent.years[i]
+        start_idx = DASHA_SEQUENCE.index(parent.lords[i])
+        lords = [DASHA_SEQUENCE[(start_idx + k) % 9] for k in range(9)]
+        years = [DASHA_YEARS[lord] / 120 * parent_years for lord in lords]
+        if level == 1:
+            # Antar dashas: same timedelta rounding as calculate_antar_dasha
+            durations = [_duration_us(y * DAYS_PER_YEAR) for y in years]
+        else:
+            # Deeper levels: integer shares of the parent's length
+            durations = [(end - start) * DASHA_YEARS[lord] // 120 for lord in lords]
+        bounds = list(accumulate(durations, initial=start))
+        bounds[-1] = end  # children always tile the parent exactly
+        return Periods(lords, bounds, years)
+
+    # ------------------------------------------------------------------
+    # Conversions
+    # ------------------------------------------------------------------
+
+    def offset(self, moment: datetime) -> int:
+        """Microseconds from birth to an aware datetime."""
+        return (moment - self.birth_date) // MICROSECOND
+
+    def to_datetime(self, offset_us: int) -> datetime:
+        """Datetime (in the birth timezone) of an offset from birth."""
+        return self.birth_date + timedelta(microseconds=offset_us)
+
+    def period(self, path: Tuple[int, ...]) -> Dict[str, Any]:
+        """Period dict (planet, level, start, end, years) for a path."""
+        return self._period(self.children(path[:-1]), path[-1], len(path) - 1)
+
+    def _period(self, siblings: Periods, i: int, level: int) -> Dict[str, Any]:
+        period = {
+            'planet': siblings.lords[i],
+            'level': LEVELS[level],
+            'start': self.to_datetime(siblings.bounds[i]).isoformat(),
+            'end': self.to_datetime(siblings.bounds[i + 1]).isoformat(),
+        }
+        if level == 0:
+            period['years'] = siblings.years[i]
+            period['is_balance'] = i == 0
+        else:
+            period['years'] = round(siblings.years[i], 3 if level == 1 else 4)
+        return period
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def maha_dashas(self) -> List[Dict[str, Any]]:
+        """All maha dasha periods from birth (the calculate_maha_dasha list)."""
+        return [self.period((i,)) for i in range(len(self._maha[0]))]
+
+    def sub_periods(self, path: Tuple[int, ...]) -> List[Dict[str, Any]]:
+        """The 9 periods directly below path, e.g. the antar dashas of a maha."""
+        return [self.period(path + (k,)) for k in range(len(self.children(path)[0]))]
+
+    def _locate(self, moment: datetime, depth: int) -> List[Tuple[Periods, int]]:
+        """(siblings, index) of the running period at each level, or [] outside the cycle."""
+        t = self.offset(moment)
+        bounds = self._maha.bounds
+        if t < bounds[0] or t > bounds[-1]:
+            return []
+
+        found, path = [], ()
+        for _ in range(depth):
+            siblings = self.children(path)
+            # Boundaries are inclusive at both ends, earliest period wins
+            i = min(max(bisect_left(siblings.bounds, t) - 1, 0), len(siblings.lords) - 1)
+            found.append((siblings, i))
+            path += (i,)
+        return found
+
+    def path_at(self, moment: datetime, depth: int = len(LEVELS)) -> Optional[Tuple[int, ...]]:
+        """Path of the running period at moment, depth levels deep; None outside the 120-year cycle."""
+        found = self._locate(moment, depth)
+        return tuple(i for _, i in found) if found else None
+
+    def running(self, moment: datetime, depth: int = len(LEVELS)) -> List[Dict[str, Any]]:
+        """The running period at each level (maha first), or [] outside the cycle."""
+        return [self._period(siblings, i, level) for level, (siblings, i) in enumerate(self._locate(moment, depth))]
+
+    def iter_periods(self, start: datetime, end: datetime, depth: int = 2) -> Iterator[Dict[str, Any]]:
+        """
+        Stream every period at level depth (1 = maha ... 5 = prana) overlapping
+        [start, end], in time order. Only subtrees that overlap the window are expanded.
+        """
+        yield from self._iter_paths((), self.offset(start), self.offset(end), depth)
+
+    def _iter_paths(self, path, t0, t1, depth):
+        siblings = self.children(path)
+        first = max(bisect_right(siblings.bounds, t0) - 1, 0)
+        last = min(bisect_right(siblings.bounds, t1), len(siblings.lords))
+        for i in range(first, last):
+            if len(path) + 1 == depth:
+                yield self._period(siblings, i, len(path))
+            else:
+                yield from self._iter_paths(path + (i,), t0, t1, depth)
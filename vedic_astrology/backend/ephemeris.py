@@ -0,0 +1,267 @@
+"""
+Precomputed sidereal ephemeris backed by memory-mapped Chebyshev tables.
+
+Each body's Lahiri sidereal longitude is fitted piecewise with Chebyshev
+polynomials over fixed-length segments covering 1900-2100. A lookup is one
+array index plus a short recurrence, and the speed comes from the derivative
+of the same polynomial, so no Swiss Ephemeris call is needed at request time
+(except in the few segments left out, see below).
+
+The table lives in a directory (meta.json plus one .npy file per body) that
+is opened with mmap, so all worker processes share the same pages.
+
+Accuracy: the build compares every segment against Swiss Ephemeris at
+evenly spaced points, ends included. The bundled Moshier series is smooth
+except for occasional steps of up to 7" in Jupiter and Saturn (smaller ones
+in Mercury, Venus and Mars), and no polynomial can follow a step: a
+segment containing one misses by about half the step at every layout
+tried (3-5" for Jupiter at (8, 10), (8, 12) or (4, 12)). Segments whose
+error exceeds SEGMENT_LONGITUDE_ERROR or SEGMENT_SPEED_ERROR are therefore
+left out of the table, and lookups in them fall back to Swiss Ephemeris.
+
+Measured over 1900-2100 with the layout below, the kept segments are within
+0.001" (Sun, Moon, Rahu) and 0.5" (planets) of Swiss Ephemeris, against
+the MAX_LONGITUDE_ERROR bound of 5" (the D60 division is 0.5 degrees);
+speeds are within 2e-3 degrees/day. About 0.1% of Jupiter's and Mercury's
+segments and fewer of the others' are left out. The measured maxima and
+the number of segments left out are recorded per body in meta.json.
+
+Build:  python ephemeris.py build ephemeris_data
+Use:    EPHEMERIS_TABLE_PATH=ephemeris_data uvicorn main:app
+"""
+
+import os
+import sys
+import json
+import math
+import numpy as np
+import swisseph as swe
+from typing import Dict, Any, Optional, Tuple
+
+# Table coverage (UT Julian Days)
+EPHEMERIS_START_JD = swe.julday(1900, 1, 1, 0.0)
+EPHEMERIS_END_JD = swe.julday(2101, 1, 1, 0.0)
+
+# Segment length in days and Chebyshev degree per body
+TABLE_LAYOUT = {
+    'Sun': (16, 10),
+    'Moon': (4, 12),
+    'Mars': (4, 10),
+    'Mercury': (4, 12),
+    'Jupiter': (4, 10),
+    'Venus': (8, 10),
+    'Saturn': (4, 10),
+    'Rahu': (32, 8),
+}
+
+# Documented error bounds against Swiss Ephemeris
+MAX_LONGITUDE_ERROR = 5 / 3600  # degrees (5 arcseconds)
+MAX_SPEED_ERROR = 1e-2  # degrees/day
+
+# A segment measured beyond these is left to Swiss Ephemeris (a step in the source)
+SEGMENT_LONGITUDE_ERROR = 0.5 / 3600  # degrees
+SEGMENT_SPEED_ERROR = 2e-3  # degrees/day
+# More segments than this left out means the layout does not fit the body
+MAX_FALLBACK_FRACTION = 0.01
+
+TABLE_PATH_ENV = 'EPHEMERIS_TABLE_PATH'
+
+
+class EphemerisTable:
+    """Read-only view over a precomputed table directory."""
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+
+        self.ayanamsa_type = self.meta['ayanamsa_type']
+        self.start_jd = self.meta['start_jd']
+        self.bodies = {}
+        for name, info in self.meta['bodies'].items():
+            coeffs = np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+            self.bodies[name] = (coeffs, float(info['segment_days']), len(coeffs))
+
+    def position(self, jd: float, name: str) -> Optional[Tuple[float, float]]:
+        """Sidereal (longitude, speed) of a body, or None where the table does not cover it."""
+        body = self.bodies.get(name)
+        if body is None:
+            return None
+
+        coeffs, segment_days, n_segments = body
+        offset = jd - self.start_jd
+        segment = int(offset // segment_days)
+        if segment < 0 or segment >= n_segments:
+            return None
+
+        # Map the segment onto [-1, 1] and run the Chebyshev recurrence for
+        # the value and its derivative together
+        x = 2 * (offset - segment * segment_days) / segment_days - 1
+        c = coeffs[segment].tolist()
+        if math.isnan(c[0]):
+            return None
+        t0, t1 = 1.0, x
+        d0, d1 = 0.0, 1.0
+        value = c[0] + c[1] * x
+        derivative = c[1]
+        for k in range(2, len(c)):
+            t0, t1 = t1, 2 * x * t1 - t0
+            d0, d1 = d1, 2 * t0 + 2 * x * d1 - d0
+            value += c[k] * t1
+            derivative += c[k] * d1
+
+        return value % 360, derivative * 2 / segment_days
+
+    def positions(self, jds: np.ndarray, name: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Vectorized position() for an array of Julian Days; None if any falls
+        outside the table's range, NaN for those in a segment it leaves out.
+        """
+        body = self.bodies.get(name)
+        if body is None:
+            return None
+
+        coeffs, segment_days, n_segments = body
+        offset = np.asarray(jds, dtype=np.float64) - self.start_jd
+        segment = np.floor(offset / segment_days).astype(np.int64)
+        if segment.size and (segment.min() < 0 or segment.max() >= n_segments):
+            return None
+
+        x = 2 * (offset - segment * segment_days) / segment_days - 1
+        c = coeffs[segment]
+        t0, t1 = np.ones_like(x), x
+        d0, d1 = np.zeros_like(x), np.ones_like(x)
+        value = c[:, 0] + c[:, 1] * x
+        derivative = c[:, 1].copy()
+        for k in range(2, c.shape[1]):
+            t0, t1 = t1, 2 * x * t1 - t0
+            d0, d1 = d1, 2 * t0 + 2 * x * d1 - d0
+            value += c[:, k] * t1
+            derivative += c[:, k] * d1
+
+        return value % 360, derivative * 2 / segment_days
+
+
+_UNLOADED = object()
+_table = _UNLOADED
+
+
+def get_table() -> Optional[EphemerisTable]:
+    """The table named by EPHEMERIS_TABLE_PATH, opened once per process."""
+    global _table
+    if _table is _UNLOADED:
+        path = os.getenv(TABLE_PATH_ENV)
+        _table = EphemerisTable(path) if path else None
+    return _table
+
+
+def lookup(jd: float, name: str) -> Optional[Tuple[float, float]]:
+    """Table (longitude, speed) for a body, or None when no table covers it."""
+    table = get_table()
+    if table is None:
+        return None
+    return table.position(jd, name)
+
+
+def lookup_many(jds: np.ndarray, name: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """Vectorized lookup(); None unless the table's range covers every Julian Day (see positions)."""
+    table = get_table()
+    if table is None:
+        return None
+    return table.positions(jds, name)
+
+
+# =============================================================================
+# TABLE BUILD
+# =============================================================================
+
+def _swe_longitudes(jds: np.ndarray, planet_id: int) -> Tuple[np.ndarray, np.ndarray]:
+    lons = np.empty(jds.shape)
+    speeds = np.empty(jds.shape)
+    for idx, jd in np.ndenumerate(jds):
+        result = swe.calc_ut(float(jd), planet_id, swe.FLG_SIDEREAL | swe.FLG_SPEED)
+        lons[idx] = result[0][0]
+        speeds[idx] = result[0][3]
+    return lons, speeds
+
+
+def fit_body(planet_id: int, start_jd: float, end_jd: float,
+             segment_days: float, degree: int) -> Tuple[np.ndarray, Dict[str, float]]:
+    """
+    Fit one body's sidereal longitude over [start_jd, end_jd).
+
+    Returns the (n_segments, degree + 1) coefficient array, with NaN rows
+    for the segments left to Swiss Ephemeris, and the measured maximum
+    longitude and speed errors of the segments kept.
+    """
+    n_segments = int(np.ceil((end_jd - start_jd) / segment_days))
+    starts = start_jd + segment_days * np.arange(n_segments)
+
+    # Least-squares fit on twice as many Chebyshev nodes as coefficients,
+    # solved for every segment at once through the pseudo-inverse
+    n_nodes = 2 * (degree + 1)
+    nodes = np.cos(np.pi * (np.arange(n_nodes) + 0.5) / n_nodes)[::-1]
+    basis = np.polynomial.chebyshev.chebvander(nodes, degree)
+    solve = np.linalg.pinv(basis)
+
+    lons, _ = _swe_longitudes(starts[:, None] + (nodes + 1) * segment_days / 2, planet_id)
+    unwrapped = np.degrees(np.unwrap(np.radians(lons), axis=1))
+    coeffs = unwrapped @ solve.T
+
+    # Check against Swiss Ephemeris at evenly spaced points, segment ends included
+    checks = np.linspace(-1, 1, 2 * n_nodes + 1)
+    check_lons, check_speeds = _swe_longitudes(starts[:, None] + (checks + 1) * segment_days / 2, planet_id)
+    fitted = coeffs @ np.polynomial.chebyshev.chebvander(checks, degree).T
+    derivative = np.polynomial.chebyshev.chebder(coeffs.T).T
+    fitted_speed = derivative @ np.polynomial.chebyshev.chebvander(checks, degree - 1).T * 2 / segment_days
+
+    lon_error = np.abs((fitted - check_lons + 180) % 360 - 180).max(axis=1)
+    speed_error = np.abs(fitted_speed - check_speeds).max(axis=1)
+    kept = (lon_error <= SEGMENT_LONGITUDE_ERROR) & (speed_error <= SEGMENT_SPEED_ERROR)
+    coeffs[~kept] = np.nan
+    return coeffs, {
+        'max_longitude_error': float(lon_error[kept].max(initial=0.0)),
+        'max_speed_error': float(speed_error[kept].max(initial=0.0)),
+        'fallback_segments': int((~kept).sum()),
+    }
+
+
+def build_table(path: str, start_jd: float = EPHEMERIS_START_JD,
+                end_jd: float = EPHEMERIS_END_JD) -> Dict[str, Any]:
+    """
+    Compute and write a table directory. Raises ValueError if a fit misses
+    the error bound or leaves more than MAX_FALLBACK_FRACTION of a body's
+    segments to Swiss Ephemeris.
+    """
+    from calculator import PLANETS
+
+    swe.set_sid_mode(swe.SIDM_LAHIRI)
+    os.makedirs(path, exist_ok=True)
+
+    meta = {
+        'ayanamsa_type': 'Lahiri',
+        'start_jd': start_jd,
+        'end_jd': end_jd,
+        'max_longitude_error_bound': MAX_LONGITUDE_ERROR,
+        'max_speed_error_bound': MAX_SPEED_ERROR,
+        'bodies': {},
+    }
+    for name, (segment_days, degree) in TABLE_LAYOUT.items():
+        coeffs, errors = fit_body(PLANETS[name], start_jd, end_jd, segment_days, degree)
+        if (errors['max_longitude_error'] > MAX_LONGITUDE_ERROR or errors['max_speed_error'] > MAX_SPEED_ERROR
+                or errors['fallback_segments'] > math.ceil(MAX_FALLBACK_FRACTION * len(coeffs))):
+            raise ValueError(f"{name} fit exceeds the error bound: {errors}")
+        np.save(os.path.join(path, f"{name}.npy"), coeffs)
+        meta['bodies'][name] = {'segment_days': segment_days, 'degree': degree, **errors}
+
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != 'build':
+        sys.exit("usage: python ephemeris.py build <output_dir>")
+    result = build_table(sys.argv[2])
+    for body, info in result['bodies'].items():
+        print(f"{body:8s} max error {info['max_longitude_error'] * 3600:.4f}\" "
+              f"speed {info['max_speed_error']:.2e} deg/day, {info['fallback_segments']} segments left out")
@@ -0,0 +1,267 @@
+"""
+Transit event search: when does a sign, nakshatra, pada, tithi, yoga or
+karana begin or end?
+
+Every element is a segment of a longitude function: a body's longitude for
+sign/nakshatra/pada, Moon - Sun for tithi and karana, Sun + Moon for yoga.
+A crossing is found in two steps:
+
+1. Bracket. Each body has known bounds on its daily motion. For functions
+   that never change direction (anything built from the Sun, Moon and mean
+   nodes) the bounds alone give a time bracket around the next boundary,
+   with no evaluation at all. For the other planets the search walks
+   forward in steps no longer than the time the fastest possible motion
+   would need to reach the nearest boundary, so no crossing is skipped
+   except across a station.
+2. Refine. Newton's method on the angular distance to the boundary, using
+   the body speeds that come with every position, kept inside the bracket
+   by bisection. A tithi end typically takes 2-3 evaluations of Moon - Sun.
+
+Times are UT Julian Days; jd_to_datetime converts them for responses.
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Any, Iterator, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pytz
+
+from calculator import DEFAULT_AYANAMSA, get_body_position
+
+# Bounds on sidereal daily motion (degrees/day), measured over 1900-2100 with margin
+SPEED_BOUNDS = {
+    'Sun': (0.95, 1.022),
+    'Moon': (11.7, 15.45),
+    'Mars': (-0.41, 0.80),
+    'Mercury': (-1.40, 2.21),
+    'Jupiter': (-0.14, 0.25),
+    'Venus': (-0.64, 1.27),
+    'Saturn': (-0.09, 0.14),
+    'Rahu': (-0.0531, -0.0529),
+    'Ketu': (-0.0531, -0.0529),
+}
+
+# Element kinds: (terms as (body, coefficient), segment width in degrees)
+PANCHANG_QUANTITIES = {
+    'tithi': ((('Moon', 1), ('Sun', -1)), 12.0),
+    'karana': ((('Moon', 1), ('Sun', -1)), 6.0),
+    'yoga': ((('Sun', 1), ('Moon', 1)), 360 / 27),
+}
+BODY_WIDTHS = {
+    'sign': 30.0,
+    'nakshatra': 360 / 27,
+    'pada': 360 / 108,
+}
+
+TOLERANCE_DAYS = 1 / 86400  # one second
+STEP_DEGREES = 5.0  # most a body may move between samples in body_crossings
+MAX_SEARCH_DAYS = 4000  # longer than any sign stay outside Rahu/Ketu (~18 months) and Saturn (~2.5 years)
+
+J2000 = 2451545.0
+J2000_UTC = datetime(2000, 1, 1, 12, 0, tzinfo=pytz.UTC)
+
+
+class Quantity(NamedTuple):
+    """A longitude function: sum of coefficient * body longitude, split into equal segments."""
+    terms: Tuple[Tuple[str, int], ...]
+    width: float
+
+    @property
+    def count(self) -> int:
+        return int(round(360 / self.width))
+
+    def rate_bounds(self) -> Tuple[float, float]:
+        low = high = 0.0
+        for body, coeff in self.terms:
+            lo, hi = SPEED_BOUNDS[body]
+            low += min(coeff * lo, coeff * hi)
+            high += max(coeff * lo, coeff * hi)
+        return low, high
+
+
+class Crossing(NamedTuple):
+    """A boundary crossing: when, and the segment indices either side (0-based)."""
+    jd: float
+    before: int
+    after: int
+
+
+def quantity(kind: str, body: Optional[str] = None) -> Quantity:
+    """The Quantity for 'tithi', 'karana', 'yoga', or 'sign'/'nakshatra'/'pada' of a body."""
+    if kind in PANCHANG_QUANTITIES:
+        return Quantity(*PANCHANG_QUANTITIES[kind])
+    if kind in BODY_WIDTHS and body in SPEED_BOUNDS:
+        return Quantity(((body, 1),), BODY_WIDTHS[kind])
+    raise ValueError(f"Unknown event kind: {kind} {body or ''}".strip())
+
+
+def _evaluate(q: Quantity, jd: float, ayanamsa_type: str) -> Tuple[float, float]:
+    """(value in [0, 360), rate in degrees/day) of a quantity."""
+    value = rate = 0.0
+    for body, coeff in q.terms:
+        lon, speed = get_body_position(jd, body, ayanamsa_type)
+        value += coeff * lon
+        rate += coeff * speed
+    return value % 360, rate
+
+
+def _refine(q: Quantity, boundary: float, lo: float, hi: float, guess: float,
+            below_at_lo: bool, ayanamsa_type: str) -> float:
+    """
+    Root of the signed distance to boundary inside [lo, hi] (which must
+    bracket it; below_at_lo tells which side lo is on), starting from guess:
+    Newton steps, bisection as fallback.
+    """
+    t = min(max(guess, lo), hi)
+    for _ in range(60):
+        value, rate = _evaluate(q, t, ayanamsa_type)
+        d = (value - boundary + 180) % 360 - 180
+        if (d < 0) == below_at_lo:
+            lo = t
+        else:
+            hi = t
+        if rate and abs(d / rate) < TOLERANCE_DAYS:
+            return t - d / rate
+        if hi - lo < TOLERANCE_DAYS:
+            break
+        step = t - d / rate if rate else None
+        t = step if step is not None and lo < step < hi else (lo + hi) / 2
+    return (lo + hi) / 2
+
+
+def find_crossing(q: Quantity, jd: float, direction: int = 1,
+                  ayanamsa_type: str = DEFAULT_AYANAMSA,
+                  max_days: float = MAX_SEARCH_DAYS) -> Optional[Crossing]:
+    """
+    The first segment boundary crossed after jd (direction=1) or before it
+    (direction=-1), or None if there is none within max_days.
+    """
+    width = q.width
+    value, rate = _evaluate(q, jd, ayanamsa_type)
+    segment = int(value // width) % q.count
+    lower, upper = segment * width, (segment + 1) * width
+    low_rate, high_rate = q.rate_bounds()
+
+    if low_rate > 0 or high_rate < 0:
+        # Monotone: the boundary ahead is known, and the rate bounds bracket its time
+        moving_up = (high_rate > 0) == (direction > 0)
+        boundary = upper if moving_up else lower
+        distance = (upper - value) if moving_up else (value - lower)
+        slow, fast = sorted((abs(low_rate), abs(high_rate)))
+        near, far = jd + direction * distance / fast, jd + direction * distance / slow
+        if abs(far - jd) > max_days:
+            return None
+        guess = jd + direction * distance / abs(rate)
+        lo, hi = sorted((near, far))
+        root = _refine(q, boundary % 360, lo, hi, guess, high_rate > 0, ayanamsa_type)
+        after = (segment + (1 if moving_up else -1)) % q.count
+        return Crossing(root, segment, after) if direction > 0 else Crossing(root, after, segment)
+
+    # May reverse: walk in steps that cannot skip past the nearest boundary
+    max_speed = max(abs(low_rate), abs(high_rate))
+    min_step = width / 8 / max_speed
+    t, t_value = jd, value
+    while abs(t - jd) < max_days:
+        nearest = min(t_value - lower, upper - t_value)
+        step = max(nearest / max_speed, min_step)
+        t_next = t + direction * step
+        next_value, next_rate = _evaluate(q, t_next, ayanamsa_type)
+        next_segment = int(next_value // width) % q.count
+        if next_segment != segment:
+            moved_up = (next_value - t_value + 180) % 360 - 180 > 0
+            boundary = upper if moved_up else lower
+            lo, hi = sorted((t, t_next))
+            guess = t_next - ((next_value - boundary + 180) % 360 - 180) / next_rate if next_rate else t_next
+            # Going forward the earlier point is on the old side of the boundary
+            below_at_lo = moved_up if direction > 0 else not moved_up
+            root = _refine(q, boundary % 360, lo, hi, guess, below_at_lo, ayanamsa_type)
+            return Crossing(root, segment, next_segment) if direction > 0 else Crossing(root, next_segment, segment)
+        t, t_value = t_next, next_value
+    return None
+
+
+def _find_station(body: str, lo: float, hi: float, ayanamsa_type: str) -> float:
+    """Time in [lo, hi] where a body's speed changes sign (the two ends must differ)."""
+    lo_forward = get_body_position(lo, body, ayanamsa_type)[1] >= 0
+    while hi - lo > TOLERANCE_DAYS * 60:
+        mid = (lo + hi) / 2
+        if (get_body_position(mid, body, ayanamsa_type)[1] >= 0) == lo_forward:
+            lo = mid
+        else:
+            hi = mid
+    return (lo + hi) / 2
+
+
+def body_crossings(body: str, targets: Sequence[float], start_jd: float, end_jd: float,
+                   ayanamsa_type: str = DEFAULT_AYANAMSA) -> Iterator[Tuple[float, int, int]]:
+    """
+    Every time in (start_jd, end_jd] a body's longitude passes one of the
+    target longitudes, in time order, as (jd, target index, direction +1/-1).
+
+    The window is sampled in steps the body cannot move more than
+    STEP_DEGREES in, and split at stations, so each piece is monotone and
+    passes each target at most once. The targets inside a piece's arc are
+    then solved exactly with _refine; a retrograde loop over a target gives
+    all three passes.
+    """
+    q = Quantity(((body, 1),), 360.0)
+    targets = np.asarray(targets, dtype=np.float64) % 360
+    step = STEP_DEGREES / max(abs(r) for r in SPEED_BOUNDS[body])
+    n_steps = max(int(np.ceil((end_jd - start_jd) / step)), 1)
+
+    a = start_jd
+    a_lon, a_speed = get_body_position(a, body, ayanamsa_type)
+    for k in range(1, n_steps + 1):
+        b = end_jd if k == n_steps else start_jd + k * step
+        b_lon, b_speed = get_body_position(b, body, ayanamsa_type)
+
+        pieces = [(a, a_lon, b, b_lon)]
+        if (a_speed >= 0) != (b_speed >= 0):
+            s = _find_station(body, a, b, ayanamsa_type)
+            s_lon, _ = get_body_position(s, body, ayanamsa_type)
+            pieces = [(a, a_lon, s, s_lon), (s, s_lon, b, b_lon)]
+
+        for lo, lo_lon, hi, hi_lon in pieces:
+            delta = (hi_lon - lo_lon + 180) % 360 - 180
+            if delta == 0:
+                continue
+            direction = 1 if delta > 0 else -1
+            # Distance along the direction of motion to each target; crossed if within (0, |delta|]
+            distance = ((targets - lo_lon) * direction) % 360
+            crossed = np.flatnonzero((distance > 0) & (distance <= abs(delta)))
+            for i in crossed[np.argsort(distance[crossed], kind='stable')]:
+                guess = lo + (hi - lo) * distance[i] / abs(delta)
+                jd = _refine(q, float(targets[i]), lo, hi, guess, direction > 0, ayanamsa_type)
+                yield jd, int(i), direction
+
+        a, a_lon, a_speed = b, b_lon, b_speed
+
+
+def next_boundary(jd: float, kind: str, body: Optional[str] = None,
+                  ayanamsa_type: str = DEFAULT_AYANAMSA) -> Optional[Crossing]:
+    """When the current tithi/karana/yoga, or a body's sign/nakshatra/pada, ends."""
+    return find_crossing(quantity(kind, body), jd, 1, ayanamsa_type)
+
+
+def previous_boundary(jd: float, kind: str, body: Optional[str] = None,
+                      ayanamsa_type: str = DEFAULT_AYANAMSA) -> Optional[Crossing]:
+    """When the current tithi/karana/yoga, or a body's sign/nakshatra/pada, began."""
+    return find_crossing(quantity(kind, body), jd, -1, ayanamsa_type)
+
+
+def jd_to_datetime(jd: float, tz=None) -> datetime:
+    """UT Julian Day to an aware datetime (UTC, or tz), rounded to the second."""
+    moment = J2000_UTC + timedelta(seconds=round((jd - J2000) * 86400))
+    return moment.astimezone(tz) if tz is not None else moment
+
+
+def element_span(jd: float, kind: str, body: Optional[str] = None,
+                 ayanamsa_type: str = DEFAULT_AYANAMSA, tz=None) -> Dict[str, Any]:
+    """{'start', 'end'} ISO times of the element running at jd (None if not found)."""
+    q = quantity(kind, body)
+    start = find_crossing(q, jd, -1, ayanamsa_type)
+    end = find_crossing(q, jd, 1, ayanamsa_type)
+    return {
+        'start': jd_to_datetime(start.jd, tz).isoformat() if start else None,
+        'end': jd_to_datetime(end.jd, tz).isoformat() if end else None,
+    }
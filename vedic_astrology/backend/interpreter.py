@@ -1,20 +1,216 @@
 """
 DeepSeek Reasoner integration for Vedic chart interpretation.
 Uses the deepseek-reasoner model to analyze birth charts with chain-of-thought reasoning.
+
+Calls go through the async client, so a reading that takes tens of seconds
+holds no thread, and through llm_gate, which bounds the calls in flight:
+
+    LLM_MAX_CONCURRENCY  calls to the API at once (default 8)
+    LLM_MAX_QUEUE        calls allowed to wait for a slot (default 64);
+                         beyond that a call fails fast with LLMBusy
+
+Chat histories are kept within a token budget by history_compactor (see
+chat_history), which folds older turns into a running summary.
 """
 
 import os
+import re
 import json
-from openai import OpenAI
+import time
+import hashlib
+import asyncio
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, Dict, Optional
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
 
+from chat_history import compactor_from_env
+
 load_dotenv()
 
-client = OpenAI(
+client = AsyncOpenAI(
     api_key=os.getenv("DEEPSEEK_API_KEY"),
     base_url="https://api.deepseek.com"
 )
 
+MODEL = "deepseek-reasoner"
+SUMMARY_MODEL = "deepseek-chat"  # history summaries need no reasoning
+SUMMARY_MAX_TOKENS = 800
+PROMPT_VERSION = 1  # bump whenever a prompt changes, so cached readings are not reused
+CONCURRENCY_ENV = 'LLM_MAX_CONCURRENCY'
+QUEUE_ENV = 'LLM_MAX_QUEUE'
+DEFAULT_CONCURRENCY = 8
+DEFAULT_QUEUE = 64
+
+
+class LLMBusy(RuntimeError):
+    """Every LLM slot is taken and the wait queue is full."""
+
+
+class LLMGate:
+    """At most `limit` LLM calls in flight; up to `max_queue` more wait their turn."""
+
+    def __init__(self, limit: int, max_queue: int):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.waiting = 0
+        self._loop = None
+        self._semaphore = None
+        self._stats = {'calls': 0, 'completed': 0, 'failed': 0, 'rejected': 0,
+                       'max_waiting': 0, 'wait_seconds': 0.0}
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._semaphore = loop, asyncio.Semaphore(self.limit)
+        return self._semaphore
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one in-flight slot; raises LLMBusy instead of queueing past max_queue."""
+        semaphore = self._get_semaphore()
+        if semaphore.locked() and self.waiting >= self.max_queue:
+            self._stats['rejected'] += 1
+            raise LLMBusy(f"LLM is busy ({self.limit} calls in flight, {self.waiting} waiting)")
+
+        self.waiting += 1
+        self._stats['max_waiting'] = max(self._stats['max_waiting'], self.waiting)
+        started = time.monotonic()
+        try:
+            await semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self._stats['wait_seconds'] += time.monotonic() - started
+
+        self.in_flight += 1
+        self._stats['calls'] += 1
+        try:
+            yield
+            self._stats['completed'] += 1
+        except BaseException:
+            self._stats['failed'] += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'limit': self.limit,
+            'max_queue': self.max_queue,
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+            **self._stats,
+            'wait_seconds': round(self._stats['wait_seconds'], 3),
+        }
+
+
+llm_gate = LLMGate(int(os.getenv(CONCURRENCY_ENV, DEFAULT_CONCURRENCY)), int(os.getenv(QUEUE_ENV, DEFAULT_QUEUE)))
+
+
+async def create_completion(messages: list, max_tokens: int, model: str = MODEL):
+    """One chat completion through llm_gate; returns the whole response."""
+    async with llm_gate.slot():
+        return await client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens
+        )
+
+
+async def complete(messages: list, max_tokens: int):
+    """One chat completion through llm_gate; returns the response message."""
+    return (await create_completion(messages, max_tokens)).choices[0].message
+
+
+def usage_summary(usage) -> Optional[Dict[str, Any]]:
+    """
+    Token usage of a response: prompt tokens split into those served from
+    the provider's prefix cache and the rest. DeepSeek reports these as
+    prompt_cache_hit_tokens; OpenAI-style APIs as prompt_tokens_details.
+    """
+    if usage is None:
+        return None
+    prompt = getattr(usage, 'prompt_tokens', 0) or 0
+    cached = getattr(usage, 'prompt_cache_hit_tokens', None)
+    if cached is None:
+        cached = getattr(getattr(usage, 'prompt_tokens_details', None), 'cached_tokens', None) or 0
+    return {
+        "prompt_tokens": prompt,
+        "cached_tokens": cached,
+        "uncached_tokens": prompt - cached,
+        "completion_tokens": getattr(usage, 'completion_tokens', 0) or 0
+    }
+
+
+class CompletionStream:
+    """
+    A streamed completion: iterate it for ("reasoning" | "content", text)
+    deltas as they arrive. It holds an llm_gate slot until the stream ends
+    or aclose() is called; result() then gives the final response dict,
+    and usage the usage_summary of the call once the stream has ended.
+    """
+
+    def __init__(self, exit_stack: AsyncExitStack, stream, finish):
+        self._exit_stack = exit_stack
+        self._stream = stream
+        self._finish = finish
+        self._reasoning = []
+        self._content = []
+        self.usage = None
+
+    async def __aiter__(self):
+        try:
+            async for chunk in self._stream:
+                if getattr(chunk, 'usage', None) is not None:
+                    self.usage = usage_summary(chunk.usage)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                reasoning = getattr(delta, 'reasoning_content', None)
+                if reasoning:
+                    self._reasoning.append(reasoning)
+                    yield "reasoning", reasoning
+                if delta.content:
+                    self._content.append(delta.content)
+                    yield "content", delta.content
+        except BaseException as e:
+            await self._exit_stack.__aexit__(type(e), e, e.__traceback__)
+            raise
+        await self.aclose()
+
+    async def aclose(self):
+        await self._exit_stack.aclose()
+
+    def result(self) -> dict:
+        return self._finish("".join(self._content), "".join(self._reasoning) or None)
+
+
+async def open_stream(messages: list, max_tokens: int, finish) -> CompletionStream:
+    """
+    Start a streamed completion through llm_gate. Raises LLMBusy (or the API
+    error) before anything is streamed, so callers can still answer with an
+    error status. finish(content, reasoning) builds CompletionStream.result().
+    """
+    exit_stack = AsyncExitStack()
+    await exit_stack.enter_async_context(llm_gate.slot())
+    try:
+        stream = await client.chat.completions.create(
+            model=MODEL,
+            messages=messages,
+            max_tokens=max_tokens,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+    except BaseException as e:
+        await exit_stack.__aexit__(type(e), e, e.__traceback__)
+        raise
+    if hasattr(stream, 'close'):
+        exit_stack.push_async_callback(stream.close)  # closes the HTTP response before the slot is freed
+    return CompletionStream(exit_stack, stream, finish)
+
+
 INTERPRETATION_SYSTEM_PROMPT = """You are a revered Vedic astrologer (Jyotishi) with 40+ years of experience in the ancient science of Jyotish Shastra. You have studied under traditional gurus in Varanasi and Kashi, mastering not only chart interpretation but also the remedial measures including mantra, yantra, gemstones, dietary guidelines (Ayurvedic principles), and sadhana practices.
 
 You approach each chart with compassion, wisdom, and the understanding that the chart reveals karmic patterns that can be worked with consciously. You believe in empowering the aspirant (jataka) with practical guidance for spiritual growth.
@@ -172,37 +368,206 @@ def format_chart_for_interpretation(chart: dict, dasha: dict = None) -> str:
     return "\n".join(lines)
 
 
-def interpret_chart(chart: dict, dasha: dict = None) -> dict:
+# =============================================================================
+# COMPACT ENCODING
+# The chart as short tabular rows, for prompts that are sent repeatedly.
+# =============================================================================
+
+SIGN_ABBREVIATIONS = {
+    'Aries': 'Ar', 'Taurus': 'Ta', 'Gemini': 'Ge', 'Cancer': 'Cn', 'Leo': 'Le', 'Virgo': 'Vi',
+    'Libra': 'Li', 'Scorpio': 'Sc', 'Sagittarius': 'Sg', 'Capricorn': 'Cp', 'Aquarius': 'Aq', 'Pisces': 'Pi'
+}
+PLANET_ABBREVIATIONS = {
+    'Sun': 'Su', 'Moon': 'Mo', 'Mars': 'Ma', 'Mercury': 'Me', 'Jupiter': 'Ju',
+    'Venus': 'Ve', 'Saturn': 'Sa', 'Rahu': 'Ra', 'Ketu': 'Ke'
+}
+DIGNITY_ABBREVIATIONS = {
+    'Exalted': 'Ex', 'Mooltrikona': 'MT', 'Own Sign': 'Own', 'Debilitated': 'Deb',
+    "Friend's Sign": 'Fr', "Enemy's Sign": 'En', 'Neutral': ''
+}
+COMPACT_LEGEND = (
+    "Signs: Ar Ta Ge Cn Le Vi Li Sc Sg Cp Aq Pi. Planets: Su Mo Ma Me Ju Ve Sa Ra Ke. "
+    "H=house (whole sign), R=retrograde, Ex=exalted, MT=mooltrikona, Own=own sign, "
+    "Deb=debilitated, Fr/En=friend's/enemy's sign."
+)
+VARGA_ORDER = ['D1', 'D2', 'D3', 'D4', 'D7', 'D9', 'D10', 'D12', 'D16', 'D20', 'D24', 'D27', 'D30', 'D40', 'D45', 'D60']
+
+
+def _sign(sign: str) -> str:
+    return SIGN_ABBREVIATIONS.get(sign, sign)
+
+
+def _planet(planet: str) -> str:
+    return PLANET_ABBREVIATIONS.get(planet, planet)
+
+
+def _nakshatra(nak: dict) -> str:
+    text = nak['name'].replace(' ', '')
+    if nak.get('pada'):
+        text += f"-{nak['pada']}"
+    if nak.get('lord'):
+        text += f"({_planet(nak['lord'])})"
+    return text
+
+
+def format_chart_compact(chart: dict, dasha: dict = None) -> str:
+    """
+    The same chart data as format_chart_for_interpretation in a third of the
+    tokens or less: one row per planet and one row of signs per varga. House
+    occupancy is left to the H column, D1 is not repeated as a varga, and
+    varga houses follow from each varga's ascendant.
     """
-    Use DeepSeek Reasoner to interpret the birth chart.
+    lines = ["## Birth Chart Data (compact)", COMPACT_LEGEND]
 
-    Returns:
-        dict with 'reasoning' (chain of thought) and 'interpretation' (final analysis)
+    if 'ascendant' in chart:
+        asc = chart['ascendant']
+        line = f"Asc {_sign(asc.get('sign', '?'))} {asc.get('degree', 0):.2f}"
+        if asc.get('nakshatra'):
+            line += f" {_nakshatra(asc['nakshatra'])}"
+        lines.append(line)
+
+    if 'planets' in chart:
+        lines.append("Planet Sign Deg H Nakshatra-pada(lord) Notes")
+        for planet_name, planet_data in chart['planets'].items():
+            dignity = planet_data.get('dignity')
+            if isinstance(dignity, dict):
+                dignity = dignity.get('dignity')
+            notes = ["R" if planet_data.get('retrograde') else "",
+                     DIGNITY_ABBREVIATIONS.get(dignity, dignity or '')]
+            row = [_planet(planet_name), _sign(planet_data.get('sign', '?')),
+                   f"{planet_data.get('degree', 0):.2f}", str(planet_data.get('house', 0))]
+            if planet_data.get('nakshatra'):
+                row.append(_nakshatra(planet_data['nakshatra']))
+            lines.append(" ".join(row + [note for note in notes if note]))
+
+    if dasha:
+        parts = []
+        if dasha.get('moon_nakshatra'):
+            parts.append(f"birth nakshatra {_nakshatra(dasha['moon_nakshatra'])}")
+        if dasha.get('current_maha_dasha'):
+            md = dasha['current_maha_dasha']
+            parts.append(f"MD {_planet(md.get('planet', '?'))} {md.get('start', '')[:10]}..{md.get('end', '')[:10]}")
+        if dasha.get('current_antar_dasha'):
+            ad = dasha['current_antar_dasha']
+            parts.append(f"AD {_planet(ad.get('planet', '?'))} ..{ad.get('end', '')[:10]}")
+        lines.append("Dasha: " + "; ".join(parts))
+
+    if 'vargas' in chart:
+        planets = [planet for planet in PLANET_ABBREVIATIONS if planet in chart.get('planets', PLANET_ABBREVIATIONS)]
+        lines.append("Vargas (sign of Asc and each planet; D1 is the table above):")
+        lines.append(" ".join(["Varga", "Asc"] + [_planet(planet) for planet in planets]))
+        for varga_key in VARGA_ORDER[1:]:
+            varga = chart['vargas'].get(varga_key)
+            if varga:
+                row = [f"{varga_key}/{varga['name']}", _sign(varga.get('ascendant', {}).get('sign', '-'))]
+                row += [_sign(varga['planets'][planet]['sign']) if planet in varga['planets'] else '-'
+                        for planet in planets]
+                lines.append(" ".join(row))
+
+        if 'D1' in chart['vargas'] and 'D9' in chart['vargas']:
+            d1 = chart['vargas']['D1']['planets']
+            d9 = chart['vargas']['D9']['planets']
+            vargottama = [_planet(planet) for planet in d1 if planet in d9 and d1[planet]['sign'] == d9[planet]['sign']]
+            if vargottama:
+                lines.append(f"Vargottama (same sign D1/D9): {' '.join(vargottama)}")
+
+    return "\n".join(lines)
+
+
+def format_chart(chart: dict, dasha: dict = None, compact: bool = False) -> str:
+    """The chart text of a prompt, verbose or compact."""
+    if compact:
+        return format_chart_compact(chart, dasha)
+    return format_chart_for_interpretation(chart, dasha)
+
+
+def count_tokens(text: str) -> int:
+    """
+    Input tokens of a prompt text: exact for the cl100k_base encoding when
+    tiktoken is installed, otherwise an estimate that splits words into
+    pieces of up to four letters and counts digits and symbols one by one
+    (DeepSeek's tokenizer splits numbers into single digits).
     """
+    encoding = _tiktoken_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return sum(-(-len(piece) // 4) if piece[0].isalpha() else 1
+               for piece in re.findall(r"[^\W\d_]+|\S", text))
 
-    chart_text = format_chart_for_interpretation(chart, dasha)
 
-    messages = [
+def tokenizer_name() -> str:
+    return "tiktoken/cl100k_base" if _tiktoken_encoding() is not None else "estimate"
+
+
+_encoding = None
+
+
+def _tiktoken_encoding():
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:  # optional: not installed, or the encoding cannot be downloaded
+            _encoding = False
+    return _encoding or None
+
+
+def prompt_token_report(chart: dict, dasha: dict = None) -> dict:
+    """Tokens of the chart text in both encodings."""
+    verbose = count_tokens(format_chart_for_interpretation(chart, dasha))
+    compact = count_tokens(format_chart_compact(chart, dasha))
+    return {
+        "tokenizer": tokenizer_name(),
+        "verbose_tokens": verbose,
+        "compact_tokens": compact,
+        "saved_percent": round(100 * (verbose - compact) / verbose, 1) if verbose else 0.0
+    }
+
+
+def interpretation_key(chart: dict, dasha: dict = None, structured: bool = True, compact: bool = False) -> str:
+    """
+    Cache key of a chart reading: hex SHA-256 of the chart text the prompt is
+    built from (format_chart), the prompt variant and version, and the
+    model. Charts that read the same share a reading.
+    """
+    chart_text = format_chart(chart, dasha, compact)
+    variant = "structured" if structured else "free"
+    return hashlib.sha256(f"{PROMPT_VERSION}\n{MODEL}\n{variant}\n{chart_text}".encode()).hexdigest()
+
+
+def _chart_messages(chart: dict, dasha: dict = None, compact: bool = False) -> list:
+    chart_text = format_chart(chart, dasha, compact)
+
+    return [
         {"role": "system", "content": INTERPRETATION_SYSTEM_PROMPT},
         {"role": "user", "content": f"Please interpret this Vedic birth chart:\n\n{chart_text}"}
     ]
 
-    try:
-        response = client.chat.completions.create(
-            model="deepseek-reasoner",
-            messages=messages,
-            max_tokens=8192
-        )
 
-        message = response.choices[0].message
+async def interpret_chart(chart: dict, dasha: dict = None, compact: bool = False) -> dict:
+    """
+    Use DeepSeek Reasoner to interpret the birth chart ('compact' selects
+    the compact chart encoding).
+
+    Returns:
+        dict with 'reasoning' (chain of thought) and 'interpretation' (final analysis)
+    """
+
+    messages = _chart_messages(chart, dasha, compact)
+
+    try:
+        message = await complete(messages, 8192)
 
         return {
             "success": True,
             "reasoning": getattr(message, 'reasoning_content', None),
             "interpretation": message.content,
-            "model": "deepseek-reasoner"
+            "model": MODEL
         }
 
+    except LLMBusy:
+        raise
     except Exception as e:
         return {
             "success": False,
@@ -212,23 +577,7 @@ def interpret_chart(chart: dict, dasha: dict = None) -> dict:
         }
 
 
-def chat_about_chart(chart: dict, dasha: dict, question: str, conversation_history: list = None) -> dict:
-    """
-    Have a follow-up conversation about the birth chart.
-
-    Args:
-        chart: The calculated birth chart with all vargas
-        dasha: The dasha periods
-        question: The user's follow-up question
-        conversation_history: Previous messages in the conversation
-
-    Returns:
-        dict with 'response' and updated 'conversation_history'
-    """
-
-    chart_text = format_chart_for_interpretation(chart, dasha)
-
-    chat_system_prompt = """You are a revered Vedic astrologer (Jyotishi) with 40+ years of experience. You have already provided an initial reading for this chart and the aspirant has follow-up questions.
+CHAT_SYSTEM_PROMPT = """You are a revered Vedic astrologer (Jyotishi) with 40+ years of experience. You have already provided an initial reading for this chart and the aspirant has follow-up questions.
 
 You have access to the complete birth chart data including all 16 divisional charts (Shodasavargas). Answer questions specifically and insightfully based on the chart data provided.
 
@@ -242,8 +591,16 @@ Key guidelines:
 
 The chart data is provided below for reference."""
 
+
+def chart_chat_system_prompt(chart: dict, dasha: dict, compact: bool = False) -> str:
+    """The system prompt of a conversation about a chart: CHAT_SYSTEM_PROMPT and the chart text."""
+    return f"{CHAT_SYSTEM_PROMPT}\n\n{format_chart(chart, dasha, compact)}"
+
+
+def _chart_chat_messages(chart: dict, dasha: dict, question: str, conversation_history: list = None,
+                         compact: bool = False) -> list:
     messages = [
-        {"role": "system", "content": f"{chat_system_prompt}\n\n{chart_text}"}
+        {"role": "system", "content": chart_chat_system_prompt(chart, dasha, compact)}
     ]
 
     # Add conversation history if provided
@@ -253,15 +610,30 @@ The chart data is provided below for reference."""
 
     # Add the new question
     messages.append({"role": "user", "content": question})
+    return messages
 
-    try:
-        response = client.chat.completions.create(
-            model="deepseek-reasoner",
-            messages=messages,
-            max_tokens=4096
-        )
 
-        assistant_message = response.choices[0].message
+async def chat_about_chart(chart: dict, dasha: dict, question: str, conversation_history: list = None,
+                           compact: bool = False) -> dict:
+    """
+    Have a follow-up conversation about the birth chart.
+
+    Args:
+        chart: The calculated birth chart with all vargas
+        dasha: The dasha periods
+        question: The user's follow-up question
+        conversation_history: Previous messages in the conversation
+        compact: Send the chart in the compact encoding
+
+    Returns:
+        dict with 'response' and updated 'conversation_history'
+    """
+
+    messages = await history_compactor.prepare(
+        _chart_chat_messages(chart, dasha, question, conversation_history, compact))
+
+    try:
+        assistant_message = await complete(messages, 4096)
         response_text = assistant_message.content
 
         # Build updated conversation history
@@ -276,6 +648,8 @@ The chart data is provided below for reference."""
             "conversation_history": new_history
         }
 
+    except LLMBusy:
+        raise
     except Exception as e:
         return {
             "success": False,
@@ -285,25 +659,24 @@ The chart data is provided below for reference."""
         }
 
 
-def simple_chat(message: str, history: list) -> dict:
+def _simple_chat_messages(message: str, history: list) -> list:
+    # Build messages from history + new message
+    messages = history.copy()
+    messages.append({"role": "user", "content": message})
+    return messages
+
+
+async def simple_chat(message: str, history: list) -> dict:
     """
     Simple chat - all context is already in the history.
 
     No chart calculation needed. The system prompt with chart data
     is already the first message in history.
     """
-    # Build messages from history + new message
-    messages = history.copy()
-    messages.append({"role": "user", "content": message})
+    messages = await history_compactor.prepare(_simple_chat_messages(message, history))
 
     try:
-        response = client.chat.completions.create(
-            model="deepseek-reasoner",
-            messages=messages,
-            max_tokens=4096
-        )
-
-        assistant_message = response.choices[0].message
+        assistant_message = await complete(messages, 4096)
         response_text = assistant_message.content
 
         return {
@@ -312,6 +685,8 @@ def simple_chat(message: str, history: list) -> dict:
             "reasoning": getattr(assistant_message, 'reasoning_content', None)
         }
 
+    except LLMBusy:
+        raise
     except Exception as e:
         return {
             "success": False,
@@ -320,14 +695,85 @@ def simple_chat(message: str, history: list) -> dict:
         }
 
 
-def interpret_chart_structured(chart: dict, dasha: dict = None) -> dict:
+async def session_chat(messages: list) -> dict:
     """
-    Get structured interpretation with specific sections.
+    One turn of a server-side chat session (see chat_sessions): the
+    session's messages as stored, with the new user message last, compacted
+    by history_compactor once the history is over its budget. 'usage' tells
+    how much of the prompt the provider's prefix cache served.
+    """
+    try:
+        response = await create_completion(await history_compactor.prepare(messages), 4096)
+        assistant_message = response.choices[0].message
 
-    Returns JSON-structured analysis for easier frontend rendering.
+        return {
+            "success": True,
+            "response": assistant_message.content,
+            "reasoning": getattr(assistant_message, 'reasoning_content', None),
+            "usage": usage_summary(getattr(response, 'usage', None))
+        }
+
+    except LLMBusy:
+        raise
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "response": None
+        }
+
+
+SUMMARY_SYSTEM_PROMPT = """You keep the running summary of a long conversation between an aspirant and their Vedic astrologer, so the astrologer can continue it without the older messages.
+
+Write a concise summary (at most 400 words) that keeps:
+- what the aspirant has shared about themselves, their situation and their goals
+- the questions they asked and the substance of the answers, with any chart factors (planets, houses, dashas, vargas) the answers relied on
+- practices, remedies, mantras or seeds suggested, and anything the aspirant agreed to do
+- open questions or threads to follow up
+
+Write plain prose or short bullet points in the third person. Do not add advice of your own."""
+
+
+async def summarize_history(previous_summary: Optional[str], messages: list) -> str:
     """
+    The running summary of a conversation: previous_summary (or None)
+    extended with messages. Used by history_compactor, off the request path.
+    """
+    transcript = "\n\n".join(f"{message['role'].upper()}: {message['content']}" for message in messages)
+    parts = []
+    if previous_summary:
+        parts.append(f"Summary so far:\n{previous_summary}")
+    parts.append(f"Messages to add:\n{transcript}")
+
+    response = await create_completion([
+        {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+        {"role": "user", "content": "\n\n".join(parts)}
+    ], SUMMARY_MAX_TOKENS, model=SUMMARY_MODEL)
+    return response.choices[0].message.content
+
+
+history_compactor = compactor_from_env(summarize_history, count_tokens)
 
-    chart_text = format_chart_for_interpretation(chart, dasha)
+
+def parse_json_content(content: str):
+    """The JSON object in a model reply (possibly in a markdown code block), or {"raw": content}."""
+    try:
+        # Find JSON in the response (may be wrapped in markdown code blocks)
+        if "```json" in content:
+            json_str = content.split("```json")[1].split("```")[0].strip()
+        elif "```" in content:
+            json_str = content.split("```")[1].split("```")[0].strip()
+        else:
+            json_str = content.strip()
+
+        return json.loads(json_str)
+    except (json.JSONDecodeError, IndexError):
+        # If JSON parsing fails, return as unstructured
+        return {"raw": content}
+
+
+def _structured_messages(chart: dict, dasha: dict = None, compact: bool = False) -> list:
+    chart_text = format_chart(chart, dasha, compact)
 
     structured_prompt = """Analyze this Vedic birth chart and provide a comprehensive structured interpretation as an expert Jyotishi.
 
@@ -374,43 +820,36 @@ Return your analysis as a JSON object with these sections:
 
 Be deeply insightful and specific to THIS chart. Draw on traditional Jyotish wisdom. Include actual mantra texts where appropriate. Remember: you are guiding a sincere aspirant on their journey."""
 
-    messages = [
+    return [
         {"role": "system", "content": INTERPRETATION_SYSTEM_PROMPT},
         {"role": "user", "content": f"{structured_prompt}\n\nChart Data:\n{chart_text}"}
     ]
 
-    try:
-        response = client.chat.completions.create(
-            model="deepseek-reasoner",
-            messages=messages,
-            max_tokens=8192
-        )
 
-        message = response.choices[0].message
-        content = message.content
+async def interpret_chart_structured(chart: dict, dasha: dict = None, compact: bool = False) -> dict:
+    """
+    Get structured interpretation with specific sections.
 
-        # Try to parse JSON from response
-        try:
-            # Find JSON in the response (may be wrapped in markdown code blocks)
-            if "```json" in content:
-                json_str = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                json_str = content.split("```")[1].split("```")[0].strip()
-            else:
-                json_str = content.strip()
+    Returns JSON-structured analysis for easier frontend rendering.
+    """
+
+    messages = _structured_messages(chart, dasha, compact)
+
+    try:
+        message = await complete(messages, 8192)
+        content = message.content
 
-            interpretation = json.loads(json_str)
-        except (json.JSONDecodeError, IndexError):
-            # If JSON parsing fails, return as unstructured
-            interpretation = {"raw": content}
+        interpretation = parse_json_content(content)
 
         return {
             "success": True,
             "reasoning": getattr(message, 'reasoning_content', None),
             "interpretation": interpretation,
-            "model": "deepseek-reasoner"
+            "model": MODEL
         }
 
+    except LLMBusy:
+        raise
     except Exception as e:
         return {
             "success": False,
@@ -522,19 +961,7 @@ def format_synastry_for_interpretation(synastry_data: dict, charts: list, labels
     return "\n".join(lines)
 
 
-def interpret_synastry(synastry_data: dict, charts: list, labels: list) -> dict:
-    """
-    Use DeepSeek Reasoner to interpret synastry between multiple charts.
-
-    Args:
-        synastry_data: Calculated synastry aspects and overlays
-        charts: List of individual birth charts
-        labels: List of names/labels for each person
-
-    Returns:
-        dict with interpretation and reasoning
-    """
-
+def _synastry_messages(synastry_data: dict, charts: list, labels: list) -> list:
     synastry_text = format_synastry_for_interpretation(synastry_data, charts, labels)
 
     num_people = len(charts)
@@ -629,42 +1056,43 @@ Return your analysis as a JSON object with this structure:
     }}
 }}"""
 
-    messages = [
+    return [
         {"role": "system", "content": SYNASTRY_SYSTEM_PROMPT},
         {"role": "user", "content": prompt}
     ]
 
-    try:
-        response = client.chat.completions.create(
-            model="deepseek-reasoner",
-            messages=messages,
-            max_tokens=8192
-        )
 
-        message = response.choices[0].message
-        content = message.content
+async def interpret_synastry(synastry_data: dict, charts: list, labels: list) -> dict:
+    """
+    Use DeepSeek Reasoner to interpret synastry between multiple charts.
 
-        # Try to parse JSON from response
-        try:
-            if "```json" in content:
-                json_str = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                json_str = content.split("```")[1].split("```")[0].strip()
-            else:
-                json_str = content.strip()
+    Args:
+        synastry_data: Calculated synastry aspects and overlays
+        charts: List of individual birth charts
+        labels: List of names/labels for each person
+
+    Returns:
+        dict with interpretation and reasoning
+    """
+
+    messages = _synastry_messages(synastry_data, charts, labels)
+
+    try:
+        message = await complete(messages, 8192)
+        content = message.content
 
-            interpretation = json.loads(json_str)
-        except (json.JSONDecodeError, IndexError):
-            interpretation = {"raw": content}
+        interpretation = parse_json_content(content)
 
         return {
             "success": True,
             "reasoning": getattr(message, 'reasoning_content', None),
             "interpretation": interpretation,
             "synastry_data": synastry_data,
-            "model": "deepseek-reasoner"
+            "model": MODEL
         }
 
+    except LLMBusy:
+        raise
     except Exception as e:
         return {
             "success": False,
@@ -672,4 +1100,51 @@ Return your analysis as a JSON object with this structure:
             "interpretation": None,
             "synastry_data": synastry_data,
             "reasoning": None
-        }
\ No newline at end of file
+        }
+
+
+# =============================================================================
+# STREAMING VARIANTS
+# The same prompts as above, answered token by token (see open_stream).
+# =============================================================================
+
+async def stream_interpretation(chart: dict, dasha: dict = None, structured: bool = True,
+                                compact: bool = False) -> CompletionStream:
+    """interpret_chart_structured / interpret_chart as a stream."""
+    if structured:
+        messages, parse = _structured_messages(chart, dasha, compact), parse_json_content
+    else:
+        messages, parse = _chart_messages(chart, dasha, compact), lambda content: content
+
+    def finish(content, reasoning):
+        return {"success": True, "reasoning": reasoning, "interpretation": parse(content), "model": MODEL}
+
+    return await open_stream(messages, 8192, finish)
+
+
+async def stream_simple_chat(message: str, history: list) -> CompletionStream:
+    """simple_chat as a stream."""
+    def finish(content, reasoning):
+        return {"success": True, "response": content, "reasoning": reasoning}
+
+    messages = await history_compactor.prepare(_simple_chat_messages(message, history))
+    return await open_stream(messages, 4096, finish)
+
+
+async def stream_session_chat(messages: list) -> CompletionStream:
+    """session_chat as a stream."""
+    stream = None
+
+    def finish(content, reasoning):
+        return {"success": True, "response": content, "reasoning": reasoning, "usage": stream.usage}
+
+    stream = await open_stream(await history_compactor.prepare(messages), 4096, finish)
+    return stream
+
+
+async def stream_synastry(synastry_data: dict, charts: list, labels: list) -> CompletionStream:
+    """interpret_synastry as a stream; the synastry data itself is left to the caller."""
+    def finish(content, reasoning):
+        return {"success": True, "reasoning": reasoning, "interpretation": parse_json_content(content), "model": MODEL}
+
+    return await open_stream(_synastry_messages(synastry_data, charts, labels), 8192, finish)
@@ -2,16 +2,55 @@
 Vedic Astrology API - FastAPI Backend
 """
 
-from fastapi import FastAPI, HTTPException
+import json
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Optional
+import pytz
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from models import BirthData, ChartResponse, ChatRequest, SimpleChatRequest, SynastryRequest, AlignmentRequest
-from calculator import calculate_chart, calculate_navamsa, calculate_dasha, calculate_all_vargas, calculate_synastry, calculate_current_alignment
-from interpreter import interpret_chart, interpret_chart_structured, chat_about_chart, simple_chat, interpret_synastry
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from models import BirthData, ChartResponse, ChatRequest, SimpleChatRequest, ChatSessionRequest, ChatSessionMessage, SynastryRequest, AlignmentRequest, CalendarRequest, MatchRankRequest, AshtakootaRequest, TransitTimelineRequest
+from calculator import (
+    calculate_synastry, LazyVargas, parse_varga_keys, resolve_moment, localize_alignment,
+    dasha_timeline, resolve_current_dasha
+)
+from interpreter import (
+    interpret_chart, interpret_chart_structured, chat_about_chart, simple_chat, interpret_synastry, llm_gate, LLMBusy,
+    stream_interpretation, stream_simple_chat, stream_synastry, interpretation_key, format_chart, prompt_token_report,
+    session_chat, stream_session_chat, chart_chat_system_prompt, count_tokens, history_compactor
+)
+from chat_sessions import SessionBusy, sessions_from_env, user_message
+from timezones import timezone_cache_stats
+from snapshots import SnapshotCache, refresh_enabled
+from transits import to_jd
+from sensitivity import MAX_WINDOW_MINUTES
+from chart_cache import cache_from_env, cache_key
+from serialization import dumps, json_response, msgpack_response, wants_msgpack
+from workers import (
+    get_pool, shutdown_pool, PoolBusy, PoolTimeout,
+    chart_response_task, chart_task, natal_dasha_task, chart_and_dasha_task, transit_snapshot_task,
+    calendar_task, rank_task, ashtakoota_task, transit_events_task, sensitivity_task, chart_batch_task
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    get_pool()  # start the chart workers before the first request
+    if refresh_enabled():
+        transit_snapshots.start_refresh()
+    yield
+    await transit_snapshots.stop_refresh()
+    shutdown_pool()
+
 
 app = FastAPI(
     title="Vedic Astrology API",
     description="Calculate Vedic birth charts with planetary positions, nakshatras, and divisional charts",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS for frontend - allow all origins for now
@@ -24,106 +63,352 @@ app.add_middleware(
 )
 
 
+async def compute(task, *args):
+    """Run a chart task on the worker pool from an async endpoint."""
+    try:
+        return await get_pool().call(task, *args)
+    except PoolBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except PoolTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+
+# Transit timelines are computed in slices of this many days, streamed in order
+TIMELINE_SLICE_DAYS = 31
+MAX_TIMELINE_DAYS = 366 * 20
+
+# Batch charts go to the pool in chunks of this many records, at most
+# BATCH_CHUNKS_PER_WORKER chunks per worker at a time
+BATCH_CHUNK_SIZE = 16
+BATCH_CHUNKS_PER_WORKER = 2
+BATCH_BUSY_RETRY_SECONDS = 0.05
+
+# Location-independent alignment data, shared by all requests for the same minute
+transit_snapshots = SnapshotCache(lambda minute, ayanamsa_type: compute(transit_snapshot_task, minute, ayanamsa_type))
+
+# Chart results by content address (birth data + settings), see chart_cache
+chart_cache = cache_from_env()
+
+# Successful readings by interpreter.interpretation_key (INTERPRETATION_CACHE_* settings)
+interpretation_cache = cache_from_env('INTERPRETATION_CACHE', size=256, max_age_days=7)
+
+# Server-side conversations (CHAT_SESSION_* settings), see chat_sessions
+chat_sessions = sessions_from_env()
+
+
+async def cached_response(request: Request, kind: str, key: str, compute_result):
+    """A cached result as pre-encoded JSON, or MessagePack when the client asks for it."""
+    if wants_msgpack(request.headers.get('accept')):
+        return msgpack_response(await chart_cache.fetch(kind, key, compute_result))
+    return json_response(await chart_cache.fetch_encoded(kind, key, compute_result))
+
+
+async def cached_charts(births):
+    """Charts for a list of birth dicts; the uncached ones are computed in parallel on the pool."""
+    return await asyncio.gather(*(
+        chart_cache.fetch('chart', cache_key('chart', birth), lambda birth=birth: compute(chart_task, birth))
+        for birth in births
+    ))
+
+
+def sse(event: str, data) -> str:
+    """One Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def sse_response(stream=None, before=(), on_done=None, on_close=None):
+    """
+    Forward a CompletionStream as SSE: the 'before' messages, then a
+    'reasoning' or 'content' event ({"text": ...}) per delta as it arrives,
+    then 'done' with the same fields as the non-streaming endpoint, or
+    'error' if the stream fails part way. on_done(result) runs (in a
+    thread) before 'done' is sent; on_close() runs when the response ends,
+    however it ends.
+    """
+    async def events():
+        try:
+            for message in before:
+                yield message
+            if stream is not None:
+                async for kind, text in stream:
+                    yield sse(kind, {"text": text})
+                result = stream.result()
+                if on_done is not None:
+                    await asyncio.to_thread(on_done, result)
+                yield sse("done", result)
+        except Exception as e:
+            yield sse("error", {"error": str(e)})
+        finally:
+            if stream is not None:
+                await stream.aclose()
+            if on_close is not None:
+                on_close()
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
 @app.get("/")
 def root():
     """Health check endpoint."""
     return {"status": "ok", "message": "Vedic Astrology API"}
 
 
+@app.get("/api/metrics")
+def get_metrics():
+    """Cache and resolution counters for this worker process."""
+    return {
+        "timezone": timezone_cache_stats(),
+        "chart_pool": get_pool().stats(),
+        "transit_snapshots": transit_snapshots.stats(),
+        "chart_cache": chart_cache.stats(),
+        "llm": llm_gate.stats(),
+        "interpretation_cache": interpretation_cache.stats(),
+        "chat_sessions": chat_sessions.stats(),
+        "chat_history": history_compactor.stats()
+    }
+
+
 @app.post("/api/chart", response_model=ChartResponse)
-def get_chart(data: BirthData):
+async def get_chart(data: BirthData, request: Request, vargas: Optional[str] = None):
     """
     Calculate a complete Vedic birth chart.
 
     Returns planetary positions in sidereal zodiac using Lahiri ayanamsa,
     along with nakshatra positions and house placements.
+
+    The 'vargas' parameter selects the divisional charts to include:
+    - omitted (default): all 16 vargas
+    - comma-separated keys, e.g. 'D9,D10': only those
+    - empty or 'none': D1 only
+
+    The response is validated against ChartResponse when it is computed and
+    sent as cached bytes; 'Accept: application/msgpack' selects MessagePack
+    (when the server has msgpack installed).
     """
     try:
-        chart = calculate_chart(
-            year=data.year,
-            month=data.month,
-            day=data.day,
-            hour=data.hour,
-            minute=data.minute,
-            latitude=data.latitude,
-            longitude=data.longitude
-        )
-
-        # Add all divisional charts (vargas)
-        # Add all divisional charts (vargas)
-        vargas = calculate_all_vargas(chart)
-        
-        # Structure the response to include D1 explicitly and other vargas at top level
-        # This creates a cleaner API that matches Frontend expectations (chart.D1, chart.D9, etc)
-        response = {
-            "D1": chart,  # Main Rashi Chart
-            "meta": {
-                "ayanamsa": chart.get('ayanamsa'),
-                "ayanamsa_type": chart.get('ayanamsa_type'),
-                "birth_data": chart.get('birth_data')
-            }
-        }
-        
-        # Add all other vargas to root, but don't overwrite D1 if it exists in vargas
-        # We want D1 to be the full 'chart' object, not the simplified varga version
-        for key, value in vargas.items():
-            if key != 'D1':
-                response[key] = value
-        
-        return response
+        varga_keys = parse_varga_keys(vargas)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        birth = data.model_dump()
+        return await cached_response(request, 'chart_response', cache_key('chart_response', birth, vargas=varga_keys),
+                                     lambda: compute(chart_response_task, birth, varga_keys))
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/chart/basic")
-def get_basic_chart(data: BirthData):
+async def get_basic_chart(data: BirthData, request: Request):
     """
     Get basic chart without divisional charts.
     Lighter response for quick lookups.
     """
     try:
-        chart = calculate_chart(
-            year=data.year,
-            month=data.month,
-            day=data.day,
-            hour=data.hour,
-            minute=data.minute,
-            latitude=data.latitude,
-            longitude=data.longitude
-        )
-        return chart
+        birth = data.model_dump()
+        return await cached_response(request, 'chart', cache_key('chart', birth), lambda: compute(chart_task, birth))
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/chart/sensitivity")
+async def get_birth_time_sensitivity(data: BirthData, window: int = 30, vargas: Optional[str] = None,
+                                     planets: bool = True):
+    """
+    How sensitive the chart is to the recorded birth time.
+
+    Lists the exact times within +-'window' minutes of birth at which the
+    ascendant (and, unless planets=false, any planet) changes sign in a
+    divisional chart, and per varga the margin in minutes to the nearest
+    change either side. Useful for rectification: a D60 that flips 20
+    seconds after the recorded time should not be relied on.
+
+    'vargas' selects the divisional charts as in /api/chart.
+    """
+    try:
+        varga_keys = parse_varga_keys(vargas)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not 0 < window <= MAX_WINDOW_MINUTES:
+        raise HTTPException(status_code=400, detail=f"window must be between 1 and {MAX_WINDOW_MINUTES} minutes")
+
+    try:
+        return await compute(sensitivity_task, data.model_dump(), window, varga_keys, planets)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, e['loc'])) or 'record'}: {e['msg']}" for e in error.errors())
+
+
+def _ndjson_lines(body: bytes):
+    """The non-empty lines of an NDJSON body, one at a time."""
+    start = 0
+    while start < len(body):
+        end = body.find(b"\n", start)
+        end = len(body) if end < 0 else end
+        if body[start:end].strip():
+            yield body[start:end]
+        start = end + 1
+
+
+async def _batch_chunk(items, varga_keys) -> bytes:
+    """One chunk on the pool, waiting while the pool is busy; a failed call fails each of its records."""
+    while True:
+        try:
+            return await get_pool().call(chart_batch_task, items, varga_keys)
+        except PoolBusy:
+            await asyncio.sleep(BATCH_BUSY_RETRY_SECONDS)
+        except Exception as e:
+            return b"".join(dumps({"index": index, "error": str(e) or type(e).__name__}) + b"\n"
+                            for index, _ in items)
+
+
+@app.post("/api/chart/batch")
+async def get_chart_batch(request: Request, vargas: Optional[str] = None):
+    """
+    Calculate many charts in one request, streamed back as NDJSON.
+
+    The body is either NDJSON (Content-Type: application/x-ndjson), one
+    BirthData object per line, or a JSON array of BirthData objects. Each
+    result line is {"index": i, "chart": <the /api/chart response>} or
+    {"index": i, "error": "..."} for a record that is invalid or fails,
+    where i is the record's position in the input. Lines are sent in
+    completion order, not input order.
+
+    Records are validated and computed in chunks across the worker pool as
+    results are sent, with a bounded number of chunks in flight, so beyond
+    the request body itself memory does not grow with the batch size.
+    'vargas' selects the divisional charts as in /api/chart.
+    """
+    try:
+        varga_keys = parse_varga_keys(vargas)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # The body is read whole before streaming starts (the response's disconnect
+    # listener shares the receive channel); records are parsed as they are sent
+    body = await request.body()
+    if "ndjson" in request.headers.get("content-type", ""):
+        records = _ndjson_lines(body)
+        parse = BirthData.model_validate_json
+    else:
+        try:
+            records = json.loads(body)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+        if not isinstance(records, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+        records = iter(records)
+        parse = BirthData.model_validate
+
+    max_in_flight = max(get_pool().size, 1) * BATCH_CHUNKS_PER_WORKER
+
+    async def lines():
+        in_flight, end = set(), object()
+        index, exhausted = 0, False
+        try:
+            while not exhausted or in_flight:
+                # Top up the chunks in flight from the input
+                while not exhausted and len(in_flight) < max_in_flight:
+                    items = []
+                    while len(items) < BATCH_CHUNK_SIZE:
+                        record = next(records, end)
+                        if record is end:
+                            exhausted = True
+                            break
+                        try:
+                            items.append((index, parse(record).model_dump()))
+                        except ValidationError as e:
+                            yield dumps({"index": index, "error": _validation_message(e)}) + b"\n"
+                        index += 1
+                    if items:
+                        in_flight.add(asyncio.ensure_future(_batch_chunk(items, varga_keys)))
+
+                if in_flight:
+                    done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        yield task.result()
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
 @app.post("/api/dasha")
-def get_dasha_periods(data: BirthData):
+async def get_dasha_periods(data: BirthData, request: Request, as_of: Optional[datetime] = None):
     """
     Calculate Vimshottari Dasha periods.
 
-    Returns all Maha Dasha periods from birth, plus the current
-    running Maha Dasha and Antar Dasha (sub-period).
+    Returns all Maha Dasha periods from birth, plus the running
+    Maha, Antar, Pratyantar, Sookshma and Prana Dasha.
+
+    The 'as_of' parameter (ISO datetime, UTC if no offset) sets the moment
+    the running periods are resolved for; it defaults to now.
+
+    Only the natal timeline is cached (by birth data); the running periods
+    are a few bisections into it, resolved for each request.
     """
+    if as_of is None:
+        as_of = datetime.now(pytz.UTC)
+    elif as_of.tzinfo is None:
+        as_of = pytz.UTC.localize(as_of)
+
     try:
-        dasha = calculate_dasha(
-            year=data.year,
-            month=data.month,
-            day=data.day,
-            hour=data.hour,
-            minute=data.minute,
-            latitude=data.latitude,
-            longitude=data.longitude
-        )
-        return dasha
+        birth = data.model_dump()
+        record = await chart_cache.fetch('dasha_natal', cache_key('dasha_natal', birth),
+                                         lambda: compute(natal_dasha_task, birth))
+        timeline = dasha_timeline(record['birth_time'], record['moon'])
+        result = {**record['natal'], **resolve_current_dasha(timeline, as_of)}
+        if wants_msgpack(request.headers.get('accept')):
+            return msgpack_response(result)
+        return json_response(dumps(result))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/interpret/prompt")
+async def get_chart_prompt(data: BirthData, compact: bool = True, vargas: bool = False):
+    """
+    The chart text an interpretation or chat prompt is built from, with its
+    token count in both encodings ('tokenizer' says whether the counts are
+    exact or estimated).
 
+    - compact: the compact encoding (default) or the verbose one
+    - vargas: include the 16 divisional charts, as /api/chat does
+    """
+    try:
+        chart, dasha = await compute(chart_and_dasha_task, data.model_dump())
+        if vargas:
+            chart['vargas'] = LazyVargas(chart)
+        return {
+            "format": "compact" if compact else "verbose",
+            "text": format_chart(chart, dasha, compact),
+            **prompt_token_report(chart, dasha)
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/interpret")
-def get_interpretation(data: BirthData, structured: bool = True):
+async def get_interpretation(data: BirthData, structured: bool = True, compact: bool = False):
     """
     Get AI-powered interpretation of the birth chart using DeepSeek Reasoner.
 
@@ -131,49 +416,68 @@ def get_interpretation(data: BirthData, structured: bool = True):
     - True (default): Returns JSON-structured sections for easy frontend rendering
     - False: Returns free-form interpretation text
 
+    'compact' sends the chart in the compact encoding, a third of the chart
+    text's tokens or less (see /api/interpret/prompt).
+
     The response includes 'reasoning' (chain of thought) and 'interpretation' (final analysis).
+
+    Readings are cached by the chart text the prompt is built from, and
+    identical requests in flight share one model call.
     """
     try:
-        # First calculate the chart and dasha
-        chart = calculate_chart(
-            year=data.year,
-            month=data.month,
-            day=data.day,
-            hour=data.hour,
-            minute=data.minute,
-            latitude=data.latitude,
-            longitude=data.longitude
-        )
-
-        dasha = calculate_dasha(
-            year=data.year,
-            month=data.month,
-            day=data.day,
-            hour=data.hour,
-            minute=data.minute,
-            latitude=data.latitude,
-            longitude=data.longitude
-        )
-
-        # Get interpretation
-        if structured:
-            result = interpret_chart_structured(chart, dasha)
-        else:
-            result = interpret_chart(chart, dasha)
+        # First calculate the chart and dasha from one shared birth moment
+        chart, dasha = await compute(chart_and_dasha_task, data.model_dump())
 
-        if not result.get("success"):
-            raise HTTPException(status_code=500, detail=result.get("error", "Interpretation failed"))
+        async def interpret():
+            if structured:
+                result = await interpret_chart_structured(chart, dasha, compact)
+            else:
+                result = await interpret_chart(chart, dasha, compact)
 
-        return result
+            # Raised, not returned, so failures are not cached
+            if not result.get("success"):
+                raise HTTPException(status_code=500, detail=result.get("error", "Interpretation failed"))
+            return result
+
+        return await interpretation_cache.fetch('interpretation', interpretation_key(chart, dasha, structured, compact), interpret)
 
     except HTTPException:
         raise
+    except LLMBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/interpret/stream")
+async def get_interpretation_stream(data: BirthData, structured: bool = True, compact: bool = False):
+    """
+    /api/interpret as Server-Sent Events: reasoning and content tokens are
+    sent as the model produces them, then a 'done' event with the
+    interpretation ('structured' and 'compact' as in /api/interpret).
+
+    A reading cached by /api/interpret (or an earlier stream) is sent as
+    the 'done' event straight away.
+    """
+    try:
+        chart, dasha = await compute(chart_and_dasha_task, data.model_dump())
+        key = interpretation_key(chart, dasha, structured, compact)
+        cached = await asyncio.to_thread(interpretation_cache.get, key)
+        if cached is not None:
+            return sse_response(before=[sse("done", cached)])
+        stream = await stream_interpretation(chart, dasha, structured, compact)
+    except HTTPException:
+        raise
+    except LLMBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return sse_response(stream, on_done=lambda result: interpretation_cache.put(key, 'interpretation', result))
+
+
 @app.post("/api/synastry")
-def get_synastry(request: SynastryRequest):
+async def get_synastry(request: SynastryRequest):
     """
     Calculate synastry (relationship compatibility) between 2-4 people.
 
@@ -184,29 +488,16 @@ def get_synastry(request: SynastryRequest):
     - AI-powered relationship interpretation
     """
     try:
-        charts = []
-        labels = []
+        labels = [person.label for person in request.people]
 
         # Calculate chart for each person
-        for person in request.people:
-            data = person.birth_data
-            chart = calculate_chart(
-                year=data.year,
-                month=data.month,
-                day=data.day,
-                hour=data.hour,
-                minute=data.minute,
-                latitude=data.latitude,
-                longitude=data.longitude
-            )
-            charts.append(chart)
-            labels.append(person.label)
+        charts = await cached_charts([person.birth_data.model_dump() for person in request.people])
 
         # Calculate synastry aspects and overlays
         synastry_data = calculate_synastry(charts, labels)
 
         # Get AI interpretation
-        interpretation_result = interpret_synastry(synastry_data, charts, labels)
+        interpretation_result = await interpret_synastry(synastry_data, charts, labels)
 
         if not interpretation_result.get("success"):
             # Return synastry data even if interpretation fails
@@ -224,12 +515,81 @@ def get_synastry(request: SynastryRequest):
             "reasoning": interpretation_result.get("reasoning")
         }
 
+    except HTTPException:
+        raise
+    except LLMBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/synastry/stream")
+async def get_synastry_stream(request: SynastryRequest):
+    """
+    /api/synastry as Server-Sent Events: a 'synastry' event with the
+    calculated aspects and overlays first, then the interpretation's
+    reasoning and content tokens, then 'done'.
+    """
+    try:
+        labels = [person.label for person in request.people]
+        charts = await cached_charts([person.birth_data.model_dump() for person in request.people])
+        synastry_data = calculate_synastry(charts, labels)
+        stream = await stream_synastry(synastry_data, charts, labels)
+    except HTTPException:
+        raise
+    except LLMBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return sse_response(stream, before=[sse("synastry", synastry_data)])
+
+
+@app.post("/api/match/rank")
+async def rank_matches(request: MatchRankRequest):
+    """
+    Rank candidates by compatibility with one person.
+
+    Each candidate gives birth data or the planet longitudes of a stored
+    chart. Scores use the same aspects and compatibility_score as
+    /api/synastry, computed for the whole candidate list at once; the
+    top_k best are returned, best first.
+    """
+    try:
+        candidates = [candidate.model_dump() for candidate in request.candidates]
+        return await compute(rank_task, request.person.model_dump(), candidates, request.top_k)
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/match/ashtakoota")
+async def match_ashtakoota(request: AshtakootaRequest):
+    """
+    Ashtakoota (guna milan, out of 36) of one person against a list of candidates.
+
+    Each candidate gives birth data or a stored Moon longitude. Scores come
+    from a precomputed table of all 108 x 108 Moon pada pairs; results are
+    in candidate order with the eight koota scores and Nadi/Bhakoot dosha flags.
+    """
+    try:
+        candidates = [candidate.model_dump() for candidate in request.candidates]
+        return await compute(ashtakoota_task, request.person.model_dump(), candidates, request.role)
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/chat/v2")
-def chat_simple(request: SimpleChatRequest):
+async def chat_simple(request: SimpleChatRequest):
     """
     Simple chat - just message + history.
 
@@ -241,7 +601,7 @@ def chat_simple(request: SimpleChatRequest):
         history = [{"role": msg.role, "content": msg.content} for msg in request.history]
 
         # Get chat response
-        result = simple_chat(request.message, history)
+        result = await simple_chat(request.message, history)
 
         if not result.get("success"):
             raise HTTPException(status_code=500, detail=result.get("error", "Chat failed"))
@@ -250,42 +610,153 @@ def chat_simple(request: SimpleChatRequest):
 
     except HTTPException:
         raise
+    except LLMBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/chat/v2/stream")
+async def chat_simple_stream(request: SimpleChatRequest):
+    """/api/chat/v2 as Server-Sent Events: reasoning and content tokens, then 'done'."""
+    try:
+        history = [{"role": msg.role, "content": msg.content} for msg in request.history]
+        stream = await stream_simple_chat(request.message, history)
+    except LLMBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    return sse_response(stream)
+
+
+def get_session(session_id: str):
+    session = chat_sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Chat session not found or expired")
+    return session
+
+
+@app.post("/api/chat/sessions")
+async def create_chat_session(request: ChatSessionRequest):
+    """
+    Start a server-side conversation. Give either 'system', the system
+    prompt as /api/chat/v2 would send it first, or 'birth_data' to have the
+    chart prompt built here ('compact' encoding by default). 'history'
+    resumes an earlier conversation.
+
+    The system prompt is kept verbatim for the life of the session, so put
+    anything that changes per turn in the message 'context' instead.
+    """
+    if (request.system is None) == (request.birth_data is None):
+        raise HTTPException(status_code=400, detail="Give either 'system' or 'birth_data'")
+
+    try:
+        system = request.system
+        if system is None:
+            chart, dasha = await compute(chart_and_dasha_task, request.birth_data.model_dump())
+            chart['vargas'] = LazyVargas(chart)
+            system = await asyncio.to_thread(chart_chat_system_prompt, chart, dasha, request.compact)
+
+        history = [{"role": msg.role, "content": msg.content} for msg in request.history]
+        session = chat_sessions.create(system, history)
+        return {
+            "session_id": session.id,
+            "messages": len(session.messages()),
+            "prompt_tokens": sum(count_tokens(message['content']) for message in session.messages())
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/chat/sessions/{session_id}")
+def get_chat_session(session_id: str):
+    """The session's messages, per-turn usage and totals."""
+    return get_session(session_id).to_dict()
+
+
+@app.delete("/api/chat/sessions/{session_id}")
+def delete_chat_session(session_id: str):
+    if not chat_sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail="Chat session not found or expired")
+    return {"deleted": True}
+
+
+@app.post("/api/chat/sessions/{session_id}/messages")
+async def chat_session_message(session_id: str, request: ChatSessionMessage):
+    """
+    The next turn of a session: only the new message (and optional
+    per-turn 'context') is sent. The response adds 'usage' for this turn,
+    with the prompt tokens served from the provider's prefix cache, and
+    the session 'totals'. A failed turn leaves the session unchanged.
+    """
+    session = get_session(session_id)
+    message = user_message(request.message, request.context)
+    try:
+        with session.turn():
+            result = await session_chat(session.request(message))
+            if not result.get("success"):
+                raise HTTPException(status_code=500, detail=result.get("error", "Chat failed"))
+            session.commit(message, result)
+        chat_sessions.record(result.get("usage"))
+        return {**result, "totals": session.totals()}
+
+    except HTTPException:
+        raise
+    except SessionBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except LLMBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/chat/sessions/{session_id}/messages/stream")
+async def chat_session_message_stream(session_id: str, request: ChatSessionMessage):
+    """
+    The next turn of a session as Server-Sent Events. The turn is stored
+    when the stream completes; 'done' carries the usage and totals as in
+    the non-streaming endpoint.
+    """
+    session = get_session(session_id)
+    message = user_message(request.message, request.context)
+    try:
+        session.acquire()
+        try:
+            stream = await stream_session_chat(session.request(message))
+        except BaseException:
+            session.release()
+            raise
+    except SessionBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except LLMBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    def on_done(result):
+        session.commit(message, result)
+        chat_sessions.record(result.get("usage"))
+        result["totals"] = session.totals()
+
+    return sse_response(stream, on_done=on_done, on_close=session.release)
+
 
 @app.post("/api/chat")
-def chat_followup(request: ChatRequest):
+async def chat_followup(request: ChatRequest, compact: bool = False):
     """
     Have a follow-up conversation about the birth chart (legacy - recalculates).
+    'compact' sends the chart in the compact encoding.
 
     DEPRECATED: Use /api/chat/v2 with pre-calculated chart data instead.
     """
     try:
-        data = request.birth_data
-
-        # Calculate chart with all vargas
-        chart = calculate_chart(
-            year=data.year,
-            month=data.month,
-            day=data.day,
-            hour=data.hour,
-            minute=data.minute,
-            latitude=data.latitude,
-            longitude=data.longitude
-        )
-        chart['vargas'] = calculate_all_vargas(chart)
-
-        # Calculate dasha
-        dasha = calculate_dasha(
-            year=data.year,
-            month=data.month,
-            day=data.day,
-            hour=data.hour,
-            minute=data.minute,
-            latitude=data.latitude,
-            longitude=data.longitude
-        )
+        # Calculate chart and dasha; vargas are calculated as the prompt formatter reads them
+        chart, dasha = await compute(chart_and_dasha_task, request.birth_data.model_dump())
+        chart['vargas'] = LazyVargas(chart)
 
         # Convert conversation history to dict format
         history = None
@@ -293,7 +764,7 @@ def chat_followup(request: ChatRequest):
             history = [{"role": msg.role, "content": msg.content} for msg in request.conversation_history]
 
         # Get chat response
-        result = chat_about_chart(chart, dasha, request.question, history)
+        result = await chat_about_chart(chart, dasha, request.question, history, compact)
 
         if not result.get("success"):
             raise HTTPException(status_code=500, detail=result.get("error", "Chat failed"))
@@ -302,29 +773,110 @@ def chat_followup(request: ChatRequest):
 
     except HTTPException:
         raise
+    except LLMBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/alignment")
-def get_daily_alignment(data: AlignmentRequest):
+async def get_daily_alignment(data: AlignmentRequest):
     """
     Get current cosmic alignment (Panchang) for a given location.
 
     Returns Tithi, Nakshatra, and other daily indicators for
     personalized guidance based on the current planetary positions.
+
+    The transits and Panchang elements come from a snapshot shared by every
+    request for the same minute; only the timezone and weekday are resolved
+    per request, in a thread (a timezone lookup can miss its caches).
+    """
+    try:
+        tz_name, local_dt, jd = await asyncio.to_thread(resolve_moment, **data.model_dump())
+        snapshot = await transit_snapshots.get(jd)
+        return localize_alignment(snapshot, local_dt, tz_name)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/transits/timeline")
+async def get_transit_timeline(request: TransitTimelineRequest):
+    """
+    Stream the transit events of a natal chart over a window as NDJSON.
+
+    Events are exact times (found by root-finding) at which a transiting
+    planet forms a conjunction, sextile, square, trine or opposition to a
+    natal planet or the ascendant, or enters a new natal house. One JSON
+    object per line, in time order. The window is computed slice by slice
+    on the worker pool, so a long window never builds one large list.
+    An error after streaming has started is sent as a final {"error": ...} line.
+    """
+    if (request.chart is None) == (request.birth_data is None):
+        raise HTTPException(status_code=400, detail="Give either chart or birth_data")
+    if request.timezone is not None and request.timezone not in pytz.all_timezones_set:
+        raise HTTPException(status_code=400, detail=f"Unknown timezone: {request.timezone}")
+
+    start = request.start or datetime.now(pytz.UTC)
+    end = request.end or start + timedelta(days=365)
+    start_jd, end_jd = to_jd(start), to_jd(end)
+    if not 0 < end_jd - start_jd <= MAX_TIMELINE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Window must be positive and at most {MAX_TIMELINE_DAYS} days")
+
+    chart = request.chart
+    if chart is None:
+        try:
+            chart = await compute(chart_task, request.birth_data.model_dump())
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+    elif 'planets' not in chart or 'ascendant' not in chart:
+        raise HTTPException(status_code=400, detail="chart must have 'planets' and 'ascendant'")
+
+    bounds = [start_jd + k * TIMELINE_SLICE_DAYS for k in range(int((end_jd - start_jd) // TIMELINE_SLICE_DAYS) + 1)]
+    slices = list(zip(bounds, bounds[1:] + [end_jd]))
+    if slices[-1][0] >= end_jd:
+        slices.pop()
+    args = (request.bodies, request.include_ingresses, request.timezone)
+
+    async def lines():
+        # The next slice is computed while the current one is being sent
+        pending = asyncio.ensure_future(compute(transit_events_task, chart, *slices[0], *args))
+        try:
+            for k in range(len(slices)):
+                events = await pending
+                if k + 1 < len(slices):
+                    pending = asyncio.ensure_future(compute(transit_events_task, chart, *slices[k + 1], *args))
+                for event in events:
+                    yield dumps(event) + b"\n"
+        except HTTPException as e:
+            yield dumps({"error": e.detail}) + b"\n"
+        except Exception as e:
+            yield dumps({"error": str(e)}) + b"\n"
+        finally:
+            pending.cancel()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.post("/api/calendar")
+async def get_panchang_calendar(data: CalendarRequest, request: Request):
+    """
+    Get the Panchang (Tithi, Nakshatra, Yoga, Karana, Vara) for every day of
+    a month, or of a whole year when 'month' is omitted.
+
+    Each day is taken at the same local time (06:00 by default) and each
+    element includes the time it ends. Calendars are cached here per request
+    (see /api/metrics), and months per timezone in each worker.
     """
     try:
-        alignment = calculate_current_alignment(
-            year=data.year,
-            month=data.month,
-            day=data.day,
-            hour=data.hour,
-            minute=data.minute,
-            latitude=data.latitude,
-            longitude=data.longitude
-        )
-        return alignment
+        calendar_request = data.model_dump()
+        return await cached_response(request, 'calendar', cache_key('calendar', calendar_request),
+                                     lambda: compute(calendar_task, calendar_request))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
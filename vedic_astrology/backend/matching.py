@@ -0,0 +1,256 @@
+"""
+Compatibility ranking of one chart against a large pool of candidates.
+
+calculate_synastry_pair builds the full aspect report for one pair, calling
+calculate_aspect for each of the 10 x 10 planet pairs. To rank a profile
+against tens of thousands of stored charts, CandidatePool keeps every
+candidate's planet longitudes in one (candidates x bodies) NumPy matrix
+and evaluates the same aspects, orbs and compatibility_score formula for
+the whole pool at once, in chunks so memory stays bounded. The best k
+scores are kept in a heap of size k while the chunks stream by, and only
+those k get the full aspect counts.
+
+Scores are identical to calculate_synastry_pair's for the same longitudes
+(see test_matching.py); the full aspect report for the winners can then be
+built with calculate_synastry_pair.
+"""
+
+import heapq
+from typing import Dict, Any, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from batch import BODY_NAMES, body_positions
+from calculator import DEFAULT_AYANAMSA, SYNASTRY_ASPECTS, SYNASTRY_SIGNIFICATORS, resolve_moment
+
+CHUNK_SIZE = 2048
+DEFAULT_TOP_K = 10
+
+# Aspect windows in SYNASTRY_ASPECTS order (ascending angle, orbs never overlap):
+# a separation d has aspect j when LOWER[j] <= d <= UPPER[j]. For the
+# separations involved, d - angle is exact in floating point, so this is the
+# same test as calculate_aspect's abs(d - angle) <= orb.
+_ANGLES = np.array(list(SYNASTRY_ASPECTS), dtype=np.float64)
+_ORBS = np.array([a['orb'] for a in SYNASTRY_ASPECTS.values()], dtype=np.float64)
+_LOWER, _UPPER = _ANGLES - _ORBS, _ANGLES + _ORBS
+NO_ASPECT = len(SYNASTRY_ASPECTS)
+
+# Per aspect code (the extra last entry is NO_ASPECT)
+_HARMONIOUS = np.array([a['nature'] == 'harmonious' for a in SYNASTRY_ASPECTS.values()] + [False])
+_CHALLENGING = np.array([a['nature'] == 'challenging' for a in SYNASTRY_ASPECTS.values()] + [False])
+
+
+def _pair_mask(group: str) -> np.ndarray:
+    """(bodies x bodies) mask of planet pairs where either planet is in a significator group."""
+    member = np.array([name in SYNASTRY_SIGNIFICATORS[group] for name in BODY_NAMES])
+    return member[:, None] | member[None, :]
+
+
+_ROMANTIC = _pair_mask('romantic')
+_KARMIC = _pair_mask('karmic')
+
+
+def _score_tables():
+    """
+    Lookup tables for compatibility_scores, indexed by whole degrees of
+    separation (0-180). Window ends are whole degrees, so each degree lies in
+    at most one aspect window; the tables hold that window's upper end (-1
+    for none) and each planet pair's score contribution for its aspect.
+    None when an orb is not a whole number of degrees.
+    """
+    if not (np.array_equal(_LOWER, np.round(_LOWER)) and np.array_equal(_UPPER, np.round(_UPPER))):
+        return None
+    degrees = np.arange(181)
+    window = np.full(181, NO_ASPECT)
+    for j, (lower, upper) in enumerate(zip(_LOWER, _UPPER)):
+        window[(degrees >= lower) & (degrees <= upper)] = j
+    upper = np.append(_UPPER, -1.0)[window]
+
+    # +10 harmonious, -5 challenging, +5 for any aspect between romantic significators
+    nature = np.where(_HARMONIOUS, 10, np.where(_CHALLENGING, -5, 0))[window]
+    romantic = np.where(window != NO_ASPECT, 5, 0)
+    weights = nature[None, :] + romantic[None, :] * _ROMANTIC.reshape(-1, 1)
+
+    n = len(BODY_NAMES)
+    offsets = (np.arange(n * n) * len(degrees)).reshape(n, n)
+    return upper, weights.ravel().astype(np.int16), offsets
+
+
+_SCORE_TABLES = _score_tables()
+
+
+def chart_longitudes(chart: Dict[str, Any]) -> np.ndarray:
+    """Planet longitudes of a calculated chart, in BODY_NAMES order."""
+    return np.array([chart['planets'][name]['longitude'] for name in BODY_NAMES], dtype=np.float64)
+
+
+def birth_longitudes(births: Sequence[Dict[str, Any]], bodies: Sequence[str] = BODY_NAMES) -> np.ndarray:
+    """
+    (len(births) x len(bodies)) longitude matrix for BirthData dicts,
+    rounded like calculate_chart. Positions come from batched lookups per
+    ayanamsa.
+    """
+    lons = np.empty((len(births), len(bodies)), dtype=np.float64)
+    by_mode: Dict[str, List[int]] = {}
+    for i, birth in enumerate(births):
+        by_mode.setdefault(birth.get('ayanamsa_type', DEFAULT_AYANAMSA), []).append(i)
+
+    for mode, rows in by_mode.items():
+        jds = np.array([
+            resolve_moment(*(births[i][k] for k in ('year', 'month', 'day', 'hour', 'minute', 'latitude', 'longitude')))[2]
+            for i in rows
+        ])
+        for j, name in enumerate(bodies):
+            if name == 'Ketu':
+                # From the rounded Rahu, as in calculate_chart
+                rahu = np.round(body_positions(jds, 'Rahu', mode)[0], 4)
+                lons[rows, j] = np.round((rahu + 180) % 360, 4)
+            else:
+                lons[rows, j] = np.round(body_positions(jds, name, mode)[0], 4)
+    return lons
+
+
+def candidate_longitudes(candidates: Sequence[Dict[str, Any]], bodies: Sequence[str] = BODY_NAMES) -> np.ndarray:
+    """
+    Longitude matrix for MatchCandidate dicts, each holding either
+    'longitudes' (planet name -> longitude) or 'birth_data'.
+    """
+    lons = np.empty((len(candidates), len(bodies)), dtype=np.float64)
+    from_birth = []
+    for i, candidate in enumerate(candidates):
+        stored = candidate.get('longitudes')
+        if stored is not None:
+            missing = [name for name in bodies if name not in stored]
+            if missing:
+                raise ValueError(f"Candidate {candidate['id']}: missing longitudes for {', '.join(missing)}")
+            lons[i] = [stored[name] % 360 for name in bodies]
+        elif candidate.get('birth_data') is not None:
+            from_birth.append(i)
+        else:
+            raise ValueError(f"Candidate {candidate['id']}: needs birth_data or longitudes")
+    if from_birth:
+        lons[from_birth] = birth_longitudes([candidates[i]['birth_data'] for i in from_birth], bodies)
+    return lons
+
+
+def score_matrix(longitudes: np.ndarray, candidates: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Aspect counts and compatibility scores of one chart against many.
+
+    Args:
+        longitudes: (bodies,) longitudes of the person being matched
+        candidates: (n, bodies) longitudes of the candidates
+
+    Returns:
+        Dictionary of (n,) arrays: compatibility_score, total, harmonious,
+        challenging, romantic, karmic
+    """
+    # Angular separation of every (own planet, candidate planet) pair, folded to 0-180
+    diff = np.abs(longitudes[None, :, None] - candidates[:, None, :])
+    diff = np.where(diff > 180, 360 - diff, diff)
+
+    # Aspect code of every pair: the last window starting at or below d, if d is inside it
+    window = np.searchsorted(_LOWER, diff, side='right') - 1
+    code = np.where(diff <= _UPPER[window], window, NO_ASPECT)
+    aspected = code != NO_ASPECT
+
+    counts = {
+        'total': aspected.sum(axis=(1, 2)),
+        'harmonious': _HARMONIOUS[code].sum(axis=(1, 2)),
+        'challenging': _CHALLENGING[code].sum(axis=(1, 2)),
+        'romantic': (aspected & _ROMANTIC).sum(axis=(1, 2)),
+        'karmic': (aspected & _KARMIC).sum(axis=(1, 2)),
+    }
+    # Same formula as calculate_synastry_pair
+    base_score = 50 + counts['harmonious'] * 10 - counts['challenging'] * 5 + counts['romantic'] * 5
+    return {'compatibility_score': np.clip(base_score, 0, 100), **counts}
+
+
+def compatibility_scores(longitudes: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+    """
+    Just the compatibility_score column of score_matrix, with fewer passes
+    over the (n x bodies x bodies) separations: one table lookup by whole
+    degree replaces the per-aspect window tests and counts. Falls back to
+    score_matrix when the aspect windows do not end on whole degrees.
+    """
+    if _SCORE_TABLES is None:
+        return score_matrix(longitudes, candidates)['compatibility_score']
+    degree_upper, pair_weights, pair_offsets = _SCORE_TABLES
+
+    diff = longitudes[None, :, None] - candidates[:, None, :]
+    np.abs(diff, out=diff)
+    np.minimum(diff, 360 - diff, out=diff)  # fold to 0-180 (360 - d only where d > 180)
+
+    degree = diff.astype(np.intp)
+    in_orb = diff <= degree_upper[degree]
+    degree += pair_offsets
+    contribution = pair_weights[degree]
+    contribution[~in_orb] = 0
+    return np.clip(50 + contribution.sum(axis=(1, 2), dtype=np.int64), 0, 100)
+
+
+class CandidatePool:
+    """Candidate ids and their planet longitude matrix, ranked in bulk."""
+
+    def __init__(self, ids: Sequence[Any], longitudes: np.ndarray):
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        if longitudes.shape != (len(ids), len(BODY_NAMES)):
+            raise ValueError(f"Expected {len(ids)} x {len(BODY_NAMES)} longitudes, got {longitudes.shape}")
+        self.ids = list(ids)
+        self.longitudes = longitudes
+
+    @classmethod
+    def from_charts(cls, ids: Sequence[Any], charts: Iterable[Dict[str, Any]]) -> 'CandidatePool':
+        return cls(ids, np.array([chart_longitudes(chart) for chart in charts]).reshape(-1, len(BODY_NAMES)))
+
+    @classmethod
+    def from_births(cls, ids: Sequence[Any], births: Sequence[Dict[str, Any]]) -> 'CandidatePool':
+        return cls(ids, birth_longitudes(births))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def top_k(self, chart: Dict[str, Any], k: int = DEFAULT_TOP_K,
+              exclude: Optional[Iterable[Any]] = None, chunk_size: int = CHUNK_SIZE) -> List[Dict[str, Any]]:
+        """
+        The k best-scoring candidates for a chart, best first.
+
+        Ties keep pool order. Candidates whose id is in exclude (e.g. the
+        person themself) are skipped.
+        """
+        longitudes = chart_longitudes(chart)
+        excluded = set(exclude or ())
+        skip = np.array([i in excluded for i in self.ids], dtype=bool) if excluded else None
+        n = len(self)
+        skipped = -(n + 1)  # below every real key
+        heap = []  # min-heap of (score, -index): the k best so far, lowest first
+
+        for start in range(0, n, chunk_size):
+            scores = compatibility_scores(longitudes, self.longitudes[start:start + chunk_size])
+            # One sortable key per candidate: higher score first, then pool order
+            keys = scores.astype(np.int64) * (n + 1) - np.arange(start, start + len(scores))
+            if skip is not None:
+                keys[skip[start:start + len(scores)]] = skipped
+
+            # Only a chunk's own top k can enter the heap
+            best = np.argpartition(-keys, k - 1)[:k] if 0 < k < len(keys) else np.arange(len(keys) if k else 0)
+            for i in best:
+                if keys[i] == skipped:
+                    continue
+                entry = (int(scores[i]), -(start + int(i)))
+                if len(heap) < k:
+                    heapq.heappush(heap, entry)
+                elif entry > heap[0]:
+                    heapq.heapreplace(heap, entry)
+
+        results = []
+        for score, neg_index in sorted(heap, reverse=True):
+            index = -neg_index
+            summary = score_matrix(longitudes, self.longitudes[index:index + 1])
+            results.append({
+                'id': self.ids[index],
+                'compatibility_score': score,
+                'aspect_summary': {key: int(summary[key][0]) for key in
+                                   ('total', 'harmonious', 'challenging', 'romantic', 'karmic')},
+            })
+        return results
@@ -1,7 +1,8 @@
 """Pydantic models for API request/response validation."""
 
+from datetime import datetime
 from pydantic import BaseModel, Field
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Literal, Optional
 
 
 class BirthData(BaseModel):
@@ -13,6 +14,10 @@ class BirthData(BaseModel):
     minute: int = Field(..., ge=0, le=59, description="Birth minute")
     latitude: float = Field(..., ge=-90, le=90, description="Birth place latitude")
     longitude: float = Field(..., ge=-180, le=180, description="Birth place longitude")
+    ayanamsa_type: Literal["Lahiri", "Raman", "Krishnamurti"] = Field(
+        default="Lahiri",
+        description="Sidereal mode (ayanamsa)"
+    )
 
     model_config = {
         "json_schema_extra": {
@@ -116,6 +121,26 @@ class SimpleChatRequest(BaseModel):
     )
 
 
+class ChatSessionRequest(BaseModel):
+    """A new server-side chat session: a system prompt, or birth data for the chart prompt."""
+    system: Optional[str] = Field(default=None, min_length=1, description="System prompt, kept verbatim")
+    birth_data: Optional[BirthData] = Field(default=None, description="Build the chart system prompt from this")
+    compact: bool = Field(default=True, description="Compact chart encoding (with birth_data)")
+    history: List[ChatMessage] = Field(
+        default_factory=list,
+        description="Earlier user and assistant messages to resume from"
+    )
+
+
+class ChatSessionMessage(BaseModel):
+    """The next message of a chat session."""
+    message: str = Field(..., min_length=1, description="The user's new message")
+    context: Optional[str] = Field(
+        default=None,
+        description="Context for this turn only (date, today's progress), sent ahead of the message"
+    )
+
+
 class PersonData(BaseModel):
     """Birth data with a label for synastry comparisons."""
     label: str = Field(..., min_length=1, max_length=50, description="Name or label for this person")
@@ -168,3 +193,61 @@ class AlignmentRequest(BaseModel):
     minute: int = Field(..., ge=0, le=59, description="Current minute")
     latitude: float = Field(..., ge=-90, le=90, description="Location latitude")
     longitude: float = Field(..., ge=-180, le=180, description="Location longitude")
+
+
+class CalendarRequest(BaseModel):
+    """Request model for a monthly or yearly Panchang calendar."""
+    year: int = Field(..., ge=1900, le=2100, description="Calendar year")
+    month: Optional[int] = Field(default=None, ge=1, le=12, description="Calendar month (omit for the whole year)")
+    latitude: float = Field(..., ge=-90, le=90, description="Location latitude")
+    longitude: float = Field(..., ge=-180, le=180, description="Location longitude")
+    hour: int = Field(default=6, ge=0, le=23, description="Local hour each day is taken at")
+    minute: int = Field(default=0, ge=0, le=59, description="Local minute each day is taken at")
+    ayanamsa_type: Literal["Lahiri", "Raman", "Krishnamurti"] = Field(
+        default="Lahiri",
+        description="Sidereal mode (ayanamsa)"
+    )
+
+
+class MatchCandidate(BaseModel):
+    """A candidate for compatibility ranking: birth data, or stored planet longitudes."""
+    id: str = Field(..., min_length=1, max_length=100, description="Caller's identifier for this candidate")
+    birth_data: Optional[BirthData] = Field(default=None, description="Birth data (chart is calculated)")
+    longitudes: Optional[Dict[str, float]] = Field(
+        default=None,
+        description="Sidereal longitude of each planet (Sun ... Ketu) from a stored chart; Ashtakoota needs only the Moon"
+    )
+
+
+class MatchRankRequest(BaseModel):
+    """Request model for ranking many candidates against one person."""
+    person: BirthData
+    candidates: List[MatchCandidate] = Field(..., min_length=1, max_length=50000)
+    top_k: int = Field(default=10, ge=1, le=100, description="Number of best matches to return")
+
+
+class AshtakootaRequest(BaseModel):
+    """Request model for Ashtakoota (guna milan) scores of one person against many."""
+    person: BirthData
+    role: Literal["groom", "bride"] = Field(
+        default="groom",
+        description="The person's side in the classical (asymmetric) kootas; candidates take the other"
+    )
+    candidates: List[MatchCandidate] = Field(..., min_length=1, max_length=50000)
+
+
+class TransitTimelineRequest(BaseModel):
+    """Request model for a personal transit timeline (natal chart or birth data)."""
+    chart: Optional[Dict[str, Any]] = Field(
+        default=None,
+        description="Stored natal chart as returned by /api/chart/basic (or the D1 of /api/chart)"
+    )
+    birth_data: Optional[BirthData] = Field(default=None, description="Birth data (chart is calculated)")
+    start: Optional[datetime] = Field(default=None, description="Window start (default: now; naive means UTC)")
+    end: Optional[datetime] = Field(default=None, description="Window end (default: start + 1 year)")
+    bodies: Optional[List[Literal["Sun", "Moon", "Mercury", "Venus", "Mars", "Jupiter", "Saturn", "Rahu", "Ketu"]]] = Field(
+        default=None,
+        description="Transiting bodies (default: all but the Moon)"
+    )
+    include_ingresses: bool = Field(default=True, description="Also report house ingresses")
+    timezone: Optional[str] = Field(default=None, description="Timezone of event times (default: the birth timezone)")
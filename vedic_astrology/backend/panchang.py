@@ -0,0 +1,110 @@
+"""
+Panchang calendar: tithi, nakshatra, yoga, karana and vara for every day of
+a month or year at one location.
+
+Each day is taken at the same local clock time (06:00 by default, around
+sunrise), and its elements follow calculate_current_alignment exactly. The
+timezone is resolved once per request, Sun and Moon positions for the whole
+month come from one batched lookup, and each element's end time is searched
+only when the previous day's element has already ended.
+
+Nothing here depends on the exact coordinates beyond the timezone, so
+months are cached per (timezone, year, month, time, ayanamsa).
+"""
+
+import calendar
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Any, Optional
+
+import numpy as np
+import pytz
+
+from batch import body_positions
+from calculator import (
+    DEFAULT_AYANAMSA, WEEKDAY_LORDS, get_nakshatra, calculate_tithi, calculate_yoga,
+    calculate_karana, calculate_julian_day, get_timezone_from_coordinates
+)
+from events import next_boundary, jd_to_datetime
+from timezones import get_tz
+
+MONTH_CACHE_SIZE = 2048
+
+# Element key in the day dict -> (event kind, body)
+ELEMENT_EVENTS = {
+    'tithi': ('tithi', None),
+    'moon_nakshatra': ('nakshatra', 'Moon'),
+    'yoga': ('yoga', None),
+    'karana': ('karana', None),
+}
+
+
+@lru_cache(maxsize=MONTH_CACHE_SIZE)
+def month_panchang(tz_name: str, year: int, month: int, hour: int = 6, minute: int = 0,
+                   ayanamsa_type: str = DEFAULT_AYANAMSA) -> tuple:
+    """The Panchang of every day in a month, as a tuple of day dicts (read-only)."""
+    tz = get_tz(tz_name)
+    n_days = calendar.monthrange(year, month)[1]
+    local_dts = [tz.localize(datetime(year, month, day, hour, minute)) for day in range(1, n_days + 1)]
+    jds = np.array([calculate_julian_day(dt.astimezone(pytz.UTC)) for dt in local_dts])
+
+    # Sun and Moon for the whole month in one pass
+    sun_lons, _ = body_positions(jds, 'Sun', ayanamsa_type)
+    moon_lons, _ = body_positions(jds, 'Moon', ayanamsa_type)
+
+    days = []
+    ends = {}
+    for local_dt, jd, sun_lon, moon_lon in zip(local_dts, jds.tolist(), sun_lons.tolist(), moon_lons.tolist()):
+        elements = {
+            'tithi': calculate_tithi(sun_lon, moon_lon),
+            'moon_nakshatra': get_nakshatra(moon_lon),
+            'yoga': calculate_yoga(sun_lon, moon_lon),
+            'karana': calculate_karana(sun_lon, moon_lon),
+        }
+        for key, (kind, body) in ELEMENT_EVENTS.items():
+            # An element that spans several days ends at the same boundary
+            if key not in ends or ends[key] is None or ends[key].jd <= jd:
+                ends[key] = next_boundary(jd, kind, body, ayanamsa_type)
+            end = ends[key]
+            elements[key]['end'] = jd_to_datetime(end.jd, tz).isoformat() if end else None
+
+        # Python: Monday=0, but Vedic: Sunday=0, so adjust
+        days.append({
+            'date': local_dt.date().isoformat(),
+            **elements,
+            'vara': WEEKDAY_LORDS[(local_dt.weekday() + 1) % 7],
+        })
+    return tuple(days)
+
+
+def calculate_panchang_calendar(year: int, month: Optional[int], latitude: float, longitude: float,
+                                hour: int = 6, minute: int = 0,
+                                ayanamsa_type: str = DEFAULT_AYANAMSA) -> Dict[str, Any]:
+    """
+    Panchang for every day of a month, or of a whole year when month is None.
+
+    Args:
+        year, month: Calendar period (month=None for all twelve months)
+        latitude, longitude: Location (only its timezone matters)
+        hour, minute: Local clock time each day is taken at
+        ayanamsa_type: Sidereal mode
+
+    Returns:
+        Dictionary with the timezone, period and one entry per day
+    """
+    tz_name = get_timezone_from_coordinates(latitude, longitude)
+    months = [month] if month else range(1, 13)
+
+    days = []
+    for m in months:
+        days.extend(month_panchang(tz_name, year, m, hour, minute, ayanamsa_type))
+
+    return {
+        'year': year,
+        'month': month,
+        'time': f"{hour:02d}:{minute:02d}",
+        'timezone': tz_name,
+        'ayanamsa_type': ayanamsa_type,
+        'days': days,
+    }
+
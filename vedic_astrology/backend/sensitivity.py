@@ -0,0 +1,153 @@
+"""
+Birth-time sensitivity: the exact local times, within a window around the
+recorded birth time, at which the ascendant or a planet changes sign in
+any divisional chart.
+
+A varga sign can only change where a longitude crosses one of the varga's
+part boundaries (sign * 30 + part * width, from VARGA_RULES), so every
+boundary of the selected vargas is collected once (shared boundaries, such
+as the sign cusps, are solved once for all vargas that have them):
+
+- Ascendant: sampled with swe.houses_ex every ASCENDANT_STEP_MINUTES.
+  Within the window the ascendant only moves forward, so each boundary
+  between two samples is bracketed and solved by bisection.
+- Planets: events.body_crossings, which also brackets (splitting at
+  stations) and refines each boundary crossing.
+
+A boundary is reported only when the varga sign actually differs on either
+side (consecutive D30 degrees often share a sign, for example). Times are
+astronomical: a chart's displayed degree is rounded to 0.01, which can
+move a planet's apparent change by up to that much motion.
+"""
+
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Sequence
+
+import swisseph as swe
+
+from calculator import (
+    PLANETS, SIGNS, VARGA_KEYS, VARGA_RULES, ChartContext, set_sidereal_mode
+)
+from events import TOLERANCE_DAYS, body_crossings, jd_to_datetime
+from timezones import get_tz
+
+ASCENDANT_STEP_MINUTES = 2
+MAX_WINDOW_MINUTES = 720
+SENSITIVITY_BODIES = list(PLANETS) + ['Ketu']
+
+
+def _boundaries(keys: Sequence[str]):
+    """
+    Sorted boundary longitudes of the selected vargas, and for each one the
+    (varga, sign before, sign after) changes it causes going forward.
+    """
+    changes = defaultdict(list)
+    for key in keys:
+        width, rule = VARGA_RULES[key]
+        n_parts = int(round(30 / width))
+        for sign_idx in range(12):
+            for part in range(n_parts):
+                after = rule(sign_idx, part)
+                before = rule(sign_idx, part - 1) if part else rule((sign_idx - 1) % 12, n_parts - 1)
+                if before != after:
+                    # Rounded key: k * width from different vargas may differ in the last bits
+                    lon = round(sign_idx * 30 + part * width, 9)
+                    changes[lon].append((key, before, after))
+    longitudes = sorted(changes)
+    return longitudes, [changes[lon] for lon in longitudes]
+
+
+def _ascendant(jd: float, latitude: float, longitude: float) -> float:
+    return swe.houses_ex(jd, latitude, longitude, b'W', swe.FLG_SIDEREAL)[1][0]
+
+
+def _ascendant_crossings(context: ChartContext, targets: List[float], start_jd: float, end_jd: float):
+    """(jd, target index) of every boundary the ascendant passes in (start_jd, end_jd], in time order."""
+    lat, lon = context.latitude, context.longitude
+    step = ASCENDANT_STEP_MINUTES / 1440
+    n_steps = max(int(round((end_jd - start_jd) / step)), 1)
+
+    a, a_asc = start_jd, _ascendant(start_jd, lat, lon)
+    for k in range(1, n_steps + 1):
+        b = end_jd if k == n_steps else start_jd + k * step
+        b_asc = _ascendant(b, lat, lon)
+        moved = (b_asc - a_asc) % 360
+        crossed = [(((t - a_asc) % 360), i) for i, t in enumerate(targets) if 0 < (t - a_asc) % 360 <= moved]
+        for distance, i in sorted(crossed):
+            lo, hi = a, b
+            while hi - lo > TOLERANCE_DAYS:
+                mid = (lo + hi) / 2
+                if (_ascendant(mid, lat, lon) - a_asc) % 360 < distance:
+                    lo = mid
+                else:
+                    hi = mid
+            yield (lo + hi) / 2, i
+        a, a_asc = b, b_asc
+
+
+def calculate_birth_time_sensitivity(context: ChartContext, window_minutes: int = 30,
+                                     keys: Optional[Sequence[str]] = None,
+                                     include_planets: bool = True) -> Dict[str, Any]:
+    """
+    Every varga sign change of the ascendant (and planets) within
+    +-window_minutes of the birth moment.
+
+    Args:
+        context: Birth ChartContext
+        window_minutes: Half-width of the window around the birth time
+        keys: Vargas to check (default: all 16)
+        include_planets: Also report planet sign changes
+
+    Returns:
+        Dictionary with the time-ordered 'changes' and, per varga, the
+        'margins': minutes before and after the birth time until the first
+        change (None when nothing changes within the window)
+    """
+    if not 0 < window_minutes <= MAX_WINDOW_MINUTES:
+        raise ValueError(f"window_minutes must be between 1 and {MAX_WINDOW_MINUTES}")
+    keys = list(VARGA_KEYS) if keys is None else list(keys)
+    set_sidereal_mode(context.ayanamsa_type)
+
+    birth_jd = context.jd
+    start_jd, end_jd = birth_jd - window_minutes / 1440, birth_jd + window_minutes / 1440
+    targets, causes = _boundaries(keys)
+    tz = get_tz(context.timezone)
+
+    found = []  # (jd, body, boundary index, direction)
+    for jd, i in _ascendant_crossings(context, targets, start_jd, end_jd):
+        found.append((jd, 'Ascendant', i, 1))
+    if include_planets:
+        for body in SENSITIVITY_BODIES:
+            for jd, i, direction in body_crossings(body, targets, start_jd, end_jd, context.ayanamsa_type):
+                found.append((jd, body, i, direction))
+    found.sort()
+
+    changes = []
+    margins = {key: {'before': None, 'after': None} for key in keys}
+    for jd, body, i, direction in found:
+        offset = (jd - birth_jd) * 1440
+        for key, before, after in causes[i]:
+            if direction < 0:
+                before, after = after, before
+            changes.append({
+                'time': jd_to_datetime(jd, tz).isoformat(),
+                'offset_minutes': round(offset, 2),
+                'body': body,
+                'varga': key,
+                'from': SIGNS[before],
+                'to': SIGNS[after],
+            })
+            margin = margins[key]
+            if offset <= 0:
+                margin['before'] = round(-offset, 2)  # found is in time order: the last one is nearest
+            elif margin['after'] is None:
+                margin['after'] = round(offset, 2)
+
+    return {
+        'birth_time': context.local_dt.isoformat(),
+        'timezone': context.timezone,
+        'window_minutes': window_minutes,
+        'vargas': keys,
+        'changes': changes,
+        'margins': margins,
+    }
@@ -0,0 +1,69 @@
+"""
+Response encoding for chart results.
+
+FastAPI validates a returned dict against the endpoint's response_model and
+re-encodes it with jsonable_encoder and json.dumps on every request. For
+/api/chart (16 vargas) that is most of the cost of a cached response. Chart
+tasks instead validate their result once, in the worker, into exactly the
+structure the response model produces (validated_chart_response), and the
+endpoints return pre-encoded bytes:
+
+- JSON with orjson when it is installed (the stdlib json otherwise). The
+  chart cache keeps the encoded bytes, so a hit is served without encoding.
+- MessagePack, opt-in with 'Accept: application/msgpack', when the msgpack
+  package is installed. Without it the response is JSON.
+
+Results must be JSON-compatible (str keys; no datetimes or numpy scalars),
+which the chart tasks already guarantee.
+"""
+
+import json
+from typing import Any, Dict, Optional
+
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is correct, just slower
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional: MessagePack responses are disabled
+    msgpack = None
+
+JSON_MEDIA_TYPE = 'application/json'
+MSGPACK_MEDIA_TYPE = 'application/msgpack'
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, 'application/x-msgpack')
+
+
+def dumps(value: Any) -> bytes:
+    """Compact JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+def loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def wants_msgpack(accept: Optional[str]) -> bool:
+    """Whether an Accept header asks for MessagePack and it can be produced."""
+    return msgpack is not None and bool(accept) and any(t in accept for t in MSGPACK_MEDIA_TYPES)
+
+
+def json_response(body: bytes) -> Response:
+    return Response(content=body, media_type=JSON_MEDIA_TYPE)
+
+
+def msgpack_response(value: Any) -> Response:
+    return Response(content=msgpack.packb(value, use_bin_type=True), media_type=MSGPACK_MEDIA_TYPE)
+
+
+def validated_chart_response(response: Dict[str, Any]) -> Dict[str, Any]:
+    """A /api/chart response as FastAPI's response_model=ChartResponse would emit it."""
+    from models import ChartResponse
+    return ChartResponse.model_validate(response).model_dump(mode='json')
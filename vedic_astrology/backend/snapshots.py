@@ -0,0 +1,161 @@
+"""
+Shared transit snapshots for /api/alignment.
+
+Everything in the daily alignment except the weekday, the local date and
+the timezone of its times depends only on the UT moment (see
+calculator.transit_snapshot). Requests are quantized to the minute, which
+is the resolution of AlignmentRequest anyway, and all users asking about
+the same minute share one snapshot:
+
+- Snapshots are kept in a bounded LRU keyed by (minute, ayanamsa).
+- Concurrent requests for a minute that is still being computed wait on the
+  same computation instead of starting their own (request coalescing).
+  A failed computation is not cached; the next request retries it.
+- Optionally (ALIGNMENT_REFRESH=1) a background task computes the snapshot
+  for the coming minute a few seconds before it starts, so requests for
+  "now" find it ready.
+
+The cache lives in the API process, in front of the chart worker pool, so
+it is shared by every request the process serves.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from functools import partial
+from typing import Dict, Any, Awaitable, Callable, Tuple
+
+from calculator import DEFAULT_AYANAMSA
+
+logger = logging.getLogger(__name__)
+
+MINUTES_PER_DAY = 1440
+UNIX_EPOCH_MINUTE = 3514446000  # JD 2440587.5 in minutes
+SNAPSHOT_CACHE_SIZE = MINUTES_PER_DAY  # one day of minutes
+REFRESH_ENV = 'ALIGNMENT_REFRESH'
+REFRESH_LEAD_SECONDS = 5
+
+
+def jd_to_minute(jd: float) -> int:
+    """The nearest whole minute to a UT Julian Day, counted from JD 0."""
+    return round(jd * MINUTES_PER_DAY)
+
+
+def minute_to_jd(minute: int) -> float:
+    return minute / MINUTES_PER_DAY
+
+
+def current_minute() -> int:
+    """The minute (as counted by jd_to_minute) that is running now."""
+    return UNIX_EPOCH_MINUTE + int(time.time() // 60)
+
+
+class SnapshotCache:
+    """
+    Coalescing LRU of transit snapshots in front of an async fetch function,
+    fetch(minute, ayanamsa_type) -> snapshot dict.
+    """
+
+    def __init__(self, fetch: Callable[[int, str], Awaitable[Dict[str, Any]]],
+                 maxsize: int = SNAPSHOT_CACHE_SIZE):
+        self._fetch = fetch
+        self.maxsize = maxsize
+        self._snapshots: 'OrderedDict[Tuple[int, str], Dict[str, Any]]' = OrderedDict()
+        self._pending: Dict[Tuple[int, str], asyncio.Future] = {}
+        self._stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'failures': 0, 'refreshed': 0}
+        self._refresh_task = None
+
+    async def get(self, jd: float, ayanamsa_type: str = DEFAULT_AYANAMSA) -> Dict[str, Any]:
+        """The snapshot for the minute nearest jd."""
+        return await self.get_minute(jd_to_minute(jd), ayanamsa_type)
+
+    async def get_minute(self, minute: int, ayanamsa_type: str = DEFAULT_AYANAMSA) -> Dict[str, Any]:
+        key = (minute, ayanamsa_type)
+        snapshot = self._snapshots.get(key)
+        if snapshot is not None:
+            self._snapshots.move_to_end(key)
+            self._stats['hits'] += 1
+            return snapshot
+
+        task = self._pending.get(key)
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            self._stats['coalesced'] += 1
+        else:
+            # One computation per key; it runs as its own task, so a caller
+            # that goes away does not cancel it for everyone else waiting
+            self._stats['misses'] += 1
+            task = asyncio.ensure_future(self._fetch(minute, ayanamsa_type))
+            task.add_done_callback(partial(self._finish, key))
+            self._pending[key] = task
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        if self._pending.get(key) is task:
+            del self._pending[key]
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            self._stats['failures'] += 1
+        else:
+            self._store(key, task.result())
+
+    def _store(self, key, snapshot):
+        self._snapshots[key] = snapshot
+        self._snapshots.move_to_end(key)
+        while len(self._snapshots) > self.maxsize:
+            self._snapshots.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Background refresh of "now"
+    # ------------------------------------------------------------------
+
+    async def _refresh_loop(self, ayanamsa_type: str, lead: float):
+        while True:
+            minute = current_minute()
+            for m in (minute, minute + 1):
+                if (m, ayanamsa_type) not in self._snapshots:
+                    try:
+                        await self.get_minute(m, ayanamsa_type)
+                        self._stats['refreshed'] += 1
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception:
+                        logger.exception("Transit snapshot refresh failed")
+
+            # Wake up lead seconds before the next minute starts
+            now = time.time()
+            wake = (now // 60 + 1) * 60 - lead
+            if wake <= now:
+                wake += 60
+            await asyncio.sleep(wake - now)
+
+    def start_refresh(self, ayanamsa_type: str = DEFAULT_AYANAMSA, lead: float = REFRESH_LEAD_SECONDS):
+        """Keep the current and the next minute computed ahead of requests."""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.get_running_loop().create_task(self._refresh_loop(ayanamsa_type, lead))
+
+    async def stop_refresh(self):
+        task, self._refresh_task = self._refresh_task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._stats['hits'] + self._stats['misses'] + self._stats['coalesced']
+        return {
+            **self._stats,
+            'size': len(self._snapshots),
+            'maxsize': self.maxsize,
+            'pending': len(self._pending),
+            'hit_rate': round((lookups - self._stats['misses']) / lookups, 4) if lookups else None,
+            'refreshing': self._refresh_task is not None and not self._refresh_task.done(),
+        }
+
+
+def refresh_enabled() -> bool:
+    return os.getenv(REFRESH_ENV, '').lower() in ('1', 'true', 'yes')
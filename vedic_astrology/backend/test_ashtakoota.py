@@ -0,0 +1,64 @@
+"""Ashtakoota tables against hand-worked scores, and the batch endpoint."""
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+import main
+from ashtakoota import (
+    KOOTAS, TOTAL_MAX, NAKSHATRA_SPAN, ashtakoota, ashtakoota_batch, koota_scores, koota_table, moon_profile
+)
+from calculator import build_chart_context, calculate_chart
+
+
+def test_hand_worked_pair():
+    # Groom: Ashwini pada 1 (Aries); bride: Rohini pada 1 (Taurus)
+    result = ashtakoota(1.0, 3 * NAKSHATRA_SPAN + 1.0)
+    scores = {k: v['score'] for k, v in result['kootas'].items()}
+    assert scores == {'varna': 1, 'vashya': 2, 'tara': 1.5, 'yoni': 3, 'graha_maitri': 3,
+                      'gana': 6, 'bhakoot': 0, 'nadi': 8}
+    assert result['total'] == 24.5 and result['bhakoot_dosha'] and not result['nadi_dosha']
+    assert result['groom']['yoni'] == 'Horse' and result['bride']['yoni'] == 'Serpent'
+
+
+def test_table_properties():
+    table = koota_table()
+    assert table.shape == (len(KOOTAS), 108, 108) and table.dtype == np.int8
+    assert table.sum(axis=0).max() == TOTAL_MAX * 2
+
+    # Same nakshatra means the same nadi: always a Nadi dosha
+    for pada in range(108):
+        assert koota_scores(pada, pada)['nadi'] == 0
+    # Symmetric kootas do not depend on who is the groom
+    for k in ('tara', 'yoni', 'graha_maitri', 'bhakoot', 'nadi'):
+        i = KOOTAS.index(k)
+        assert np.array_equal(table[i], table[i].T)
+
+    # Sagittarius changes from Manava to Chatushpada at 15 degrees
+    assert moon_profile(8 * 9 + 4)['vashya'] == 'Manava'
+    assert moon_profile(8 * 9 + 5)['vashya'] == 'Chatushpada'
+
+
+def test_batch_matches_single_pairs_and_endpoint():
+    rng = np.random.default_rng(2)
+    person, candidates = 123.4, rng.uniform(0, 360, 200)
+    as_groom = ashtakoota_batch(person, candidates, 'groom')
+    as_bride = ashtakoota_batch(person, candidates, 'bride')
+    for lon, g, b in zip(candidates, as_groom, as_bride):
+        assert g['kootas'] == ashtakoota(person, lon)['kootas']
+        assert b['kootas'] == ashtakoota(lon, person)['kootas']
+
+    births = [
+        dict(year=1990, month=1, day=1, hour=12, minute=0, latitude=28.61, longitude=77.20),
+        dict(year=1992, month=8, day=20, hour=14, minute=45, latitude=19.07, longitude=72.88),
+    ]
+    moons = [calculate_chart(context=build_chart_context(**b))['planets']['Moon']['longitude'] for b in births]
+    client = TestClient(main.app)
+    response = client.post("/api/match/ashtakoota", json={
+        "person": births[0],
+        "candidates": [{"id": "born", "birth_data": births[1]}, {"id": "stored", "longitudes": {"Moon": moons[1]}}],
+    })
+    assert response.status_code == 200
+    results = response.json()['results']
+    expected = ashtakoota(moons[0], moons[1])
+    assert [r['id'] for r in results] == ['born', 'stored']
+    assert all(r['total'] == expected['total'] and r['kootas'] == expected['kootas'] for r in results)
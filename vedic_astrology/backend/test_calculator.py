@@ -0,0 +1,162 @@
+import pytest
+from calculator import calculate_chart
+from batch import calculate_charts_batch, batch_chart_summary
+
+BIRTHS = [
+    (1990, 1, 1, 12, 0, 28.61, 77.20),
+    (1985, 7, 23, 4, 45, 40.71, -74.01),
+    (2003, 11, 9, 21, 10, -33.87, 151.21),
+]
+
+
+def test_batch_matches_single_chart():
+    batch = calculate_charts_batch(*zip(*BIRTHS))
+    for i, birth in enumerate(BIRTHS):
+        chart = calculate_chart(*birth)
+        summary = batch_chart_summary(batch, i)
+        assert summary['ascendant']['sign'] == chart['ascendant']['sign']
+        for name, planet in chart['planets'].items():
+            assert abs(summary['planets'][name]['longitude'] - planet['longitude']) < 1e-3
+            assert summary['planets'][name]['sign'] == planet['sign']
+            assert summary['planets'][name]['nakshatra'] == planet['nakshatra']['name']
+            assert summary['planets'][name]['pada'] == planet['nakshatra']['pada']
+            assert summary['planets'][name]['house'] == planet['house']
+            assert summary['planets'][name]['retrograde'] == planet['retrograde']
+
+
+def test_ephemeris_table_matches_swiss_ephemeris(tmp_path):
+    import numpy as np
+    import swisseph as swe
+    import ephemeris
+    from calculator import get_body_position
+
+    start = swe.julday(2000, 1, 1, 0.0)
+    ephemeris.build_table(str(tmp_path), start, start + 64)
+    table = ephemeris.EphemerisTable(str(tmp_path))
+
+    swe.set_sid_mode(swe.SIDM_LAHIRI)
+    jds = start + np.random.default_rng(7).uniform(0, 64, 50)
+    for name in ephemeris.TABLE_LAYOUT:
+        lons, speeds = table.positions(jds, name)
+        for jd, lon, speed in zip(jds, lons, speeds):
+            exact_lon, exact_speed = get_body_position(float(jd), name)
+            assert abs((lon - exact_lon + 180) % 360 - 180) < ephemeris.MAX_LONGITUDE_ERROR
+            assert abs(speed - exact_speed) < ephemeris.MAX_SPEED_ERROR
+            assert table.position(float(jd), name) == pytest.approx((lon, speed))
+
+    assert table.position(start - 1, 'Moon') is None
+    assert table.positions(np.array([start, start + 100]), 'Moon') is None
+
+
+def test_ephemeris_table_leaves_source_steps_to_swiss_ephemeris(tmp_path, monkeypatch):
+    import numpy as np
+    import swisseph as swe
+    import ephemeris
+    from batch import body_positions
+    from calculator import get_body_position
+
+    # The Moshier series for Saturn steps by a few arcseconds on 1975-07-15
+    start = swe.julday(1975, 6, 25, 0.0)
+    meta = ephemeris.build_table(str(tmp_path), start, start + 64)
+    assert meta['bodies']['Saturn']['fallback_segments'] == 1
+    assert meta['bodies']['Saturn']['max_longitude_error'] < ephemeris.SEGMENT_LONGITUDE_ERROR
+
+    jds = start + np.random.default_rng(2).uniform(0, 64, 200)
+    exact = [get_body_position(float(jd), 'Saturn') for jd in jds]
+
+    monkeypatch.setattr(ephemeris, '_table', ephemeris.EphemerisTable(str(tmp_path)))
+    step = swe.julday(1975, 7, 15, 0.0)
+    assert ephemeris.lookup(step, 'Saturn') is None and ephemeris.lookup(step, 'Jupiter') is not None
+    lons, _ = ephemeris.lookup_many(jds, 'Saturn')
+    assert 0 < np.isnan(lons).sum() < len(jds)
+
+    # Batches take the uncovered dates from Swiss Ephemeris and the rest from the table
+    for lon, speed, (exact_lon, exact_speed) in zip(*body_positions(jds, 'Saturn'), exact):
+        assert abs((lon - exact_lon + 180) % 360 - 180) < ephemeris.SEGMENT_LONGITUDE_ERROR
+        assert abs(speed - exact_speed) < ephemeris.SEGMENT_SPEED_ERROR
+
+
+def test_timezone_resolution_matches_polygon_lookup(tmp_path, monkeypatch):
+    import numpy as np
+    import timezones
+
+    rng = np.random.default_rng(3)
+    points = [(28.61, 77.20), (40.71, -74.01), (49.0, -110.0)] + [
+        (float(lat), float(lng)) for lat, lng in zip(rng.uniform(-60, 70, 200), rng.uniform(-180, 180, 200))
+    ]
+
+    timezones.build_raster(str(tmp_path), resolution=10)
+    monkeypatch.setattr(timezones, '_raster', timezones.TimezoneRaster(str(tmp_path)))
+    for lat, lng in points:
+        assert timezones.resolve_timezone(lat, lng) == timezones._polygon_lookup(lat, lng)
+
+    monkeypatch.setattr(timezones, '_raster', None)
+    for lat, lng in points * 2:
+        assert timezones.resolve_timezone(lat, lng) == timezones._polygon_lookup(lat, lng)
+    assert timezones.timezone_cache_stats()['grid_hits'] > 0
+
+
+def test_timezone_resolution_at_land_borders(tmp_path, monkeypatch):
+    import numpy as np
+    import timezones
+
+    # Points whose cell corners and centre all lie in a neighbouring zone
+    assert timezones.resolve_timezone(38.0891, -86.4483) == 'America/Indiana/Tell_City'
+    assert timezones.resolve_timezone(47.4616, -115.6493) == 'America/Los_Angeles'
+
+    rng = np.random.default_rng(5)
+    points = [
+        (float(lat), float(lng))
+        for south, north, west, east in ((37.5, 39.5, -88.5, -85.5),    # Indiana / Kentucky
+                                         (45.5, 49.0, -117.5, -114.0))  # Idaho panhandle
+        for lat, lng in zip(rng.uniform(south, north, 3000), rng.uniform(west, east, 3000))
+    ]
+    for lat, lng in points:
+        assert timezones.resolve_timezone(lat, lng) == timezones._polygon_lookup(lat, lng)
+
+    timezones.build_raster(str(tmp_path), resolution=1.0)
+    raster = timezones.TimezoneRaster(str(tmp_path))
+    served = [(lat, lng) for lat, lng in points if raster.zone_at(lat, lng) is not None]
+    assert served
+    for lat, lng in served:
+        assert raster.zone_at(lat, lng) == timezones._polygon_lookup(lat, lng)
+
+
+def test_timezone_grid_falls_back_without_polygon_internals(monkeypatch):
+    import timezones
+
+    class LookupOnly:
+        """A TimezoneFinder without the polygon arrays border_cells reads."""
+        timezone_at = staticmethod(timezones.tf.timezone_at)
+
+    monkeypatch.setattr(timezones, 'tf', LookupOnly())
+    timezones._border_tile.cache_clear()
+    timezones._grid_timezone.cache_clear()
+    try:
+        assert timezones.resolve_timezone(28.61, 77.20) == 'Asia/Kolkata'
+        assert timezones.resolve_timezone(38.0891, -86.4483) == 'America/Indiana/Tell_City'
+        assert timezones.timezone_cache_stats()['border_errors'] > 0
+    finally:
+        timezones._border_tile.cache_clear()
+        timezones._grid_timezone.cache_clear()
+
+
+def test_shared_context_computes_each_body_once(monkeypatch):
+    import calculator
+    from calculator import build_chart_context, calculate_dasha, calculate_current_alignment
+
+    birth = BIRTHS[0]
+    context = build_chart_context(*birth)
+
+    calls = []
+    real_position = calculator.get_body_position
+    monkeypatch.setattr(calculator, 'get_body_position', lambda jd, name, *args: calls.append(name) or real_position(jd, name, *args))
+
+    chart = calculate_chart(context=context)
+    dasha = calculate_dasha(context=context)
+    alignment = calculate_current_alignment(context=context)
+
+    assert sorted(calls) == sorted(calculator.PLANETS)
+    assert chart == calculate_chart(*birth)
+    assert dasha['maha_dashas'] == calculate_dasha(*birth)['maha_dashas']
+    assert alignment['tithi'] == calculate_current_alignment(*birth)['tithi']
@@ -0,0 +1,47 @@
+"""The NDJSON batch chart endpoint against /api/chart."""
+
+import json
+
+from fastapi.testclient import TestClient
+
+import main
+from workers import chart_response_task
+
+BIRTHS = [
+    dict(year=1990, month=1, day=1, hour=12, minute=0, latitude=28.61, longitude=77.20),
+    dict(year=1975, month=3, day=21, hour=23, minute=59, latitude=51.51, longitude=-0.13),
+    dict(year=2001, month=9, day=9, hour=6, minute=30, latitude=-33.87, longitude=151.21, ayanamsa_type='Raman'),
+]
+
+
+def results(response):
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('application/x-ndjson')
+    return {line['index']: line for line in map(json.loads, response.text.splitlines())}
+
+
+def test_batch_streams_every_record_with_per_item_errors():
+    client = TestClient(main.app)
+    records = BIRTHS * 20  # several chunks
+    body = [json.dumps(b) for b in records[:30]] + ['{not json', json.dumps({**BIRTHS[0], 'month': 13})] + \
+        [json.dumps(b) for b in records[30:]]
+    lines = results(client.post("/api/chart/batch?vargas=D9", content="\n".join(body) + "\n",
+                                headers={"Content-Type": "application/x-ndjson"}))
+
+    assert sorted(lines) == list(range(len(body)))
+    assert 'error' in lines[30] and 'month' in lines[31]['error']
+    expected = [chart_response_task({'ayanamsa_type': 'Lahiri', **b}, ['D1', 'D9']) for b in BIRTHS]
+    inputs = records[:30] + [None, None] + records[30:]
+    for index, birth in enumerate(inputs):
+        if birth is not None:
+            assert lines[index]['chart'] == expected[BIRTHS.index(birth)]
+
+
+def test_batch_accepts_a_json_array():
+    client = TestClient(main.app)
+    lines = results(client.post("/api/chart/batch?vargas=none", json=BIRTHS + [{"year": 1990}, None]))
+    assert [lines[i]['chart']['meta']['ayanamsa_type'] for i in range(3)] == ['Lahiri', 'Lahiri', 'Raman']
+    assert 'error' in lines[3] and 'error' in lines[4]
+
+    assert client.post("/api/chart/batch", json={"births": BIRTHS}).status_code == 400
+    assert client.post("/api/chart/batch?vargas=D99", json=BIRTHS).status_code == 400
@@ -0,0 +1,89 @@
+"""Chart cache keys, the SQLite tier's persistence and eviction, and endpoint hits."""
+
+import time
+
+from fastapi.testclient import TestClient
+
+import main
+from chart_cache import ChartCache, cache_key
+
+BIRTH = dict(year=1990, month=1, day=1, hour=12, minute=0, latitude=28.61, longitude=77.20, ayanamsa_type='Lahiri')
+
+
+def test_keys_are_canonical():
+    key = cache_key('chart', BIRTH)
+    # Field order and float noise below the canonical precision do not matter
+    assert cache_key('chart', dict(reversed(list(BIRTH.items())))) == key
+    assert cache_key('chart', {**BIRTH, 'latitude': 28.6100000001}) == key
+    # Everything that changes the result does
+    assert cache_key('chart', {**BIRTH, 'ayanamsa_type': 'Raman'}) != key
+    assert cache_key('chart', {**BIRTH, 'minute': 1}) != key
+    assert cache_key('chart_response', BIRTH, vargas=['D9']) != cache_key('chart_response', BIRTH, vargas=['D10'])
+    assert cache_key('dasha', BIRTH) != key
+
+
+def test_disk_tier_persists_and_evicts(tmp_path):
+    path = str(tmp_path / "charts.sqlite3")
+    cache = ChartCache(maxsize=2, path=path)
+    for i in range(5):
+        cache.put(f"k{i}", 'chart', {'n': i, 'pad': 'x' * 100})
+    assert cache.stats()['memory_evictions'] == 3
+
+    # A new process opening the same file sees every entry
+    reopened = ChartCache(maxsize=2, path=path)
+    assert reopened.get('k0') == {'n': 0, 'pad': 'x' * 100}
+    assert reopened.stats()['disk_hits'] == 1
+    assert reopened.get('k0') is not None and reopened.stats()['memory_hits'] == 1
+    assert reopened.get('missing') is None and reopened.stats()['misses'] == 1
+
+    # Size bound: least recently used rows go first (k0 was just read)
+    reopened.max_bytes = 2 * 120
+    reopened.sweep()
+    assert reopened.stats()['disk']['rows'] == 2
+    fresh = ChartCache(maxsize=0, path=path)
+    assert fresh.get('k0') is not None and fresh.get('k1') is None
+
+    # Age bound
+    aged = ChartCache(maxsize=0, path=path, max_age=0.05)
+    time.sleep(0.1)
+    assert aged.get('k0') is None and aged.stats()['expired'] == 1
+
+
+def test_endpoints_hit_the_cache(monkeypatch):
+    monkeypatch.setattr(main, 'chart_cache', ChartCache())
+    client = TestClient(main.app)
+
+    first = client.post("/api/chart/basic", json=BIRTH)
+    second = client.post("/api/chart/basic", json=BIRTH)
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+
+    as_of = {"as_of": "2026-01-01T00:00:00Z"}
+    assert client.post("/api/dasha", params=as_of, json=BIRTH).json() == \
+        client.post("/api/dasha", params=as_of, json=BIRTH).json()
+
+    # Other moments (and now) reuse the cached natal timeline
+    later = client.post("/api/dasha", params={"as_of": "2031-06-01T00:00:00Z"}, json=BIRTH).json()
+    now = client.post("/api/dasha", json=BIRTH).json()
+    assert later['current_prana_dasha'] != now['current_prana_dasha']
+    assert later['maha_dashas'] == now['maha_dashas']
+
+    stats = client.get("/api/metrics").json()['chart_cache']
+    assert stats['misses'] == 2
+    assert stats['memory_hits'] == 4
+    assert stats['size'] == 2
+
+
+def test_calendar_endpoint_hits_the_cache(monkeypatch):
+    monkeypatch.setattr(main, 'chart_cache', ChartCache())
+    client = TestClient(main.app)
+
+    request = {"year": 2026, "month": 10, "latitude": 28.6, "longitude": 77.2}
+    first = client.post("/api/calendar", json=request)
+    second = client.post("/api/calendar", json=request)
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json() and len(first.json()['days']) == 31
+
+    stats = client.get("/api/metrics").json()['chart_cache']
+    assert stats['misses'] == 1
+    assert stats['memory_hits'] == 1
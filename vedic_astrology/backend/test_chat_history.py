@@ -0,0 +1,114 @@
+"""Chat history budget: stable folding, background summaries, and flat request sizes."""
+
+import time
+import asyncio
+import threading
+
+import httpx
+
+import interpreter
+import main
+from chat_history import SUMMARY_HEADER, HistoryCompactor
+from chat_sessions import ChatSessionStore
+from test_interpreter import fake_llm  # noqa: F401 (fixture)
+
+SYSTEM = {"role": "system", "content": "chart " * 50}
+
+
+def conversation(turns: int):
+    history = []
+    for i in range(turns):
+        history.append({"role": "user", "content": f"question {i} " + "q" * (i * 7 % 60)})
+        history.append({"role": "assistant", "content": f"answer {i} " + "a" * (i * 13 % 120)})
+    return history
+
+
+def test_folding_is_stable_as_the_conversation_grows():
+    async def summarize(previous, messages):
+        return "unused"
+
+    compactor = HistoryCompactor(summarize, len, budget=400)
+    history = conversation(40)
+    final_blocks, _ = compactor.plan(history)
+    assert len(final_blocks) > 3
+
+    for end in range(2, len(history) + 1, 2):
+        blocks, live = compactor.plan(history[:end])
+        assert blocks == final_blocks[:len(blocks)]
+        assert sum(compactor.tokens(turn) for turn in live) <= compactor.budget
+
+
+def test_summaries_are_made_off_the_request_path():
+    calls = []
+    loop_reads = []
+
+    async def summarize(previous, messages):
+        calls.append(previous)
+        await asyncio.sleep(0.05)
+        return f"summary {len(calls)}"
+
+    async def run():
+        compactor = HistoryCompactor(summarize, len, budget=400)
+        cache_get = compactor.cache.get
+
+        def get(key):
+            loop_reads.append(threading.current_thread() is threading.main_thread())
+            return cache_get(key)
+
+        compactor.cache.get = get
+        history = []
+        for i, message in enumerate(conversation(30)[::2]):
+            user = {"role": "user", "content": message['content']}
+            started = time.perf_counter()
+            sent = await compactor.prepare([SYSTEM, *history, user])
+            assert time.perf_counter() - started < 0.05  # never waits for a summary
+
+            # The chart context and the new message are always sent as they are
+            assert sent[0] is SYSTEM and sent[-1] is user
+            assert compactor.tokens(sent[1:-1]) <= compactor.budget + 100
+            history += [user, {"role": "assistant", "content": f"answer {i}"}]
+            if i % 5 == 4:
+                await compactor.wait()
+
+        await compactor.wait()
+        sent = await compactor.prepare([SYSTEM, *history, {"role": "user", "content": "next"}])
+        return compactor, sent
+
+    compactor, sent = asyncio.run(run())
+    assert sent[1]['role'] == 'system' and sent[1]['content'].startswith(SUMMARY_HEADER)
+    # The running summary is built on the previous one
+    assert calls[0] is None and all(previous is not None for previous in calls[1:])
+    stats = compactor.stats()
+    assert stats['summary_hits'] >= 1 and stats['summary_errors'] == 0 and stats['pending'] == 0
+    # The summary cache may be SQLite: it is never read on the event loop
+    assert loop_reads and not any(loop_reads)
+
+
+def test_long_session_requests_stay_flat(fake_llm, monkeypatch):
+    async def summarize(previous, messages):
+        # The fake model echoes its whole prompt; a real summary has a bounded length
+        return (await interpreter.summarize_history(previous, messages))[-200:]
+
+    compactor = HistoryCompactor(summarize, len, budget=600)
+    monkeypatch.setattr(interpreter, 'history_compactor', compactor)
+    monkeypatch.setattr(main, 'chat_sessions', ChatSessionStore())
+    fake_llm.delay = 0
+
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            session_id = (await client.post("/api/chat/sessions", json={"system": "chart"})).json()['session_id']
+            for i in range(25):
+                response = await client.post(f"/api/chat/sessions/{session_id}/messages",
+                                             json={"message": f"question {i} " + "x" * 80})
+                assert response.status_code == 200
+                await compactor.wait()
+            return (await client.get(f"/api/chat/sessions/{session_id}")).json()
+
+    session = asyncio.run(run())
+    # The session keeps every message; the requests do not grow with it
+    assert len(session['messages']) == 1 + 2 * 25
+    chat_prompts = [prompt for prompt in fake_llm.prompts if prompt.startswith("system:chart\n")]
+    assert len(chat_prompts) == 25
+    assert max(len(prompt) for prompt in chat_prompts[10:]) < 2 * compactor.budget
+    assert SUMMARY_HEADER in chat_prompts[-1]
@@ -0,0 +1,73 @@
+"""Server-side chat sessions: stable prompt prefixes, per-turn usage, streaming and errors."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from chat_sessions import ChatSessionStore
+from test_interpreter import BIRTH, fake_llm, sse_events  # noqa: F401 (fixture)
+
+
+@pytest.fixture
+def client(fake_llm, monkeypatch):
+    monkeypatch.setattr(main, 'chat_sessions', ChatSessionStore())
+    return TestClient(main.app)
+
+
+def test_turns_extend_the_cached_prefix(client, fake_llm):
+    session_id = client.post("/api/chat/sessions", json={"system": "chart"}).json()['session_id']
+
+    turns = [client.post(f"/api/chat/sessions/{session_id}/messages",
+                         json={"message": f"q{i}", "context": f"day {i}"}).json()
+             for i in range(3)]
+    assert [turn['response'] for turn in turns] == ["reply to: day 0\n\nq0", "reply to: day 1\n\nq1",
+                                                    "reply to: day 2\n\nq2"]
+
+    # Every request starts with the whole previous request, byte for byte
+    for previous, request in zip(fake_llm.prompts, fake_llm.prompts[1:]):
+        assert request.startswith(previous)
+    for previous, turn in zip(turns, turns[1:]):
+        assert turn['usage']['cached_tokens'] == previous['usage']['prompt_tokens']
+        assert turn['usage']['uncached_tokens'] == turn['usage']['prompt_tokens'] - turn['usage']['cached_tokens']
+    assert turns[-1]['totals']['turns'] == 3
+
+    session = client.get(f"/api/chat/sessions/{session_id}").json()
+    assert session['messages'][0] == {"role": "system", "content": "chart"}
+    assert [m['role'] for m in session['messages'][1:]] == ['user', 'assistant'] * 3
+    assert [turn['cached_tokens'] for turn in session['turns']] == [turn['usage']['cached_tokens'] for turn in turns]
+    assert client.get("/api/metrics").json()['chat_sessions']['turns'] == 3
+
+
+def test_streamed_turn_and_errors(client, fake_llm):
+    session_id = client.post("/api/chat/sessions", json={
+        "system": "chart", "history": [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}]
+    }).json()['session_id']
+
+    events = sse_events(client.post(f"/api/chat/sessions/{session_id}/messages/stream", json={"message": "q"}))
+    assert [e for e, _ in events] == ['reasoning', 'reasoning', 'content', 'content', 'done']
+    done = events[-1][1]
+    assert done['response'] == "reply to: q" and done['usage']['prompt_tokens'] > 0
+    assert done['totals']['turns'] == 1
+    assert len(client.get(f"/api/chat/sessions/{session_id}").json()['messages']) == 5
+
+    # A failed stream stores nothing and frees the session for the next turn
+    fake_llm.fail_stream = True
+    events = sse_events(client.post(f"/api/chat/sessions/{session_id}/messages/stream", json={"message": "q2"}))
+    assert events[-1][0] == 'error'
+    assert len(client.get(f"/api/chat/sessions/{session_id}").json()['messages']) == 5
+
+    # One turn at a time
+    main.chat_sessions.get(session_id).acquire()
+    assert client.post(f"/api/chat/sessions/{session_id}/messages", json={"message": "q3"}).status_code == 409
+    main.chat_sessions.get(session_id).release()
+
+    assert client.delete(f"/api/chat/sessions/{session_id}").json() == {"deleted": True}
+    assert client.post(f"/api/chat/sessions/{session_id}/messages", json={"message": "q"}).status_code == 404
+    assert client.post("/api/chat/sessions", json={}).status_code == 400
+
+
+def test_chart_session(client):
+    response = client.post("/api/chat/sessions", json={"birth_data": BIRTH}).json()
+    system = client.get(f"/api/chat/sessions/{response['session_id']}").json()['messages'][0]['content']
+    assert "## Birth Chart Data (compact)" in system and "D9/Navamsa" in system
+    assert response['prompt_tokens'] > 0
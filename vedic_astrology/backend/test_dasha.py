@@ -0,0 +1,108 @@
+"""Dasha timeline engine against the original list-based functions and against itself."""
+
+from datetime import datetime, timedelta
+
+import pytz
+
+from calculator import build_chart_context, calculate_dasha, calculate_maha_dasha, calculate_antar_dasha
+from dasha import DashaTimeline, LEVELS
+
+BIRTHS = [
+    (1990, 1, 1, 12, 0, 28.61, 77.20),
+    (1975, 3, 21, 23, 59, 51.51, -0.13),
+    (2001, 9, 9, 6, 30, -33.87, 151.21),
+]
+
+
+def timelines():
+    for birth in BIRTHS:
+        context = build_chart_context(*birth)
+        moon_lon, _ = context.position('Moon')
+        yield context.local_dt, moon_lon, DashaTimeline(context.local_dt, moon_lon)
+
+
+def strip_level(periods):
+    return [{k: v for k, v in p.items() if k != 'level'} for p in periods]
+
+
+def test_maha_and_antar_match_original():
+    for birth_date, moon_lon, timeline in timelines():
+        maha = calculate_maha_dasha(birth_date, moon_lon)
+        assert strip_level(timeline.maha_dashas()) == maha
+
+        # Full mahas divide exactly; the balance maha's last antar is stretched to end with the maha
+        for i, period in enumerate(maha):
+            antars = strip_level(timeline.sub_periods((i,)))
+            expected = calculate_antar_dasha(period)
+            assert antars[:8] == expected[:8]
+            if i > 0:
+                assert antars == expected
+            assert antars[-1]['end'] == period['end']
+
+
+def test_running_matches_linear_scan():
+    for birth_date, moon_lon, timeline in timelines():
+        maha = calculate_maha_dasha(birth_date, moon_lon)
+        for years in (0, 3.3, 17.9, 45.01, 99.5):
+            moment = birth_date + timedelta(days=years * 365.25)
+            running = timeline.running(moment)
+            assert [p['level'] for p in running] == list(LEVELS)
+
+            # Each level is the one period of the streamed level that contains the moment
+            for depth, period in enumerate(running, start=1):
+                window = list(timeline.iter_periods(moment, moment, depth))
+                assert period in window
+
+            # Same maha as a linear scan over the original list
+            scan = next(p for p in maha if p['start'] <= moment.isoformat() <= p['end'])
+            assert strip_level(running[:1])[0] == scan
+
+
+def test_streamed_levels_tile_the_window():
+    _, _, timeline = next(timelines())
+    start = timeline.birth_date + timedelta(days=3000)
+    end = start + timedelta(days=400)
+    for depth in range(1, 6):
+        periods = list(timeline.iter_periods(start, end, depth))
+        assert periods[0]['start'] <= start.isoformat() and periods[-1]['end'] >= end.isoformat()
+        for before, after in zip(periods, periods[1:]):
+            assert before['end'] == after['start']
+        assert all(p['level'] == LEVELS[depth - 1] for p in periods)
+
+
+def test_outside_cycle_and_boundaries():
+    _, _, timeline = next(timelines())
+    assert timeline.running(timeline.birth_date - timedelta(days=1)) == []
+    assert timeline.running(timeline.birth_date + timedelta(days=121 * 365.25)) == []
+
+    # A boundary instant belongs to the period that ends there (first match)
+    second = timeline.maha_dashas()[1]
+    boundary = datetime.fromisoformat(second['start']).astimezone(pytz.UTC)
+    assert timeline.running(boundary, depth=1)[0]['planet'] == timeline.maha_dashas()[0]['planet']
+
+
+def test_as_of_is_deterministic_and_natal_part_is_cached():
+    context = build_chart_context(*BIRTHS[0])
+    as_of = datetime(2030, 6, 1, 12, 0, tzinfo=pytz.UTC)
+
+    first = calculate_dasha(context=context, as_of=as_of)
+    second = calculate_dasha(*BIRTHS[0], as_of=as_of.replace(tzinfo=None))
+    assert first == second
+    assert first['as_of'] == as_of.isoformat()
+    assert first['current_maha_dasha']['start'] <= '2030-06-01' <= first['current_maha_dasha']['end']
+
+    # Different moments share one natal timeline
+    later = calculate_dasha(context=context, as_of=as_of + timedelta(days=3650))
+    assert later['maha_dashas'] is first['maha_dashas']
+    assert later['current_prana_dasha'] != first['current_prana_dasha']
+
+
+def test_same_instant_in_different_zones_keeps_local_dates():
+    # 12:00 in Delhi (+05:30) and 06:30 in London (+00:00) are the same instant
+    delhi = calculate_dasha(*BIRTHS[0])
+    london = calculate_dasha(1990, 1, 1, 6, 30, 51.51, -0.13)
+
+    assert delhi['moon_longitude'] == london['moon_longitude']
+    assert delhi['maha_dashas'][0]['start'] == '1990-01-01T12:00:00+05:30'
+    assert london['maha_dashas'][0]['start'] == '1990-01-01T06:30:00+00:00'
+    assert [p['planet'] for p in delhi['maha_dashas']] == [p['planet'] for p in london['maha_dashas']]
@@ -0,0 +1,93 @@
+"""Transit event search against brute-force sampling, and the Panchang calendar built on it."""
+
+import swisseph as swe
+import pytest
+
+import calculator
+import events
+from events import quantity, find_crossing, next_boundary, previous_boundary
+from panchang import calculate_panchang_calendar
+
+START_JD = swe.julday(2024, 3, 10, 6.5)
+ONE_SECOND = 1 / 86400
+
+CASES = [
+    ('tithi', None), ('karana', None), ('yoga', None),
+    ('nakshatra', 'Moon'), ('pada', 'Moon'), ('sign', 'Sun'),
+    ('sign', 'Mercury'), ('nakshatra', 'Venus'), ('sign', 'Mars'), ('sign', 'Rahu'),
+]
+
+
+def segment_at(q, jd):
+    value, _ = events._evaluate(q, jd, 'Lahiri')
+    return int(value // q.width) % q.count
+
+
+def brute_force(q, jd, direction, step_days):
+    """First segment change found by fixed stepping, bisected to a millisecond."""
+    start = segment_at(q, jd)
+    t = jd
+    while segment_at(q, t + direction * step_days) == start:
+        t += direction * step_days
+    inside, outside = t, t + direction * step_days
+    while abs(outside - inside) > ONE_SECOND / 1000:
+        mid = (inside + outside) / 2
+        if segment_at(q, mid) == start:
+            inside = mid
+        else:
+            outside = mid
+    return (inside + outside) / 2
+
+
+@pytest.mark.parametrize("kind,body", CASES)
+def test_crossings_match_brute_force(kind, body):
+    q = quantity(kind, body)
+    # Step well below the shortest possible segment duration
+    step = q.width / max(abs(r) for r in q.rate_bounds()) / 50
+    for direction in (1, -1):
+        crossing = find_crossing(q, START_JD, direction)
+        assert abs(crossing.jd - brute_force(q, START_JD, direction, step)) < ONE_SECOND
+        assert segment_at(q, crossing.jd - ONE_SECOND) == crossing.before
+        assert segment_at(q, crossing.jd + ONE_SECOND) == crossing.after
+
+
+def test_tithi_end_takes_few_evaluations(monkeypatch):
+    calls = []
+    real = calculator.get_body_position
+    monkeypatch.setattr(events, 'get_body_position', lambda *args: calls.append(args) or real(*args))
+    for day in range(30):
+        calls.clear()
+        next_boundary(START_JD + day, 'tithi')
+        assert len(calls) <= 2 * 4  # Moon and Sun per evaluation
+
+
+def test_alignment_elements_contain_the_moment():
+    alignment = calculator.calculate_current_alignment(2026, 10, 17, 9, 0, 28.6, 77.2)
+    moment = '2026-10-17T09:00:00+05:30'
+    for element in ('tithi', 'moon_nakshatra', 'yoga', 'karana'):
+        assert alignment[element]['start'] <= moment < alignment[element]['end']
+    for transit in alignment['transits'].values():
+        assert transit['sign_ends'] > moment
+
+
+def test_previous_and_next_are_consecutive_boundaries():
+    end = next_boundary(START_JD, 'nakshatra', 'Moon')
+    following_start = previous_boundary(end.jd + 0.01, 'nakshatra', 'Moon')
+    assert abs(following_start.jd - end.jd) < ONE_SECOND
+    with pytest.raises(ValueError):
+        quantity('sign', 'Pluto')
+
+
+def test_calendar_days_match_alignment():
+    calendar = calculate_panchang_calendar(2026, 10, 28.6, 77.2)
+    assert len(calendar['days']) == 31 and calendar['timezone'] == 'Asia/Kolkata'
+    for day in (1, 17, 31):
+        alignment = calculator.calculate_current_alignment(2026, 10, day, 6, 0, 28.6, 77.2)
+        entry = calendar['days'][day - 1]
+        assert entry['date'] == f"2026-10-{day:02d}" and entry['vara'] == alignment['vara']
+        for element in ('tithi', 'moon_nakshatra', 'yoga', 'karana'):
+            expected = {k: v for k, v in alignment[element].items() if k != 'start'}
+            assert entry[element] == expected
+
+    # Same timezone, different coordinates: served from the month cache
+    assert calculate_panchang_calendar(2026, 10, 28.7, 77.3)['days'] == calendar['days']
@@ -0,0 +1,176 @@
+"""LLM calls: the concurrency gate, the async and the SSE endpoints, against a fake client."""
+
+import os
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import interpreter
+import main
+from chart_cache import ChartCache
+from interpreter import LLMBusy, LLMGate
+
+BIRTH = dict(year=1990, month=1, day=1, hour=12, minute=0, latitude=28.61, longitude=77.20)
+
+
+def chunk(reasoning=None, content=None):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(reasoning_content=reasoning, content=content))])
+
+
+class FakeCompletions:
+    """
+    Stands in for client.chat.completions; records peak concurrency. Usage
+    counts a character as a token and, like a provider's prefix cache,
+    reports the longest prefix shared with an earlier prompt as cached.
+    """
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.fail_stream = False
+        self.prompts = []
+
+    def _usage(self, messages):
+        prompt = "".join(f"{m['role']}:{m['content']}\n" for m in messages)
+        cached = max((len(os.path.commonprefix([prompt, earlier])) for earlier in self.prompts), default=0)
+        self.prompts.append(prompt)
+        return SimpleNamespace(prompt_tokens=len(prompt), prompt_cache_hit_tokens=cached,
+                               prompt_cache_miss_tokens=len(prompt) - cached, completion_tokens=3)
+
+    async def _stream(self, question, usage):
+        for part in ("think", "ing"):
+            yield chunk(reasoning=part)
+        if self.fail_stream:
+            raise ConnectionError("stream dropped")
+        for part in ("reply to: ", question):
+            yield chunk(content=part)
+        if usage is not None:
+            yield SimpleNamespace(choices=[], usage=usage)
+
+    async def create(self, model, messages, max_tokens, stream=False, stream_options=None):
+        usage = self._usage(messages)
+        if stream:
+            return self._stream(messages[-1]['content'], usage if stream_options else None)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        message = SimpleNamespace(content=f"reply to: {messages[-1]['content']}", reasoning_content="thinking")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    completions = FakeCompletions()
+    monkeypatch.setattr(interpreter, 'client', SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+    return completions
+
+
+def test_gate_bounds_calls_in_flight(fake_llm, monkeypatch):
+    monkeypatch.setattr(interpreter, 'llm_gate', LLMGate(limit=3, max_queue=4))
+
+    async def run():
+        calls = [interpreter.simple_chat(f"q{i}", []) for i in range(9)]
+        return await asyncio.gather(*calls, return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert fake_llm.peak == 3
+    # 3 run, 4 wait, the last 2 are turned away
+    assert sum(isinstance(r, LLMBusy) for r in results) == 2
+    assert all(r['success'] for r in results if not isinstance(r, LLMBusy))
+
+    stats = interpreter.llm_gate.stats()
+    assert stats['completed'] == 7 and stats['rejected'] == 2
+    assert stats['max_waiting'] == 4 and stats['in_flight'] == stats['waiting'] == 0
+
+
+def test_chat_endpoint_and_busy_status(fake_llm, monkeypatch):
+    client = TestClient(main.app)
+    history = [{"role": "system", "content": "chart"}]
+    response = client.post("/api/chat/v2", json={"message": "hello", "history": history})
+    assert response.status_code == 200
+    assert response.json()['response'] == "reply to: hello"
+    assert client.get("/api/metrics").json()['llm']['completed'] >= 1
+
+    monkeypatch.setattr(interpreter, 'llm_gate', LLMGate(limit=0, max_queue=0))
+    assert client.post("/api/chat/v2", json={"message": "hello", "history": history}).status_code == 503
+
+
+def sse_events(response):
+    events = []
+    for message in response.text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in message.split("\n"))
+        events.append((lines['event'], json.loads(lines['data'])))
+    return events
+
+
+def test_chat_stream_forwards_tokens(fake_llm):
+    client = TestClient(main.app)
+    body = {"message": "hello", "history": [{"role": "system", "content": "chart"}]}
+    before = interpreter.llm_gate.stats()
+
+    response = client.post("/api/chat/v2/stream", json=body)
+    assert response.headers['content-type'].startswith('text/event-stream')
+    events = sse_events(response)
+    assert [e for e, _ in events] == ['reasoning', 'reasoning', 'content', 'content', 'done']
+    assert events[-1][1] == {"success": True, "response": "reply to: hello", "reasoning": "thinking"}
+
+    # A stream that fails part way ends with an error event; the slot is released either way
+    fake_llm.fail_stream = True
+    events = sse_events(client.post("/api/chat/v2/stream", json=body))
+    assert events[-1] == ('error', {"error": "stream dropped"})
+
+    stats = interpreter.llm_gate.stats()
+    assert stats['in_flight'] == 0
+    assert stats['completed'] == before['completed'] + 1 and stats['failed'] == before['failed'] + 1
+
+
+def test_interpretations_are_cached_and_coalesced(fake_llm, monkeypatch):
+    monkeypatch.setattr(main, 'interpretation_cache', ChartCache())
+    calls = []
+    create = fake_llm.create
+
+    async def counting_create(**kwargs):
+        calls.append(kwargs)
+        return await create(**kwargs)
+
+    monkeypatch.setattr(fake_llm, 'create', counting_create)
+    fake_llm.delay = 0.3
+
+    async def double_tap():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(client.post("/api/interpret", json=BIRTH) for _ in range(2)))
+
+    first, second = asyncio.run(double_tap())
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+    assert len(calls) == 1
+
+    client = TestClient(main.app)
+    assert client.post("/api/interpret", json=BIRTH).json() == first.json()
+    # The stream endpoint answers from the same cache
+    assert sse_events(client.post("/api/interpret/stream", json=BIRTH)) == [('done', first.json())]
+    # The free-form reading is a different prompt
+    assert client.post("/api/interpret?structured=false", json=BIRTH).status_code == 200
+    assert len(calls) == 2
+
+
+def test_failed_interpretations_are_not_cached(monkeypatch):
+    monkeypatch.setattr(main, 'interpretation_cache', ChartCache())
+
+    async def failing_create(**kwargs):
+        raise ConnectionError("upstream down")
+
+    monkeypatch.setattr(interpreter, 'client', SimpleNamespace(chat=SimpleNamespace(
+        completions=SimpleNamespace(create=failing_create))))
+    client = TestClient(main.app)
+    assert client.post("/api/interpret", json=BIRTH).status_code == 500
+    assert main.interpretation_cache.stats()['stores'] == 0
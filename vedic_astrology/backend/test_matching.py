@@ -0,0 +1,99 @@
+"""Vectorized compatibility ranking against calculate_synastry_pair."""
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+import main
+from batch import BODY_NAMES
+from calculator import SIGNS, build_chart_context, calculate_chart, calculate_synastry_pair
+from matching import CandidatePool, birth_longitudes, chart_longitudes, compatibility_scores, score_matrix
+
+BIRTHS = [
+    dict(year=1990, month=1, day=1, hour=12, minute=0, latitude=28.61, longitude=77.20),
+    dict(year=1975, month=3, day=21, hour=23, minute=59, latitude=51.51, longitude=-0.13),
+    dict(year=2001, month=9, day=9, hour=6, minute=30, latitude=-33.87, longitude=151.21, ayanamsa_type='Raman'),
+]
+
+
+def synthetic_chart(longitudes):
+    """A chart dict with just what calculate_synastry_pair reads."""
+    def point(lon):
+        sign_idx = int(lon // 30)
+        return {'longitude': round(lon, 4), 'sign': SIGNS[sign_idx], 'sign_num': sign_idx + 1}
+    return {'planets': {name: point(lon) for name, lon in zip(BODY_NAMES, longitudes)}, 'ascendant': point(0.0)}
+
+
+def test_scores_match_synastry_pair():
+    rng = np.random.default_rng(3)
+    person = synthetic_chart(rng.uniform(0, 360, len(BODY_NAMES)))
+    own = chart_longitudes(person)
+
+    # Random candidates plus planets sitting exactly on and just past every orb edge
+    rows = list(rng.uniform(0, 360, (300, len(BODY_NAMES))))
+    for edge in (8, 56, 64, 84, 96, 114, 126, 172):
+        for nudge in (0.0, 0.0001, -0.0001):
+            rows.append((own + edge + nudge) % 360)
+    candidates = [synthetic_chart(row) for row in rows]
+
+    matrix = np.array([chart_longitudes(c) for c in candidates])
+    scores = score_matrix(own, matrix)
+    assert np.array_equal(compatibility_scores(own, matrix), scores['compatibility_score'])
+    for i, candidate in enumerate(candidates):
+        expected = calculate_synastry_pair(person, candidate, 'A', 'B')
+        assert scores['compatibility_score'][i] == expected['compatibility_score']
+        for key in ('total', 'harmonious', 'challenging', 'romantic', 'karmic'):
+            assert scores[key][i] == expected['aspect_summary'][key]
+
+
+def test_fractional_orbs_fall_back_to_score_matrix(monkeypatch):
+    import matching
+
+    monkeypatch.setattr(matching, '_UPPER', matching._UPPER + 0.5)
+    assert matching._score_tables() is None
+
+    monkeypatch.setattr(matching, '_SCORE_TABLES', None)
+    rng = np.random.default_rng(4)
+    own = rng.uniform(0, 360, len(BODY_NAMES))
+    matrix = rng.uniform(0, 360, (200, len(BODY_NAMES)))
+    assert np.array_equal(compatibility_scores(own, matrix), score_matrix(own, matrix)['compatibility_score'])
+
+
+def test_top_k_matches_full_sort():
+    rng = np.random.default_rng(5)
+    person = synthetic_chart(rng.uniform(0, 360, len(BODY_NAMES)))
+    lons = np.round(rng.uniform(0, 360, (5000, len(BODY_NAMES))), 4)
+    pool = CandidatePool([f"c{i}" for i in range(len(lons))], lons)
+
+    scores = score_matrix(chart_longitudes(person), lons)['compatibility_score']
+    # Best score first, ties in pool order
+    expected = sorted(range(len(lons)), key=lambda i: (-scores[i], i))
+
+    for k in (1, 7, 50):
+        top = pool.top_k(person, k, chunk_size=700)
+        assert [m['id'] for m in top] == [f"c{i}" for i in expected[:k]]
+        assert [m['compatibility_score'] for m in top] == [scores[i] for i in expected[:k]]
+
+    skip = {f"c{i}" for i in expected[:3]}
+    assert [m['id'] for m in pool.top_k(person, 5, exclude=skip)] == [f"c{i}" for i in expected[3:8]]
+
+
+def test_birth_longitudes_match_charts_and_endpoint():
+    charts = [calculate_chart(context=build_chart_context(**birth)) for birth in BIRTHS]
+    assert np.array_equal(birth_longitudes(BIRTHS), [chart_longitudes(c) for c in charts])
+
+    client = TestClient(main.app)
+    stored = {name: charts[1]['planets'][name]['longitude'] for name in BODY_NAMES}
+    response = client.post("/api/match/rank", json={
+        "person": BIRTHS[0],
+        "candidates": [
+            {"id": "stored", "longitudes": stored},
+            {"id": "raman", "birth_data": BIRTHS[2]},
+        ],
+        "top_k": 2,
+    })
+    assert response.status_code == 200
+    matches = {m['id']: m['compatibility_score'] for m in response.json()['matches']}
+    assert matches['stored'] == calculate_synastry_pair(charts[0], charts[1], 'A', 'B')['compatibility_score']
+
+    response = client.post("/api/match/rank", json={"person": BIRTHS[0], "candidates": [{"id": "empty"}]})
+    assert response.status_code == 400
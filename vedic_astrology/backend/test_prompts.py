@@ -0,0 +1,57 @@
+"""The compact chart encoding against the verbose one, and the prompt endpoint."""
+
+from fastapi.testclient import TestClient
+
+import main
+from calculator import LazyVargas, build_chart_context, calculate_chart, calculate_dasha
+from interpreter import (
+    PLANET_ABBREVIATIONS, SIGN_ABBREVIATIONS, count_tokens, format_chart_compact,
+    format_chart_for_interpretation, interpretation_key
+)
+
+BIRTH = dict(year=1990, month=1, day=1, hour=12, minute=0, latitude=28.61, longitude=77.20)
+
+
+def chart_and_dasha():
+    context = build_chart_context(**BIRTH)
+    chart = calculate_chart(context=context)
+    chart['vargas'] = LazyVargas(chart)
+    return chart, calculate_dasha(context=context)
+
+
+def test_compact_encoding_keeps_the_chart():
+    chart, dasha = chart_and_dasha()
+    lines = format_chart_compact(chart, dasha).splitlines()
+
+    # One row per planet with its sign, degree and house
+    for planet, data in chart['planets'].items():
+        row = next(line for line in lines if line.startswith(PLANET_ABBREVIATIONS[planet] + " "))
+        assert row.split()[1:4] == [SIGN_ABBREVIATIONS[data['sign']], f"{data['degree']:.2f}", str(data['house'])]
+
+    # One row per varga except D1, with the signs in the header's planet order
+    header = next(line for line in lines if line.startswith("Varga Asc")).split()[2:]
+    d9 = next(line for line in lines if line.startswith("D9/")).split()
+    assert d9[1] == SIGN_ABBREVIATIONS[chart['vargas']['D9']['ascendant']['sign']]
+    for abbreviation, sign in zip(header, d9[2:]):
+        planet = next(name for name, abbr in PLANET_ABBREVIATIONS.items() if abbr == abbreviation)
+        assert sign == SIGN_ABBREVIATIONS[chart['vargas']['D9']['planets'][planet]['sign']]
+    assert not any(line.startswith("D1/") for line in lines)
+
+    dasha_line = next(line for line in lines if line.startswith("Dasha: "))
+    assert dasha['current_maha_dasha']['start'][:10] in dasha_line
+    assert count_tokens(format_chart_compact(chart, dasha)) * 3 < count_tokens(format_chart_for_interpretation(chart, dasha))
+
+
+def test_prompt_endpoint_and_cache_keys():
+    client = TestClient(main.app)
+    compact = client.post("/api/interpret/prompt?vargas=true", json=BIRTH).json()
+    verbose = client.post("/api/interpret/prompt?compact=false", json=BIRTH).json()
+
+    assert compact['format'] == 'compact' and compact['text'].startswith("## Birth Chart Data (compact)")
+    assert verbose['format'] == 'verbose' and "D9/" not in verbose['text']
+    assert compact['compact_tokens'] < compact['verbose_tokens']
+    assert compact['verbose_tokens'] > verbose['verbose_tokens']  # the vargas
+
+    # A compact reading is cached apart from the verbose one
+    chart, dasha = chart_and_dasha()
+    assert interpretation_key(chart, dasha, compact=True) != interpretation_key(chart, dasha)
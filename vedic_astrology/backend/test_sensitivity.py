@@ -0,0 +1,65 @@
+"""Birth-time sensitivity against brute-force sampling of the varga signs."""
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+import main
+from calculator import SIGNS, VARGA_KEYS, build_chart_context, compute_varga_signs, get_body_position
+from sensitivity import _ascendant, calculate_birth_time_sensitivity
+
+BIRTH = dict(year=1990, month=1, day=1, hour=12, minute=0, latitude=28.61, longitude=77.20)
+WINDOW = 30
+STEP_MINUTES = 1 / 6  # 10 seconds
+
+
+def sampled_changes(lons, times):
+    """(offset minutes, varga, from, to) wherever a sampled varga sign differs from the previous sample."""
+    signs = compute_varga_signs((lons // 30).astype(int), lons % 30)  # (vargas, samples)
+    changes = []
+    for row, key in enumerate(VARGA_KEYS):
+        for i in np.flatnonzero(signs[row, 1:] != signs[row, :-1]):
+            changes.append((times[i + 1], key, SIGNS[signs[row, i]], SIGNS[signs[row, i + 1]]))
+    return changes
+
+
+def check(found, sampled):
+    for varga in VARGA_KEYS:
+        exact = [c for c in found if c['varga'] == varga]
+        coarse = [s for s in sampled if s[1] == varga]
+        assert [(c['from'], c['to']) for c in exact] == [s[2:] for s in coarse]
+        for change, (offset, *_) in zip(exact, coarse):
+            # The sample after the change is at most one step later (offsets are rounded to 0.01)
+            assert -0.01 <= offset - change['offset_minutes'] <= STEP_MINUTES + 0.01
+
+
+def test_changes_match_sampling():
+    context = build_chart_context(**BIRTH)
+    result = calculate_birth_time_sensitivity(context, WINDOW)
+    offsets = np.arange(-WINDOW, WINDOW + STEP_MINUTES / 2, STEP_MINUTES)
+    jds = context.jd + offsets / 1440
+
+    asc = np.array([_ascendant(jd, context.latitude, context.longitude) for jd in jds])
+    moon = np.array([get_body_position(jd, 'Moon')[0] for jd in jds])
+    for body, lons in (('Ascendant', asc), ('Moon', moon)):
+        check([c for c in result['changes'] if c['body'] == body], sampled_changes(lons, offsets))
+
+    # Margins are the nearest change either side of the birth time
+    for varga, margin in result['margins'].items():
+        offsets_of = [c['offset_minutes'] for c in result['changes'] if c['varga'] == varga]
+        before = [-o for o in offsets_of if o <= 0]
+        after = [o for o in offsets_of if o > 0]
+        assert margin['before'] == (min(before) if before else None)
+        assert margin['after'] == (min(after) if after else None)
+
+
+def test_sensitivity_endpoint():
+    client = TestClient(main.app)
+    response = client.post("/api/chart/sensitivity?window=10&vargas=D1,D9&planets=false", json=BIRTH)
+    assert response.status_code == 200
+    result = response.json()
+    assert result['vargas'] == ['D1', 'D9']
+    assert {c['body'] for c in result['changes']} <= {'Ascendant'}
+    assert all(abs(c['offset_minutes']) <= 10 for c in result['changes'])
+
+    assert client.post("/api/chart/sensitivity?vargas=D99", json=BIRTH).status_code == 400
+    assert client.post("/api/chart/sensitivity?window=0", json=BIRTH).status_code == 400
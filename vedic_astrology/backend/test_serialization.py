@@ -0,0 +1,60 @@
+"""The pre-encoded /api/chart response against FastAPI's response_model output."""
+
+import json
+
+import pytest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import main
+import serialization
+from chart_cache import ChartCache
+from models import ChartResponse
+from workers import chart_response_task
+from calculator import VARGA_KEYS, build_chart_context, calculate_chart, calculate_all_vargas
+
+BIRTH = dict(year=1990, month=1, day=1, hour=12, minute=0, latitude=28.61, longitude=77.20)
+
+
+def test_validated_response_matches_response_model():
+    chart = calculate_chart(context=build_chart_context(**BIRTH))
+    raw = {"D1": chart, "meta": {"ayanamsa_type": chart['ayanamsa_type'], "birth_data": chart['birth_data']}}
+    raw.update(calculate_all_vargas(chart, keys=[key for key in VARGA_KEYS if key != 'D1']))
+
+    # What FastAPI sends for the raw dict through response_model
+    app = FastAPI()
+    app.get("/", response_model=ChartResponse)(lambda: raw)
+    expected = TestClient(app).get("/").json()
+
+    validated = serialization.validated_chart_response(raw)
+    assert validated == expected
+    assert json.loads(serialization.dumps(validated)) == expected
+
+
+def test_chart_endpoint_serves_cached_bytes(monkeypatch):
+    monkeypatch.setattr(main, 'chart_cache', ChartCache())
+    client = TestClient(main.app)
+
+    first = client.post("/api/chart?vargas=D9", json=BIRTH)
+    second = client.post("/api/chart?vargas=D9", json=BIRTH)
+    assert first.headers['content-type'] == 'application/json'
+    assert first.content == second.content
+    assert first.json() == chart_response_task({**BIRTH, 'ayanamsa_type': 'Lahiri'}, ['D1', 'D9'])
+    assert main.chart_cache.stats()['memory_hits'] == 1
+
+    # Without the msgpack package, asking for MessagePack gets JSON
+    monkeypatch.setattr(serialization, 'msgpack', None)
+    packed = client.post("/api/chart?vargas=D9", json=BIRTH, headers={"Accept": "application/msgpack"})
+    assert packed.content == first.content
+
+
+def test_chart_endpoint_serves_msgpack_on_request(monkeypatch):
+    msgpack = pytest.importorskip("msgpack")
+    monkeypatch.setattr(main, 'chart_cache', ChartCache())
+    client = TestClient(main.app)
+
+    plain = client.post("/api/chart?vargas=D9", json=BIRTH)
+    packed = client.post("/api/chart?vargas=D9", json=BIRTH, headers={"Accept": "application/msgpack"})
+    assert packed.headers['content-type'] == 'application/msgpack'
+    assert msgpack.unpackb(packed.content) == plain.json()
@@ -0,0 +1,85 @@
+"""Shared transit snapshots behind /api/alignment."""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from calculator import calculate_current_alignment, resolve_moment, transit_snapshot, localize_alignment
+from snapshots import SnapshotCache, jd_to_minute, minute_to_jd
+
+# The same UTC minute (2026-10-17 03:30 UTC) in three timezones
+SAME_MOMENT = [
+    dict(year=2026, month=10, day=17, hour=9, minute=0, latitude=28.6, longitude=77.2),      # Delhi
+    dict(year=2026, month=10, day=16, hour=23, minute=30, latitude=40.71, longitude=-74.0),  # New York
+    dict(year=2026, month=10, day=17, hour=14, minute=30, latitude=-33.87, longitude=151.2),  # Sydney
+]
+
+
+def test_one_snapshot_serves_every_location():
+    resolved = [resolve_moment(**moment) for moment in SAME_MOMENT]
+    assert len({jd_to_minute(jd) for _, _, jd in resolved}) == 1
+    snapshot = transit_snapshot(resolved[0][2])
+
+    for moment, (tz_name, local_dt, _) in zip(SAME_MOMENT, resolved):
+        assert localize_alignment(snapshot, local_dt, tz_name) == calculate_current_alignment(**moment)
+
+    # The shared snapshot is not modified by localizing it
+    assert snapshot == transit_snapshot(resolved[0][2])
+
+
+def test_concurrent_requests_coalesce_and_failures_are_not_cached():
+    calls = []
+
+    async def fetch(minute, ayanamsa_type):
+        calls.append(minute)
+        await asyncio.sleep(0.01)
+        if len(calls) == 1:
+            raise RuntimeError("worker failed")
+        return {'minute': minute}
+
+    async def scenario():
+        cache = SnapshotCache(fetch, maxsize=2)
+        first = await asyncio.gather(*(cache.get(minute_to_jd(100)) for _ in range(50)), return_exceptions=True)
+        assert len(calls) == 1 and all(isinstance(r, RuntimeError) for r in first)
+
+        second = await asyncio.gather(*(cache.get(minute_to_jd(100) + 0.1 / 1440) for _ in range(50)))
+        assert len(calls) == 2 and all(r is second[0] for r in second)
+
+        # Served from the cache, until evicted by newer minutes
+        assert await cache.get(minute_to_jd(100)) is second[0]
+        await cache.get_minute(101)
+        await cache.get_minute(102)
+        await cache.get_minute(100)
+        assert calls == [100, 100, 101, 102, 100]
+        return cache.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats['coalesced'] == 98 and stats['failures'] == 1 and stats['size'] == 2
+
+
+def test_alignment_endpoint_uses_shared_snapshots():
+    client = TestClient(main.app)
+    before = main.transit_snapshots.stats()['misses']
+    for moment in SAME_MOMENT:
+        response = client.post("/api/alignment", json=moment)
+        assert response.status_code == 200
+        assert response.json() == calculate_current_alignment(**moment)
+    assert main.transit_snapshots.stats()['misses'] == before + 1
+
+
+def test_alignment_endpoint_resolves_the_moment_off_the_event_loop(monkeypatch):
+    loop_calls = []
+
+    def resolve(**moment):
+        try:
+            asyncio.get_running_loop()
+            loop_calls.append(moment)
+        except RuntimeError:
+            pass
+        return resolve_moment(**moment)
+
+    monkeypatch.setattr(main, 'resolve_moment', resolve)
+    response = TestClient(main.app).post("/api/alignment", json=SAME_MOMENT[0])
+    assert response.status_code == 200 and loop_calls == []
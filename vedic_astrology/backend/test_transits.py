@@ -0,0 +1,76 @@
+"""Personal transit timeline against brute-force sampling, slicing and the NDJSON endpoint."""
+
+import json
+from datetime import datetime
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+import main
+from calculator import SIGNS, calculate_chart, get_body_position
+from events import body_crossings
+from transits import iter_transit_events, iter_transit_events_jd, to_jd
+
+CHART = calculate_chart(1990, 1, 1, 12, 0, 28.61, 77.20)
+START, END = datetime(2026, 1, 1), datetime(2027, 1, 1)
+
+
+def sampled_crossings(times, lons, target):
+    """Crossing times of one target found by fixed stepping (to within one step)."""
+    offset = (lons - target + 180) % 360 - 180
+    # Sign changes near zero offset (not the wrap-around at +-180)
+    flips = np.flatnonzero((np.sign(offset[:-1]) != np.sign(offset[1:])) & (np.abs(offset[:-1]) < 90))
+    return times[flips]
+
+
+def test_crossings_match_sampling_through_retrograde():
+    start_jd, end_jd = to_jd(START), to_jd(END)
+    rng = np.random.default_rng(4)
+    for body in ('Mercury', 'Mars', 'Moon'):
+        targets = rng.uniform(0, 360, 6)
+        found = list(body_crossings(body, targets, start_jd, end_jd))
+        assert [jd for jd, _, _ in found] == sorted(jd for jd, _, _ in found)
+        step = 0.02 if body == 'Moon' else 0.1
+        times = np.arange(start_jd, end_jd, step)
+        lons = np.array([get_body_position(t, body)[0] for t in times])
+        for i, target in enumerate(targets):
+            exact = [jd for jd, j, _ in found if j == i]
+            sampled = sampled_crossings(times, lons, target)
+            assert len(exact) == len(sampled)
+            assert all(abs(a - b) <= step for a, b in zip(exact, sampled))
+            for jd in exact:
+                lon, _ = get_body_position(jd, body)
+                assert abs((lon - target + 180) % 360 - 180) < 1e-4
+
+
+def test_events_are_ordered_and_slices_join_up():
+    events = list(iter_transit_events(CHART, START, END))
+    assert [e['time'] for e in events] == sorted(e['time'] for e in events)
+    assert {e['type'] for e in events} == {'aspect', 'house_ingress'}
+    # Mercury turns retrograde in 2026: some of its passes are backwards
+    assert any(e['retrograde'] for e in events if e['transit'] == 'Mercury')
+
+    # Whole sign houses from the natal ascendant
+    for event in events:
+        if event['type'] == 'house_ingress':
+            sign_num = SIGNS.index(event['sign']) + 1
+            assert event['house'] == (sign_num - CHART['ascendant']['sign_num']) % 12 + 1
+
+    # The endpoint computes the window in slices; together they give the same events
+    start_jd, end_jd = to_jd(START), to_jd(END)
+    bounds = list(np.arange(start_jd, end_jd, 31.0)) + [end_jd]
+    sliced = [e for a, b in zip(bounds, bounds[1:]) for e in iter_transit_events_jd(CHART, a, b)]
+    assert sliced == events
+
+
+def test_timeline_endpoint_streams_ndjson():
+    client = TestClient(main.app)
+    body = {"chart": CHART, "start": "2026-01-01T00:00:00", "end": "2026-04-01T00:00:00", "bodies": ["Sun", "Mars"]}
+    response = client.post("/api/transits/timeline", json=body)
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('application/x-ndjson')
+    streamed = [json.loads(line) for line in response.text.splitlines()]
+    assert streamed == list(iter_transit_events(CHART, datetime(2026, 1, 1), datetime(2026, 4, 1), ['Sun', 'Mars']))
+
+    assert client.post("/api/transits/timeline", json={**body, "end": "2025-01-01T00:00:00"}).status_code == 400
+    assert client.post("/api/transits/timeline", json={"start": "2026-01-01T00:00:00"}).status_code == 400
@@ -0,0 +1,708 @@
+"""Differential test: the table-driven varga engine against the per-varga reference functions."""
+
+from typing import Any, Dict
+
+import numpy as np
+import pytest
+
+from calculator import (
+    SIGNS, VARGA_INFO, LazyVargas, calculate_all_vargas, calculate_chart, parse_varga_keys
+)
+
+
+# =============================================================================
+# REFERENCE IMPLEMENTATIONS (the original per-varga functions)
+# =============================================================================
+
+
+
+def calculate_d1_rasi(chart: Dict[str, Any]) -> Dict[str, Any]:
+    """D1 - Rasi chart (main birth chart). Just returns the natal positions."""
+    return {
+        planet_name: {
+            'sign': planet_data['sign'],
+            'sign_num': planet_data['sign_num']
+        }
+        for planet_name, planet_data in chart['planets'].items()
+    }
+
+
+def calculate_d2_hora(chart: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    D2 - Hora chart for wealth.
+    Each sign divided into 2 parts of 15° each.
+    Odd signs: 0-15° = Sun (Leo), 15-30° = Moon (Cancer)
+    Even signs: 0-15° = Moon (Cancer), 15-30° = Sun (Leo)
+    """
+    hora = {}
+    for planet_name, planet_data in chart['planets'].items():
+        degree = planet_data['degree']
+        sign_num = planet_data['sign_num']
+        is_odd_sign = sign_num % 2 == 1
+
+        if degree < 15:
+            # First half
+            hora_sign = 'Leo' if is_odd_sign else 'Cancer'
+        else:
+            # Second half
+            hora_sign = 'Cancer' if is_odd_sign else 'Leo'
+
+        hora[planet_name] = {
+            'sign': hora_sign,
+            'sign_num': SIGNS.index(hora_sign) + 1
+        }
+    return hora
+
+
+def calculate_d3_drekkana(chart: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    D3 - Drekkana chart for siblings and courage.
+    Each sign divided into 3 parts of 10° each.
+    1st drekkana (0-10°): Same sign
+    2nd drekkana (10-20°): 5th sign from it
+    3rd drekkana (20-30°): 9th sign from it
+    """
+    drekkana = {}
+    for planet_name, planet_data in chart['planets'].items():
+        degree = planet_data['degree']
+        sign_idx = planet_data['sign_num'] - 1
+
+        if degree < 10:
+            drekkana_sign_idx = sign_idx
+        elif degree < 20:
+            drekkana_sign_idx = (sign_idx + 4) % 12  # 5th from (0-indexed + 4)
+        else:
+            drekkana_sign_idx = (sign_idx + 8) % 12  # 9th from (0-indexed + 8)
+
+        drekkana[planet_name] = {
+            'sign': SIGNS[drekkana_sign_idx],
+            'sign_num': drekkana_sign_idx + 1
+        }
+    return drekkana
+
+
+def calculate_d4_chaturthamsa(chart: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    D4 - Chaturthamsa chart for fortune and property.
+    Each sign divided into 4 parts of 7.5° each.
+    Movable signs (1,4,7,10): Start from same sign
+    Fixed signs (2,5,8,11): Start from 4th sign
+    Dual signs (3,6,9,12): Start from 7th sign
+    """
+    chaturthamsa = {}
+    for planet_name, planet_data in chart['planets'].items():
+        degree = planet_data['degree']
+        sign_idx = planet_data['sign_num'] - 1
+        part = int(degree / 7.5)
+
+        # Determine sign type (0-indexed)
+        if sign_idx % 3 == 0:  # Movable: Aries, Cancer, Libra, Capricorn
+            start_idx = sign_idx
+        elif sign_idx % 3 == 1:  # Fixed: Taurus, Leo, Scorpio, Aquarius
+            start_idx = (sign_idx + 3) % 12
+        else:  # Dual: Gemini, Virgo, Sagittarius, Pisces
+            start_idx = (sign_idx + 6) % 12
+
+        result_idx = (start_idx + part) % 12
+
+        chaturthamsa[planet_name] = {
+            'sign': SIGNS[result_idx],
+            'sign_num': result_idx + 1
+        }
+    return chaturthamsa
+
+
+def calculate_d7_saptamsa(chart: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    D7 - Saptamsa chart for children.
+    Each sign divided into 7 parts of 4°17'8.57" each.
+    Odd signs: Start from same sign
+    Even signs: Start from 7th sign
+    """
+    saptamsa = {}
+    for planet_name, planet_data in chart['planets'].items():
+        degree = planet_data['degree']
+        sign_idx = planet_data['sign_num'] - 1
+        part = int(degree / (30 / 7))
+        is_odd = sign_idx % 2 == 0  # 0-indexed, so even index = odd sign
+
+        if is_odd:
+            start_idx = sign_idx
+        else:
+            start_idx = (sign_idx + 6) % 12  # 7th from
+
+        result_idx = (start_idx + part) % 12
+
+        saptamsa[planet_name] = {
+            'sign': SIGNS[result_idx],
+            'sign_num': result_idx + 1
+        }
+    return saptamsa
+
+
+def calculate_navamsa(chart: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    D9 - Navamsa chart for marriage and dharma.
+    Each sign divided into 9 parts of 3°20' each.
+    Fire signs (Aries, Leo, Sag): Start from Aries
+    Earth signs (Taurus, Virgo, Cap): Start from Capricorn
+    Air signs (Gemini, Libra, Aqua): Start from Libra
+    Water signs (Cancer, Scorpio, Pisces): Start from Cancer
+    """
+    navamsa = {}
+
+    for planet_name, planet_data in chart['planets'].items():
+        lon = planet_data['longitude']
+        navamsa_num = int((lon % 30) / (30 / 9))
+        sign_idx = planet_data['sign_num'] - 1
+
+        if sign_idx % 4 == 0:  # Fire signs start from Aries
+            navamsa_sign_idx = navamsa_num
+        elif sign_idx % 4 == 1:  # Earth signs start from Capricorn
+            navamsa_sign_idx = (9 + navamsa_num) % 12
+        elif sign_idx % 4 == 2:  # Air signs start from Libra
+            navamsa_sign_idx = (6 + navamsa_num) % 12
+        else:  # Water signs start from Cancer
+            navamsa_sign_idx = (3 + navamsa_num) % 12
+
+        navamsa[planet_name] = {
+            'sign': SIGNS[navamsa_sign_idx],
+            'sign_num': navamsa_sign_idx + 1
+        }
+
+    return navamsa
+
+
+def calculate_d10_dasamsa(chart: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    D10 - Dasamsa chart for career.
+    Each sign divided into 10 parts of 3° each.
+    Odd signs: Start from same sign
+    Even signs: Start from 9th sign
+    """
+    dasamsa = {}
+    for planet_name, planet_data in chart['planets'].items():
+        degree = planet_data['degree']
+        sign_idx = planet_data['sign_num'] - 1
+        part = int(degree / 3)
+        is_odd = sign_idx % 2 == 0
+
+        if is_odd:
+            start_idx = sign_idx
+        else:
+            start_idx = (sign_idx + 8) % 12  # 9th from
+
+        result_idx = (start_idx + part) % 12
+
+        dasamsa[planet_name] = {
+            'sign': SIGNS[result_idx],
+            'sign_num': result_idx + 1
+        }
+    return dasamsa
+
+
+def calculate_d12_dwadasamsa(chart: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    D12 - Dwadasamsa chart for parents.
+    Each sign divided into 12 parts of 2.5° each.
+    Always starts from same sign and cycles through all 12.
+    """
+    dwadasamsa = {}
+    for planet_name, planet_data in chart['planets'].items():
+        degree = planet_data['degree']
+        sign_idx = planet_data['sign_num'] - 1
+        part = int(degree / 2.5)
+
+        result_idx = (sign_idx + part) % 12
+
+        dwadasamsa[planet_name] = {
+            'sign': SIGNS[result_idx],
+            'sign_num': result_idx + 1
+        }
+    return dwadasamsa
+
+
+def calculate_d16_shodasamsa(chart: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    D16 - Shodasamsa chart for vehicles and comforts.
+    Each sign divided into 16 parts of 1°52'30" each.
+    Movable signs: Start from Aries
+    Fixed signs: Start from Leo
+    Dual signs: Start from Sagittarius
+    """
+    shodasamsa = {}
+    for planet_name, planet_data in chart['planets'].items():
+        degree = planet_data['degree']
+        sign_idx = planet_data['sign_num'] - 1
+        part = int(degree / (30 / 16))
+
+        if sign_idx % 3 == 0:  # Movable
+            start_idx = 0  # Aries
+        elif sign_idx % 3 == 1:  # Fixed
+            start_idx = 4  # Leo
+        else:  # Dual
+            start_idx = 8  # Sagittarius
+
+        result_idx = (start_idx + part) % 12
+
+        shodasamsa[planet_name] = {
+            'sign': SIGNS[result_idx],
+            'sign_num': result_idx + 1
+        }
+    return shodasamsa
+
+
+def calculate_d20_vimsamsa(chart: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    D20 - Vimsamsa chart for spiritual progress.
+    Each sign divided into 20 parts of 1.5° each.
+    Movable signs: Start from Aries
+    Fixed signs: Start from Sagittarius
+    Dual signs: Start from Leo
+    """
+    vimsamsa = {}
+    for planet_name, planet_data in chart['planets'].items():
+        degree = planet_data['degree']
+        sign_idx = planet_data['sign_num'] - 1
+        part = int(degree / 1.5)
+
+        if sign_idx % 3 == 0:  # Movable
+            start_idx = 0  # Aries
+        elif sign_idx % 3 == 1:  # Fixed
+            start_idx = 8  # Sagittarius
+        else:  # Dual
+            start_idx = 4  # Leo
+
+        result_idx = (start_idx + part) % 12
+
+        vimsamsa[planet_name] = {
+            'sign': SIGNS[result_idx],
+            'sign_num': result_idx + 1
+        }
+    return vimsamsa
+
+
+def calculate_d24_chaturvimsamsa(chart: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    D24 - Chaturvimsamsa chart for learning and education.
+    Each sign divided into 24 parts of 1.25° each.
+    Odd signs: Start from Leo
+    Even signs: Start from Cancer
+    """
+    chaturvimsamsa = {}
+    for planet_name, planet_data in chart['planets'].items():
+        degree = planet_data['degree']
+        sign_idx = planet_data['sign_num'] - 1
+        part = int(degree / 1.25)
+        is_odd = sign_idx % 2 == 0
+
+        if is_odd:
+            start_idx = 4  # Leo
+        else:
+            start_idx = 3  # Cancer
+
+        result_idx = (start_idx + part) % 12
+
+        chaturvimsamsa[planet_name] = {
+            'sign': SIGNS[result_idx],
+            'sign_num': result_idx + 1
+        }
+    return chaturvimsamsa
+
+
+def calculate_d27_saptavimsamsa(chart: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    D27 - Saptavimsamsa (Bhamsa) chart for strengths/weaknesses.
+    Each sign divided into 27 parts of 1°6'40" each.
+    Fire signs: Start from Aries
+    Earth signs: Start from Cancer
+    Air signs: Start from Libra
+    Water signs: Start from Capricorn
+    """
+    saptavimsamsa = {}
+    for planet_name, planet_data in chart['planets'].items():
+        degree = planet_data['degree']
+        sign_idx = planet_data['sign_num'] - 1
+        part = int(degree / (30 / 27))
+
+        element = sign_idx % 4
+        if element == 0:  # Fire
+            start_idx = 0  # Aries
+        elif element == 1:  # Earth
+            start_idx = 3  # Cancer
+        elif element == 2:  # Air
+            start_idx = 6  # Libra
+        else:  # Water
+            start_idx = 9  # Capricorn
+
+        result_idx = (start_idx + part) % 12
+
+        saptavimsamsa[planet_name] = {
+            'sign': SIGNS[result_idx],
+            'sign_num': result_idx + 1
+        }
+    return saptavimsamsa
+
+
+def calculate_d30_trimsamsa(chart: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    D30 - Trimsamsa chart for evils and misfortunes.
+    Uses unequal divisions based on planetary rulerships.
+    Odd signs: Mars(5°), Saturn(5°), Jupiter(8°), Mercury(7°), Venus(5°)
+    Even signs: Venus(5°), Mercury(7°), Jupiter(8°), Saturn(5°), Mars(5°)
+    """
+    # Trimsamsa lords and their signs
+    odd_rulers = [
+        (5, 'Mars', 'Aries'),
+        (5, 'Saturn', 'Aquarius'),
+        (8, 'Jupiter', 'Sagittarius'),
+        (7, 'Mercury', 'Gemini'),
+        (5, 'Venus', 'Libra')
+    ]
+    even_rulers = [
+        (5, 'Venus', 'Taurus'),
+        (7, 'Mercury', 'Virgo'),
+        (8, 'Jupiter', 'Pisces'),
+        (5, 'Saturn', 'Capricorn'),
+        (5, 'Mars', 'Scorpio')
+    ]
+
+    trimsamsa = {}
+    for planet_name, planet_data in chart['planets'].items():
+        degree = planet_data['degree']
+        sign_idx = planet_data['sign_num'] - 1
+        is_odd = sign_idx % 2 == 0
+
+        rulers = odd_rulers if is_odd else even_rulers
+        cumulative = 0
+        result_sign = rulers[-1][2]  # Default to last
+
+        for span, lord, sign in rulers:
+            cumulative += span
+            if degree < cumulative:
+                result_sign = sign
+                break
+
+        trimsamsa[planet_name] = {
+            'sign': result_sign,
+            'sign_num': SIGNS.index(result_sign) + 1
+        }
+    return trimsamsa
+
+
+def calculate_d40_khavedamsa(chart: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    D40 - Khavedamsa chart for auspicious effects.
+    Each sign divided into 40 parts of 0.75° each.
+    Odd signs: Start from Aries
+    Even signs: Start from Libra
+    """
+    khavedamsa = {}
+    for planet_name, planet_data in chart['planets'].items():
+        degree = planet_data['degree']
+        sign_idx = planet_data['sign_num'] - 1
+        part = int(degree / 0.75)
+        is_odd = sign_idx % 2 == 0
+
+        if is_odd:
+            start_idx = 0  # Aries
+        else:
+            start_idx = 6  # Libra
+
+        result_idx = (start_idx + part) % 12
+
+        khavedamsa[planet_name] = {
+            'sign': SIGNS[result_idx],
+            'sign_num': result_idx + 1
+        }
+    return khavedamsa
+
+
+def calculate_d45_akshavedamsa(chart: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    D45 - Akshavedamsa chart for general indications.
+    Each sign divided into 45 parts of 0.667° each.
+    Movable signs: Start from Aries
+    Fixed signs: Start from Leo
+    Dual signs: Start from Sagittarius
+    """
+    akshavedamsa = {}
+    for planet_name, planet_data in chart['planets'].items():
+        degree = planet_data['degree']
+        sign_idx = planet_data['sign_num'] - 1
+        part = int(degree / (30 / 45))
+
+        if sign_idx % 3 == 0:  # Movable
+            start_idx = 0  # Aries
+        elif sign_idx % 3 == 1:  # Fixed
+            start_idx = 4  # Leo
+        else:  # Dual
+            start_idx = 8  # Sagittarius
+
+        result_idx = (start_idx + part) % 12
+
+        akshavedamsa[planet_name] = {
+            'sign': SIGNS[result_idx],
+            'sign_num': result_idx + 1
+        }
+    return akshavedamsa
+
+
+def calculate_d60_shashtiamsa(chart: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    D60 - Shashtiamsa chart for past life karma.
+    Each sign divided into 60 parts of 0.5° each.
+    Odd signs: Start from Aries
+    Even signs: Start from Libra
+    """
+    shashtiamsa = {}
+    for planet_name, planet_data in chart['planets'].items():
+        degree = planet_data['degree']
+        sign_idx = planet_data['sign_num'] - 1
+        part = int(degree / 0.5)
+        is_odd = sign_idx % 2 == 0
+
+        if is_odd:
+            start_idx = 0  # Aries
+        else:
+            start_idx = 6  # Libra
+
+        result_idx = (start_idx + part) % 12
+
+        shashtiamsa[planet_name] = {
+            'sign': SIGNS[result_idx],
+            'sign_num': result_idx + 1
+        }
+    return shashtiamsa
+
+
+def calculate_varga_ascendant(asc_lon: float, asc_sign_idx: int, division: int, varga_key: str) -> Dict[str, Any]:
+    """Calculate the ascendant position in a divisional chart."""
+    degree = asc_lon % 30
+
+    # Use the same logic as planet calculations for each varga
+    if varga_key == 'D1':
+        result_idx = asc_sign_idx
+    elif varga_key == 'D2':
+        # Hora: odd signs 0-15=Sun(Leo), 15-30=Moon(Cancer)
+        is_odd = asc_sign_idx % 2 == 0
+        result_idx = 4 if (degree < 15) == is_odd else 3  # Leo=4, Cancer=3
+    elif varga_key == 'D3':
+        part = int(degree / 10)
+        if part == 0:
+            result_idx = asc_sign_idx
+        elif part == 1:
+            result_idx = (asc_sign_idx + 4) % 12
+        else:
+            result_idx = (asc_sign_idx + 8) % 12
+    elif varga_key == 'D4':
+        part = int(degree / 7.5)
+        if asc_sign_idx % 3 == 0:
+            start_idx = asc_sign_idx
+        elif asc_sign_idx % 3 == 1:
+            start_idx = (asc_sign_idx + 3) % 12
+        else:
+            start_idx = (asc_sign_idx + 6) % 12
+        result_idx = (start_idx + part) % 12
+    elif varga_key == 'D7':
+        part = int(degree / (30 / 7))
+        is_odd = asc_sign_idx % 2 == 0
+        start_idx = asc_sign_idx if is_odd else (asc_sign_idx + 6) % 12
+        result_idx = (start_idx + part) % 12
+    elif varga_key == 'D9':
+        navamsa_num = int(degree / (30 / 9))
+        if asc_sign_idx % 4 == 0:
+            result_idx = navamsa_num
+        elif asc_sign_idx % 4 == 1:
+            result_idx = (9 + navamsa_num) % 12
+        elif asc_sign_idx % 4 == 2:
+            result_idx = (6 + navamsa_num) % 12
+        else:
+            result_idx = (3 + navamsa_num) % 12
+    elif varga_key == 'D10':
+        part = int(degree / 3)
+        is_odd = asc_sign_idx % 2 == 0
+        start_idx = asc_sign_idx if is_odd else (asc_sign_idx + 8) % 12
+        result_idx = (start_idx + part) % 12
+    elif varga_key == 'D12':
+        part = int(degree / 2.5)
+        result_idx = (asc_sign_idx + part) % 12
+    elif varga_key == 'D16':
+        part = int(degree / (30 / 16))
+        if asc_sign_idx % 3 == 0:
+            start_idx = 0
+        elif asc_sign_idx % 3 == 1:
+            start_idx = 4
+        else:
+            start_idx = 8
+        result_idx = (start_idx + part) % 12
+    elif varga_key == 'D20':
+        part = int(degree / 1.5)
+        if asc_sign_idx % 3 == 0:
+            start_idx = 0
+        elif asc_sign_idx % 3 == 1:
+            start_idx = 8
+        else:
+            start_idx = 4
+        result_idx = (start_idx + part) % 12
+    elif varga_key == 'D24':
+        part = int(degree / 1.25)
+        is_odd = asc_sign_idx % 2 == 0
+        start_idx = 4 if is_odd else 3
+        result_idx = (start_idx + part) % 12
+    elif varga_key == 'D27':
+        part = int(degree / (30 / 27))
+        element = asc_sign_idx % 4
+        if element == 0:
+            start_idx = 0
+        elif element == 1:
+            start_idx = 3
+        elif element == 2:
+            start_idx = 6
+        else:
+            start_idx = 9
+        result_idx = (start_idx + part) % 12
+    elif varga_key == 'D30':
+        # Trimsamsa uses unequal divisions - simplified
+        is_odd = asc_sign_idx % 2 == 0
+        if is_odd:
+            if degree < 5: result_idx = 0
+            elif degree < 10: result_idx = 10
+            elif degree < 18: result_idx = 8
+            elif degree < 25: result_idx = 2
+            else: result_idx = 6
+        else:
+            if degree < 5: result_idx = 1
+            elif degree < 12: result_idx = 5
+            elif degree < 20: result_idx = 11
+            elif degree < 25: result_idx = 9
+            else: result_idx = 7
+    elif varga_key == 'D40':
+        part = int(degree / 0.75)
+        is_odd = asc_sign_idx % 2 == 0
+        start_idx = 0 if is_odd else 6
+        result_idx = (start_idx + part) % 12
+    elif varga_key == 'D45':
+        part = int(degree / (30 / 45))
+        if asc_sign_idx % 3 == 0:
+            start_idx = 0
+        elif asc_sign_idx % 3 == 1:
+            start_idx = 4
+        else:
+            start_idx = 8
+        result_idx = (start_idx + part) % 12
+    elif varga_key == 'D60':
+        part = int(degree / 0.5)
+        is_odd = asc_sign_idx % 2 == 0
+        start_idx = 0 if is_odd else 6
+        result_idx = (start_idx + part) % 12
+    else:
+        result_idx = asc_sign_idx
+
+    return {
+        'sign': SIGNS[result_idx],
+        'sign_num': result_idx + 1
+    }
+
+
+# Per-planet reference implementations, one function per varga
+VARGA_CALCULATORS = {
+    'D1': calculate_d1_rasi,
+    'D2': calculate_d2_hora,
+    'D3': calculate_d3_drekkana,
+    'D4': calculate_d4_chaturthamsa,
+    'D7': calculate_d7_saptamsa,
+    'D9': calculate_navamsa,
+    'D10': calculate_d10_dasamsa,
+    'D12': calculate_d12_dwadasamsa,
+    'D16': calculate_d16_shodasamsa,
+    'D20': calculate_d20_vimsamsa,
+    'D24': calculate_d24_chaturvimsamsa,
+    'D27': calculate_d27_saptavimsamsa,
+    'D30': calculate_d30_trimsamsa,
+    'D40': calculate_d40_khavedamsa,
+    'D45': calculate_d45_akshavedamsa,
+    'D60': calculate_d60_shashtiamsa,
+}
+
+
+def reference_vargas(chart):
+    """The original calculate_all_vargas loop over VARGA_CALCULATORS."""
+    asc_lon = chart['ascendant']['longitude']
+    asc_sign_idx = chart['ascendant']['sign_num'] - 1
+
+    vargas = {}
+    for varga_key, info in VARGA_INFO.items():
+        planets = VARGA_CALCULATORS[varga_key](chart)
+        varga_asc = calculate_varga_ascendant(asc_lon, asc_sign_idx, info['division'], varga_key)
+        for planet_name, planet_data in planets.items():
+            planet_data['house'] = ((planet_data['sign_num'] - varga_asc['sign_num'] + 12) % 12) + 1
+            planet_data['natal_degree'] = round(chart['planets'][planet_name]['degree'], 2)
+        vargas[varga_key] = {
+            'name': info['name'],
+            'description': info['description'],
+            'ascendant': varga_asc,
+            'planets': planets
+        }
+    return vargas
+
+
+def synthetic_chart(longitudes, asc_lon):
+    """A chart with the same rounding as calculate_chart."""
+    def point(lon):
+        sign_idx = int(lon // 30)
+        return {
+            'longitude': round(lon, 4),
+            'sign': SIGNS[sign_idx],
+            'sign_num': sign_idx + 1,
+            'degree': round(lon % 30, 2),
+        }
+    planets = {f"P{i}": point(lon) for i, lon in enumerate(longitudes)}
+    return {'planets': planets, 'ascendant': point(asc_lon)}
+
+
+def test_engine_matches_reference_on_real_charts():
+    for birth in [(1990, 1, 1, 12, 0, 28.61, 77.20), (1975, 3, 21, 23, 59, 51.51, -0.13)]:
+        chart = calculate_chart(*birth)
+        assert calculate_all_vargas(chart) == reference_vargas(chart)
+
+
+def test_engine_matches_reference_on_boundaries():
+    rng = np.random.default_rng(11)
+    # Every varga division boundary, nudged either side, plus the 29.999 -> 30.0 rounding case
+    boundaries = sorted({sign * 30 + k * 30 / n for sign in range(12) for n in (2, 3, 4, 7, 9, 10, 12, 16, 20, 24, 27, 30, 40, 45, 60) for k in range(n)})
+    edges = [b + d for b in boundaries for d in (-0.004, 0.0, 0.004)] + [sign * 30 + 29.998 for sign in range(12)]
+    edges = [lon % 360 for lon in edges]
+
+    for start in range(0, len(edges), 9):
+        lons = edges[start:start + 9]
+        chart = synthetic_chart(lons, float(rng.uniform(0, 360)))
+        assert calculate_all_vargas(chart) == reference_vargas(chart)
+
+    for _ in range(300):
+        chart = synthetic_chart(rng.uniform(0, 360, 10), edges[int(rng.integers(len(edges)))])
+        assert calculate_all_vargas(chart) == reference_vargas(chart)
+
+
+def test_selected_and_lazy_vargas_match_full_set():
+    chart = calculate_chart(1990, 1, 1, 12, 0, 28.61, 77.20)
+    full = calculate_all_vargas(chart)
+
+    assert calculate_all_vargas(chart, keys=['D60', 'D9']) == {'D60': full['D60'], 'D9': full['D9']}
+    assert calculate_all_vargas(chart, keys=[]) == {}
+
+    lazy = LazyVargas(chart, keys=['D1', 'D9', 'D10'])
+    assert 'D9' in lazy and 'D60' not in lazy and lazy.get('D60') is None
+    assert lazy.computed == []
+    assert lazy['D9'] == full['D9']
+    assert lazy.computed == ['D1', 'D9', 'D10']  # one pass for all of them
+    assert lazy['D10'] == full['D10']
+    assert dict(LazyVargas(chart)) == full
+
+
+def test_parse_varga_keys():
+    assert parse_varga_keys(None) == list(VARGA_INFO)
+    assert parse_varga_keys('d10, D9,D9') == ['D9', 'D10']
+    assert parse_varga_keys('') == [] and parse_varga_keys('none') == []
+    with pytest.raises(ValueError):
+        parse_varga_keys('D9,D11')
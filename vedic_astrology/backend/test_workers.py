@@ -0,0 +1,70 @@
+"""Stress test for the chart worker pool: concurrent mixed-ayanamsa load must not cross-contaminate."""
+
+import time
+import random
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+
+from calculator import AYANAMSA_MODES
+from workers import ChartPool, PoolBusy, PoolTimeout, chart_response_task, chart_task
+
+BIRTHS = [
+    dict(year=1990, month=1, day=1, hour=12, minute=0, latitude=28.61, longitude=77.20),
+    dict(year=1975, month=3, day=21, hour=23, minute=59, latitude=51.51, longitude=-0.13),
+    dict(year=2001, month=9, day=9, hour=6, minute=30, latitude=-33.87, longitude=151.21),
+]
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = ChartPool(size=3, max_pending=200, timeout=60)
+    yield pool
+    pool.shutdown()
+
+
+def test_mixed_ayanamsa_load_matches_serial(pool):
+    jobs = [dict(birth, ayanamsa_type=mode) for birth in BIRTHS for mode in AYANAMSA_MODES]
+    expected = [chart_task(job) for job in jobs]
+
+    # Shuffled, concurrent submissions from many request threads
+    rng = random.Random(7)
+    order = [rng.randrange(len(jobs)) for _ in range(150)]
+    with ThreadPoolExecutor(max_workers=24) as threads:
+        results = list(threads.map(lambda i: pool.run(chart_task, jobs[i]), order))
+
+    for i, result in zip(order, results):
+        assert result == expected[i]
+        assert result['ayanamsa_type'] == jobs[i]['ayanamsa_type']
+
+    # The modes really differ, so contamination would have been visible
+    assert len({expected[i]['ayanamsa'] for i in range(len(AYANAMSA_MODES))}) == len(AYANAMSA_MODES)
+
+
+def test_in_process_mode_is_serialized():
+    pool = ChartPool(size=0, max_pending=100, timeout=60)
+    try:
+        jobs = [dict(BIRTHS[0], ayanamsa_type=mode) for mode in AYANAMSA_MODES] * 10
+        expected = [chart_response_task(job, ['D9']) for job in jobs[:len(AYANAMSA_MODES)]]
+        with ThreadPoolExecutor(max_workers=8) as threads:
+            results = list(threads.map(lambda job: pool.run(chart_response_task, job, ['D9']), jobs))
+        assert results == expected * 10
+    finally:
+        pool.shutdown()
+
+
+def test_bounded_queue_and_timeout():
+    pool = ChartPool(size=1, max_pending=1, timeout=0.2)
+    try:
+        running = pool.submit(time.sleep, 1.0)
+        queued = pool.submit(time.sleep, 0)
+        with pytest.raises(PoolBusy):
+            pool.submit(time.sleep, 0)
+        running.result()
+        queued.result()
+
+        with pytest.raises(PoolTimeout):
+            pool.run(time.sleep, 1.0)
+        stats = pool.stats()
+        assert stats['rejected'] == 1 and stats['timeouts'] == 1
+    finally:
+        pool.shutdown()
@@ -0,0 +1,224 @@
+"""
+Cached, grid-quantized timezone resolution.
+
+Looking up a timezone with TimezoneFinder is a point-in-polygon test, which
+is by far the most expensive step of converting a birth time to UTC. Lookups
+go through three layers, cheapest first:
+
+1. An optional precomputed raster (TIMEZONE_RASTER_PATH) holding one zone id
+   per RASTER_DEGREES cell, memory-mapped and shared by all workers.
+2. A bounded LRU of GRID_DEGREES cells. A cell is cached only when no
+   polygon edge of the timezone data touches it, which proves the whole
+   cell is in one zone (sampling points in the cell would miss a border
+   that bends through it). Borders are found for a TILE_DEGREES tile of
+   cells at a time.
+3. The exact polygon test, used for any point in a cell that straddles a
+   border (raster id 0 or a mixed grid cell), memoized on full coordinates.
+
+So points near a border always get the exact answer, and everywhere else a
+repeat lookup is a dictionary hit.
+"""
+
+import os
+import sys
+import json
+import math
+import logging
+import numpy as np
+import pytz
+from functools import lru_cache
+from typing import Dict, Any, Optional
+from timezonefinder import TimezoneFinder
+
+logger = logging.getLogger(__name__)
+
+# Initialize timezone finder (uses bundled data, no API needed)
+tf = TimezoneFinder()
+
+GRID_DEGREES = 0.05  # ~5.5 km at the equator
+GRID_CACHE_SIZE = 65536
+TILE_DEGREES = 1.0
+TILE_CELLS = int(round(TILE_DEGREES / GRID_DEGREES))
+TILE_CACHE_SIZE = 4096
+EXACT_CACHE_SIZE = 16384
+
+RASTER_DEGREES = 0.25
+COORD_SCALE = 1e7  # TimezoneFinder stores degrees as integers x 1e7
+RASTER_PATH_ENV = 'TIMEZONE_RASTER_PATH'
+
+_stats = {'raster_hits': 0, 'raster_border': 0, 'border_errors': 0}
+
+
+def _polygon_lookup(latitude: float, longitude: float) -> str:
+    """Exact TimezoneFinder lookup, with coordinates clamped to the valid range."""
+    latitude = min(90.0, max(-90.0, latitude))
+    longitude = min(180.0, max(-180.0, longitude))
+    return tf.timezone_at(lat=latitude, lng=longitude) or 'UTC'
+
+
+@lru_cache(maxsize=EXACT_CACHE_SIZE)
+def _exact_timezone(latitude: float, longitude: float) -> str:
+    return _polygon_lookup(latitude, longitude)
+
+
+def border_cells(south: float, west: float, resolution: float, rows: int, cols: int) -> np.ndarray:
+    """
+    Mask of the cells of a rows x cols grid (from its south-west corner) that
+    a zone border may cross: every polygon and hole edge marks each cell its
+    bounding box touches. An unmarked cell lies inside a single polygon, so
+    one lookup anywhere in it answers for all of it.
+
+    Reads TimezoneFinder's polygon arrays directly (boundaries, holes and
+    coords_of, as in timezonefinder 9.x, the range requirements.txt allows).
+    """
+    mask = np.zeros((rows, cols), dtype=bool)
+    north, east = south + rows * resolution, west + cols * resolution
+    for shapes, coords_of in ((tf.boundaries, tf.coords_of), (tf.holes, tf.holes.coords_of)):
+        near = ((shapes.xmin <= east * COORD_SCALE) & (shapes.xmax >= west * COORD_SCALE) &
+                (shapes.ymin <= north * COORD_SCALE) & (shapes.ymax >= south * COORD_SCALE))
+        for shape_id in np.flatnonzero(near):
+            x, y = coords_of(int(shape_id)) / COORD_SCALE
+            x_next, y_next = np.roll(x, -1), np.roll(y, -1)
+            # Cell ranges of each edge's bounding box, widened on exact cell lines
+            c0 = np.floor((np.minimum(x, x_next) - west) / resolution - 1e-9).astype(np.int64)
+            c1 = np.floor((np.maximum(x, x_next) - west) / resolution + 1e-9).astype(np.int64)
+            r0 = np.floor((np.minimum(y, y_next) - south) / resolution - 1e-9).astype(np.int64)
+            r1 = np.floor((np.maximum(y, y_next) - south) / resolution + 1e-9).astype(np.int64)
+            inside = (c1 >= 0) & (c0 < cols) & (r1 >= 0) & (r0 < rows)
+            c0, c1 = np.clip(c0[inside], 0, cols - 1), np.clip(c1[inside], 0, cols - 1)
+            r0, r1 = np.clip(r0[inside], 0, rows - 1), np.clip(r1[inside], 0, rows - 1)
+
+            # Most edges span at most two cells each way: their corner cells cover them
+            short = (c1 - c0 <= 1) & (r1 - r0 <= 1)
+            for rs in (r0[short], r1[short]):
+                for cs in (c0[short], c1[short]):
+                    mask[rs, cs] = True
+            for i in np.flatnonzero(~short):
+                mask[r0[i]:r1[i] + 1, c0[i]:c1[i] + 1] = True
+    return mask
+
+
+@lru_cache(maxsize=TILE_CACHE_SIZE)
+def _border_tile(lat_tile: int, lon_tile: int) -> np.ndarray:
+    """Border mask of the grid cells of one TILE_DEGREES tile, computed in one pass."""
+    return border_cells(lat_tile * TILE_DEGREES, lon_tile * TILE_DEGREES, GRID_DEGREES, TILE_CELLS, TILE_CELLS)
+
+
+@lru_cache(maxsize=GRID_CACHE_SIZE)
+def _grid_timezone(lat_idx: int, lon_idx: int) -> Optional[str]:
+    """Zone of a grid cell, or None if a timezone border may cross the cell."""
+    try:
+        border = _border_tile(lat_idx // TILE_CELLS, lon_idx // TILE_CELLS)
+    except (AttributeError, TypeError):
+        # border_cells reads TimezoneFinder internals; without them every point takes the exact test
+        if not _stats['border_errors']:
+            logger.warning("Timezone border index unavailable, using exact lookups", exc_info=True)
+        _stats['border_errors'] += 1
+        return None
+    if border[lat_idx % TILE_CELLS, lon_idx % TILE_CELLS]:
+        return None
+    return _polygon_lookup((lat_idx + 0.5) * GRID_DEGREES, (lon_idx + 0.5) * GRID_DEGREES)
+
+
+class TimezoneRaster:
+    """Read-only precomputed zone raster (zone id per cell, 0 = border cell)."""
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, 'zones.json')) as f:
+            meta = json.load(f)
+        self.resolution = meta['resolution']
+        self.zones = meta['zones']
+        self.grid = np.load(os.path.join(path, 'raster.npy'), mmap_mode='r')
+
+    def zone_at(self, latitude: float, longitude: float) -> Optional[str]:
+        row = min(int((latitude + 90) / self.resolution), self.grid.shape[0] - 1)
+        col = min(int((longitude + 180) / self.resolution), self.grid.shape[1] - 1)
+        zone_id = int(self.grid[row, col])
+        return self.zones[zone_id] if zone_id else None
+
+
+_UNLOADED = object()
+_raster = _UNLOADED
+
+
+def get_raster() -> Optional[TimezoneRaster]:
+    """The raster named by TIMEZONE_RASTER_PATH, opened once per process."""
+    global _raster
+    if _raster is _UNLOADED:
+        path = os.getenv(RASTER_PATH_ENV)
+        _raster = TimezoneRaster(path) if path else None
+    return _raster
+
+
+def resolve_timezone(latitude: float, longitude: float) -> str:
+    """Get timezone string from coordinates, 'UTC' when no zone is found."""
+    raster = get_raster()
+    if raster is not None:
+        zone = raster.zone_at(latitude, longitude)
+        if zone is not None:
+            _stats['raster_hits'] += 1
+            return zone
+        _stats['raster_border'] += 1
+
+    zone = _grid_timezone(math.floor(latitude / GRID_DEGREES), math.floor(longitude / GRID_DEGREES))
+    if zone is not None:
+        return zone
+    return _exact_timezone(latitude, longitude)
+
+
+@lru_cache(maxsize=None)
+def get_tz(tz_name: str):
+    """Cached pytz timezone object."""
+    return pytz.timezone(tz_name)
+
+
+def timezone_cache_stats() -> Dict[str, Any]:
+    """Hit counters for each resolution layer."""
+    grid = _grid_timezone.cache_info()
+    exact = _exact_timezone.cache_info()
+    grid_total = grid.hits + grid.misses
+    return {
+        'raster_loaded': get_raster() is not None,
+        'raster_hits': _stats['raster_hits'],
+        'raster_border': _stats['raster_border'],
+        'border_errors': _stats['border_errors'],
+        'grid_hits': grid.hits,
+        'grid_misses': grid.misses,
+        'grid_size': grid.currsize,
+        'grid_hit_rate': round(grid.hits / grid_total, 4) if grid_total else None,
+        'exact_hits': exact.hits,
+        'exact_misses': exact.misses,
+        'tz_objects': get_tz.cache_info().currsize,
+    }
+
+
+def build_raster(path: str, resolution: float = RASTER_DEGREES) -> Dict[str, Any]:
+    """
+    Precompute the zone raster. Cells no border crosses (see border_cells)
+    get the zone of their centre; the rest keep id 0.
+    """
+    rows, cols = int(round(180 / resolution)), int(round(360 / resolution))
+    border = border_cells(-90.0, -180.0, resolution, rows, cols)
+
+    zones = [None]
+    zone_ids = {}
+    grid = np.zeros((rows, cols), dtype=np.uint16)
+    for r, c in zip(*np.nonzero(~border)):
+        name = _polygon_lookup(-90 + resolution * (r + 0.5), -180 + resolution * (c + 0.5))
+        if name not in zone_ids:
+            zone_ids[name] = len(zones)
+            zones.append(name)
+        grid[r, c] = zone_ids[name]
+
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, 'raster.npy'), grid)
+    meta = {'resolution': resolution, 'zones': zones}
+    with open(os.path.join(path, 'zones.json'), 'w') as f:
+        json.dump(meta, f)
+    return {'resolution': resolution, 'zones': len(zones) - 1, 'border_cells': int((grid == 0).sum())}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (3, 4) or sys.argv[1] != 'build-raster':
+        sys.exit("usage: python timezones.py build-raster <output_dir> [resolution_degrees]")
+    print(build_raster(sys.argv[2], *(float(arg) for arg in sys.argv[3:])))
@@ -0,0 +1,113 @@
+"""
+Personal transit timeline: when transiting planets aspect natal points and
+move into new natal houses.
+
+Natal points are the planets and ascendant of a chart from calculate_chart.
+Every event is a transiting body passing a fixed longitude:
+
+- an aspect: natal point + 0, 60, 90, 120, 180, 240, 270 or 300 degrees
+  (the SYNASTRY_ASPECTS angles, either side);
+- a house ingress: a sign boundary (houses are whole signs from the natal
+  ascendant).
+
+So each body's events come from one events.body_crossings pass over all of
+its targets, with exact times from root-finding. Bodies are merged in time
+order with heapq.merge, and everything is a generator: a long window never
+builds a list of events.
+"""
+
+import heapq
+from datetime import datetime
+from typing import Dict, Any, Iterator, Optional, Sequence
+
+import pytz
+
+from calculator import DEFAULT_AYANAMSA, SIGNS, SYNASTRY_ASPECTS, calculate_julian_day
+from events import body_crossings, jd_to_datetime
+from timezones import get_tz
+
+TRANSIT_BODIES = ['Sun', 'Mercury', 'Venus', 'Mars', 'Jupiter', 'Saturn', 'Rahu', 'Ketu']
+ALL_TRANSIT_BODIES = ['Moon'] + TRANSIT_BODIES
+ASPECT_OFFSETS = [0, 60, 90, 120, 180, 240, 270, 300]
+
+
+def natal_points(chart: Dict[str, Any]) -> Dict[str, float]:
+    """Longitude of every planet and the ascendant of a calculate_chart result."""
+    points = {name: planet['longitude'] for name, planet in chart['planets'].items()}
+    points['Ascendant'] = chart['ascendant']['longitude']
+    return points
+
+
+def _targets(points: Dict[str, float], include_ingresses: bool):
+    """Target longitudes and what passing each one means."""
+    longitudes, meanings = [], []
+    for name, lon in points.items():
+        for offset in ASPECT_OFFSETS:
+            angle = min(offset, 360 - offset)
+            longitudes.append((lon + offset) % 360)
+            meanings.append(('aspect', name, SYNASTRY_ASPECTS[angle]['name'], angle))
+    if include_ingresses:
+        for sign_idx in range(12):
+            longitudes.append(sign_idx * 30.0)
+            meanings.append(('ingress', sign_idx))
+    return longitudes, meanings
+
+
+def to_jd(moment: datetime) -> float:
+    """UT Julian Day of a datetime (naive means UTC)."""
+    if moment.tzinfo is None:
+        moment = pytz.UTC.localize(moment)
+    return calculate_julian_day(moment.astimezone(pytz.UTC))
+
+
+def iter_transit_events(chart: Dict[str, Any], start: datetime, end: datetime,
+                        bodies: Optional[Sequence[str]] = None, include_ingresses: bool = True,
+                        tz_name: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the transit events of a natal chart in (start, end], in time order.
+
+    Args:
+        chart: Natal chart from calculate_chart (its ayanamsa is used for transits)
+        start, end: Window (naive datetimes are UTC)
+        bodies: Transiting bodies (default TRANSIT_BODIES; the Moon adds ~40 events a day)
+        include_ingresses: Also report house ingresses
+        tz_name: Timezone of the event times (default: the chart's birth timezone)
+    """
+    return iter_transit_events_jd(chart, to_jd(start), to_jd(end), bodies, include_ingresses, tz_name)
+
+
+def iter_transit_events_jd(chart: Dict[str, Any], start_jd: float, end_jd: float,
+                           bodies: Optional[Sequence[str]] = None, include_ingresses: bool = True,
+                           tz_name: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """iter_transit_events over UT Julian Days."""
+    bodies = list(bodies or TRANSIT_BODIES)
+    unknown = [b for b in bodies if b not in ALL_TRANSIT_BODIES]
+    if unknown:
+        raise ValueError(f"Unknown transiting body: {', '.join(unknown)}")
+
+    ayanamsa_type = chart.get('ayanamsa_type', DEFAULT_AYANAMSA)
+    tz = get_tz(tz_name or chart.get('birth_data', {}).get('timezone') or 'UTC')
+    asc_sign = chart['ascendant']['sign_num']
+    longitudes, meanings = _targets(natal_points(chart), include_ingresses)
+
+    def crossings(body):
+        for jd, i, direction in body_crossings(body, longitudes, start_jd, end_jd, ayanamsa_type):
+            yield jd, body, i, direction
+
+    for jd, body, i, direction in heapq.merge(*(crossings(b) for b in bodies)):
+        event = {
+            'time': jd_to_datetime(jd, tz).isoformat(),
+            'transit': body,
+            'retrograde': direction < 0,
+        }
+        meaning = meanings[i]
+        if meaning[0] == 'aspect':
+            _, point, aspect, angle = meaning
+            event.update(type='aspect', natal=point, aspect=aspect, angle=angle,
+                         longitude=round(longitudes[i], 4))
+        else:
+            # Moving backwards over a boundary enters the sign below it
+            sign_idx = meaning[1] if direction > 0 else (meaning[1] - 1) % 12
+            event.update(type='house_ingress', sign=SIGNS[sign_idx],
+                         house=(sign_idx + 1 - asc_sign) % 12 + 1)
+        yield event
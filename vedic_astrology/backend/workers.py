@@ -0,0 +1,297 @@
+"""
+Process pool for Swiss Ephemeris work.
+
+Swiss Ephemeris keeps the sidereal mode (and its other settings) in global
+C state, so charts computed concurrently on FastAPI's thread pool can read
+each other's ayanamsa, and CPU-bound work there is serialized by the GIL
+anyway. Chart computation is therefore sent to a pool of worker processes,
+each running one task at a time on its own initialized swe state.
+
+The pool is bounded: at most size + max_pending calls are in flight, and a
+call beyond that fails fast with PoolBusy instead of queueing without limit.
+Every call has a timeout (PoolTimeout). A timed-out task keeps its slot until
+the worker actually finishes it, so a stuck worker cannot be overcommitted.
+
+Configuration (environment):
+    CHART_POOL_SIZE     worker processes (default: CPU count; 0 runs tasks
+                        on a single in-process thread instead)
+    CHART_POOL_QUEUE    calls allowed to wait for a worker (default: 4 * size)
+    CHART_POOL_TIMEOUT  seconds per call (default: 10)
+"""
+
+import os
+import asyncio
+import threading
+import multiprocessing
+from functools import partial
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, List, Optional
+
+import ephemeris
+import timezones
+from ashtakoota import ashtakoota_batch, koota_table, moon_profile, pada_index
+from matching import CandidatePool, birth_longitudes, candidate_longitudes
+from panchang import calculate_panchang_calendar
+from sensitivity import calculate_birth_time_sensitivity
+from serialization import dumps, validated_chart_response
+from transits import iter_transit_events_jd
+from calculator import (
+    DEFAULT_AYANAMSA, set_sidereal_mode, build_chart_context,
+    calculate_chart, calculate_dasha, calculate_natal_dasha, calculate_all_vargas, transit_snapshot
+)
+
+POOL_SIZE_ENV = 'CHART_POOL_SIZE'
+QUEUE_SIZE_ENV = 'CHART_POOL_QUEUE'
+TIMEOUT_ENV = 'CHART_POOL_TIMEOUT'
+DEFAULT_TIMEOUT = 10.0
+
+
+class PoolBusy(RuntimeError):
+    """Every worker is busy and the pending queue is full."""
+
+
+class PoolTimeout(TimeoutError):
+    """A call did not finish within its timeout."""
+
+
+def _init_worker():
+    """Per-process setup: default sidereal mode, shared tables opened once."""
+    set_sidereal_mode(DEFAULT_AYANAMSA)
+    ephemeris.get_table()
+    timezones.get_raster()
+    koota_table()
+
+
+class ChartPool:
+    """Bounded, timed execution of module-level task functions in worker processes."""
+
+    def __init__(self, size: int, max_pending: int, timeout: float = DEFAULT_TIMEOUT):
+        self.size = size
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max(size, 1) + max_pending)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'rejected': 0, 'timeouts': 0, 'restarts': 0}
+        self._executor = self._create_executor()
+
+    def _create_executor(self):
+        if self.size == 0:
+            # One thread keeps swe calls serialized without extra processes
+            return ThreadPoolExecutor(max_workers=1, initializer=_init_worker)
+        return ProcessPoolExecutor(
+            max_workers=self.size,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+        )
+
+    def _release(self, executor, future: Future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if future.cancelled() or future.exception() is not None:
+                self._stats['failed'] += 1
+            else:
+                self._stats['completed'] += 1
+        self._slots.release()
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            self._restart(executor)
+
+    def submit(self, fn, *args) -> Future:
+        """Queue fn(*args) on a worker. Raises PoolBusy when the queue is full."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats['rejected'] += 1
+            raise PoolBusy(f"Chart pool is busy ({self.size} workers, {self.max_pending} pending)")
+
+        executor = self._executor
+        try:
+            future = executor.submit(fn, *args)
+        except BrokenProcessPool:
+            self._slots.release()
+            self._restart(executor)
+            raise
+        except BaseException:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._in_flight += 1
+            self._stats['submitted'] += 1
+        future.add_done_callback(partial(self._release, executor))
+        return future
+
+    def _timed_out(self, future: Future, timeout: float) -> PoolTimeout:
+        future.cancel()
+        with self._lock:
+            self._stats['timeouts'] += 1
+        return PoolTimeout(f"Chart calculation timed out after {timeout:g}s")
+
+    def _restart(self, broken) -> None:
+        """Replace an executor whose worker died; its in-flight calls fail."""
+        with self._lock:
+            if self._executor is not broken:
+                return  # already replaced
+            self._executor = self._create_executor()
+            self._stats['restarts'] += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, fn, *args, timeout: Optional[float] = None):
+        """Run fn(*args) on a worker and wait for the result (blocking)."""
+        timeout = timeout or self.timeout
+        future = self.submit(fn, *args)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            raise self._timed_out(future, timeout) from None
+
+    async def call(self, fn, *args, timeout: Optional[float] = None):
+        """Run fn(*args) on a worker without blocking the event loop."""
+        timeout = timeout or self.timeout
+        future = self.submit(fn, *args)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            raise self._timed_out(future, timeout) from None
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool configuration and call counters."""
+        with self._lock:
+            return {
+                'size': self.size,
+                'max_pending': self.max_pending,
+                'timeout': self.timeout,
+                'in_flight': self._in_flight,
+                **self._stats,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_pool: Optional[ChartPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ChartPool:
+    """The process-wide pool configured from the environment, created on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            size = int(os.getenv(POOL_SIZE_ENV, os.cpu_count() or 1))
+            max_pending = int(os.getenv(QUEUE_SIZE_ENV, 4 * max(size, 1)))
+            timeout = float(os.getenv(TIMEOUT_ENV, DEFAULT_TIMEOUT))
+            _pool = ChartPool(size, max_pending, timeout)
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+
+# =============================================================================
+# TASKS
+# Module-level so they can be pickled to worker processes. Each takes plain
+# birth dicts (BirthData.model_dump()) and returns plain dicts.
+# =============================================================================
+
+def chart_response_task(birth: Dict[str, Any], varga_keys: List[str]) -> Dict[str, Any]:
+    """The /api/chart response: full D1 chart, meta, and the requested vargas."""
+    chart = calculate_chart(context=build_chart_context(**birth))
+
+    # Structure the response to include D1 explicitly and other vargas at top level
+    # This creates a cleaner API that matches Frontend expectations (chart.D1, chart.D9, etc)
+    response = {
+        "D1": chart,  # Main Rashi Chart
+        "meta": {
+            "ayanamsa": chart.get('ayanamsa'),
+            "ayanamsa_type": chart.get('ayanamsa_type'),
+            "birth_data": chart.get('birth_data')
+        }
+    }
+
+    # D1 is the full 'chart' object, not the simplified varga version
+    vargas = calculate_all_vargas(chart, keys=[key for key in varga_keys if key != 'D1'])
+    response.update(vargas)
+    # Validated here, once, so the endpoint can send (and cache) it without response_model
+    return validated_chart_response(response)
+
+
+def chart_task(birth: Dict[str, Any]) -> Dict[str, Any]:
+    return calculate_chart(context=build_chart_context(**birth))
+
+
+def natal_dasha_task(birth: Dict[str, Any]) -> Dict[str, Any]:
+    """The natal dasha, with the local birth time and exact Moon longitude that rebuild its timeline."""
+    context = build_chart_context(**birth)
+    _, natal = calculate_natal_dasha(context=context)
+    return {'birth_time': context.local_dt.isoformat(), 'moon': context.position('Moon')[0], 'natal': natal}
+
+
+def chart_and_dasha_task(birth: Dict[str, Any]) -> tuple:
+    """Chart and dasha from one shared birth context."""
+    context = build_chart_context(**birth)
+    return calculate_chart(context=context), calculate_dasha(context=context)
+
+
+def transit_snapshot_task(minute: int, ayanamsa_type: str = DEFAULT_AYANAMSA) -> Dict[str, Any]:
+    # Minutes as counted by snapshots.jd_to_minute
+    return transit_snapshot(minute / 1440, ayanamsa_type)
+
+
+def calendar_task(request: Dict[str, Any]) -> Dict[str, Any]:
+    # Months are cached in each worker process
+    return calculate_panchang_calendar(**request)
+
+
+def rank_task(person: Dict[str, Any], candidates: List[Dict[str, Any]], top_k: int) -> Dict[str, Any]:
+    chart = calculate_chart(context=build_chart_context(**person))
+    pool = CandidatePool([c['id'] for c in candidates], candidate_longitudes(candidates))
+    return {
+        'candidates': len(pool),
+        'matches': pool.top_k(chart, top_k),
+    }
+
+
+def ashtakoota_task(person: Dict[str, Any], candidates: List[Dict[str, Any]], role: str) -> Dict[str, Any]:
+    moon = float(birth_longitudes([person], ['Moon'])[0, 0])
+    moons = candidate_longitudes(candidates, ['Moon'])[:, 0]
+    results = ashtakoota_batch(moon, moons, role)
+    return {
+        'role': role,
+        'moon': moon_profile(pada_index(moon)),
+        'results': [{'id': c['id'], **result} for c, result in zip(candidates, results)],
+    }
+
+
+def transit_events_task(chart: Dict[str, Any], start_jd: float, end_jd: float,
+                        bodies: Optional[List[str]], include_ingresses: bool,
+                        tz_name: Optional[str]) -> List[Dict[str, Any]]:
+    # One slice of a timeline; the endpoint streams slices one after another
+    return list(iter_transit_events_jd(chart, start_jd, end_jd, bodies, include_ingresses, tz_name))
+
+
+def sensitivity_task(birth: Dict[str, Any], window_minutes: int, varga_keys: List[str],
+                     include_planets: bool) -> Dict[str, Any]:
+    return calculate_birth_time_sensitivity(build_chart_context(**birth), window_minutes, varga_keys, include_planets)
+
+
+def chart_batch_task(items: List[tuple], varga_keys: List[str]) -> bytes:
+    """
+    /api/chart responses for (index, birth) pairs, as NDJSON lines.
+
+    A failing record becomes an {"index", "error"} line. Lines are encoded
+    here so the API process only forwards bytes.
+    """
+    lines = []
+    for index, birth in items:
+        try:
+            line = {'index': index, 'chart': chart_response_task(birth, varga_keys)}
+        except Exception as e:
+            line = {'index': index, 'error': str(e)}
+        lines.append(dumps(line) + b"\n")
+    return b"".join(lines)